@@ -0,0 +1,66 @@
+"""Shared-browser runner for the generated TestSprite scripts.
+
+The names below are imported on first use, not with the package: most
+submodules are also ``python -m harness.<module>`` tools, and importing
+them here first would make ``runpy`` warn that the module it is about to
+run is already in ``sys.modules``.
+"""
+
+from importlib import import_module
+
+# Public name -> submodule that defines it
+_EXPORTS = {
+    "ActionTracer": "actions",
+    "BudgetGate": "budgets",
+    "Budgets": "budgets",
+    "ChunkAnalyzer": "chunks",
+    "CpuProfiler": "cpu_profile",
+    "FailureCapture": "capture",
+    "FixedWaits": "waits",
+    "GoogleBooksFixtures": "google_books",
+    "HarMode": "har",
+    "History": "history",
+    "HistoryRecorder": "history",
+    "KeystrokeAudit": "keystrokes",
+    "LoadGenerator": "load",
+    "MockBackend": "mock_backend",
+    "NetworkShaping": "shaping",
+    "Plugin": "plugins",
+    "ReactProfiler": "react_profile",
+    "Replayer": "replay",
+    "ReportWriter": "report",
+    "RetryPolicy": "flaky",
+    "RunReport": "report",
+    "Runner": "runner",
+    "ScalingBenchmark": "scaling",
+    "SessionCache": "session",
+    "Soak": "soak",
+    "StorageTracer": "storage",
+    "TestResult": "runner",
+    "TestScript": "loader",
+    "WaitEngine": "waits",
+    "WebVitals": "vitals",
+    "discover": "loader",
+    "generate_catalog": "mock_backend",
+    "load_module": "loader",
+    "load_profile": "shaping",
+    "run_legacy": "runner",
+    "run_sharded": "sharding",
+    "to_record": "results",
+    "write_results": "results",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name: str):
+    try:
+        module = _EXPORTS[name]
+    except KeyError:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}") from None
+    value = globals()[name] = getattr(import_module(f".{module}", __name__), name)
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted([*globals(), *__all__])
@@ -0,0 +1,344 @@
+"""A timed span for every Playwright call a script makes.
+
+The scripts are linear lists of ``goto``, ``mouse.wheel`` and
+``locator(...).fill/click`` calls, each under a comment saying what it is
+for. ``ActionTracer`` hands the script proxies instead of the context, its
+pages, frames, locators, mouse and keyboard, and a proxy ``expect``. Every
+awaited call becomes a span with the selector the locator was built from
+(``xpath=html/body/div >> nth=0``), the comment above the statement as its
+label, the ``# ->`` step it belongs to and its outcome (``ok``,
+``timeout`` or ``error``). Pauses (the rewritten sleeps) are spans too.
+
+For locator actions the span is split in two: the wait for the element to
+be visible (attached for ``press`` and ``type``), then the action itself,
+so a slow click shows whether the page or the click was slow. The wait
+uses the action's own timeout and is part of what Playwright's
+actionability checks would have waited for anyway.
+
+Each test's spans are written to ``tmp/traces/TC0xx.json`` (``TC0xx-2.json``
+and so on for retries and repeats) in the Chrome trace-event format, with
+the steps, actions and pauses on separate tracks; open it in Perfetto
+(ui.perfetto.dev) or ``chrome://tracing``. The test's ``actions`` metrics
+sum the wait, action and pause time and keep the slowest spans.
+"""
+
+from __future__ import annotations
+
+import inspect
+import json
+import re
+import sys
+import time
+from functools import lru_cache
+from pathlib import Path
+
+from playwright.async_api import Error as PlaywrightError
+from playwright.async_api import Frame, FrameLocator, Keyboard, Locator, Mouse, Page
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+from playwright.async_api import expect as playwright_expect
+
+from .loader import SUITE_DIR, TARGET_ACTIONS
+from .plugins import Plugin
+
+DEFAULT_DIR = SUITE_DIR / "tmp" / "traces"
+SLOWEST = 10
+# Chrome trace-event thread ids of the three tracks
+STEPS_TRACK, ACTIONS_TRACK, PAUSES_TRACK = 1, 2, 3
+WRAPPED = (Page, Frame, Locator, FrameLocator, Mouse, Keyboard)
+
+
+@lru_cache(maxsize=None)
+def _source_lines(path: str) -> tuple[str, ...]:
+    return tuple(Path(path).read_text(encoding="utf-8").splitlines())
+
+
+def preceding_comment(path: str, line: int) -> str | None:
+    """The comment closest above ``line`` in its block of statements."""
+    lines = _source_lines(path)
+    for index in range(min(line, len(lines) + 1) - 2, -1, -1):
+        text = lines[index].strip()
+        if not text:
+            return None
+        if text.startswith("#"):
+            return re.sub(r"^#+\s*(-+>)?\s*", "", text) or None
+    return None
+
+
+def _unwrap(value):
+    return value._target if isinstance(value, Traced) else value
+
+
+def _child_selector(parent: str | None, name: str, args: tuple) -> str:
+    if name in ("locator", "frame_locator") and args and isinstance(args[0], str):
+        part = args[0]
+    elif name == "nth" and args:
+        part = f"nth={args[0]}"
+    elif name in ("first", "last"):
+        part = "nth=0" if name == "first" else "nth=-1"
+    else:
+        part = f"{name}({', '.join(repr(_unwrap(arg)) for arg in args)})"
+    return f"{parent} >> {part}" if parent else part
+
+
+class Recorder:
+    """The spans of one test run."""
+
+    def __init__(self, run):
+        self.run = run
+        self.path = str(run.script.path)
+        self.spans: list[dict] = []
+
+    def _caller_line(self) -> int | None:
+        frame = sys._getframe(2)
+        while frame is not None and frame.f_code.co_filename != self.path:
+            frame = frame.f_back
+        return frame.f_lineno if frame is not None else None
+
+    def wrap(self, value, selector: str | None = None):
+        if isinstance(value, WRAPPED):
+            return Traced(value, self, selector)
+        if isinstance(value, list) and value and isinstance(value[0], WRAPPED):
+            return [Traced(item, self, selector) for item in value]
+        return value
+
+    def span(self, kind: str, name: str, selector: str | None) -> dict:
+        line = self._caller_line()
+        span = {
+            "name": f"{kind}.{name}",
+            "selector": selector,
+            "label": preceding_comment(self.path, line) if line else None,
+            "step": self.run.steps[-1]["label"] if self.run.steps else None,
+            "line": line,
+            "start": time.time(),
+        }
+        self.spans.append(span)
+        return span
+
+    async def timed(self, span: dict, call, wait=None):
+        """Await ``wait`` (if any) and then ``call``, filling in ``span``."""
+        started = time.perf_counter()
+        acting = None
+        try:
+            if wait is not None:
+                try:
+                    await wait
+                finally:
+                    span["wait_ms"] = round((time.perf_counter() - started) * 1000, 2)
+            acting = time.perf_counter()
+            result = await call
+            span["action_ms"] = round((time.perf_counter() - acting) * 1000, 2)
+            span["outcome"] = "ok"
+            return result
+        except PlaywrightTimeoutError as exc:
+            span["outcome"] = "timeout"
+            span["error"] = str(exc).split("\n", 1)[0]
+            raise
+        except (PlaywrightError, AssertionError) as exc:
+            span["outcome"] = "error"
+            span["error"] = str(exc).split("\n", 1)[0]
+            raise
+        finally:
+            if acting is None and inspect.iscoroutine(call):
+                # The wait failed, so the action never started
+                call.close()
+            span["duration_ms"] = round((time.perf_counter() - started) * 1000, 2)
+
+
+class Traced:
+    """Proxy for a Playwright object that records a span per awaited call."""
+
+    __slots__ = ("_target", "_recorder", "_selector")
+
+    def __init__(self, target, recorder: Recorder, selector: str | None = None):
+        self._target = target
+        self._recorder = recorder
+        self._selector = selector
+
+    def __repr__(self) -> str:
+        return f"Traced({self._target!r})"
+
+    def __getattr__(self, name):
+        value = getattr(self._target, name)
+        if not callable(value):
+            selector = _child_selector(self._selector, name, ()) if name in ("first", "last") else self._selector
+            return self._recorder.wrap(value, selector)
+        return self._method(name, value)
+
+    def _method(self, name: str, method):
+        recorder, selector, target = self._recorder, self._selector, self._target
+
+        def call(*args, **kwargs):
+            result = method(*(_unwrap(arg) for arg in args), **{key: _unwrap(value) for key, value in kwargs.items()})
+            if not inspect.isawaitable(result):
+                if isinstance(result, (Locator, FrameLocator)):
+                    return recorder.wrap(result, _child_selector(selector, name, args))
+                return recorder.wrap(result, selector)
+            kind = type(target).__name__.lower()
+            span = recorder.span(kind, name, selector)
+            wait = None
+            if isinstance(target, Locator) and name in TARGET_ACTIONS and not kwargs.get("force"):
+                # press and type go to the focused element, which need not be visible
+                state = "attached" if name in ("press", "type") else "visible"
+                wait = target.wait_for(state=state, timeout=kwargs.get("timeout"))
+            return _wrap_result(recorder, recorder.timed(span, result, wait), selector)
+
+        return call
+
+
+async def _wrap_result(recorder: Recorder, awaitable, selector):
+    return recorder.wrap(await awaitable, selector)
+
+
+class TracedExpect:
+    """``expect`` that takes proxies and records each assertion as a span."""
+
+    def __init__(self, recorder: Recorder):
+        self._recorder = recorder
+
+    def __call__(self, actual, message: str | None = None):
+        assertions = playwright_expect(_unwrap(actual), message)
+        return _Assertions(assertions, self._recorder, getattr(actual, "_selector", None))
+
+    def __getattr__(self, name):
+        return getattr(playwright_expect, name)
+
+
+class _Assertions:
+    def __init__(self, assertions, recorder: Recorder, selector: str | None):
+        self._assertions = assertions
+        self._recorder = recorder
+        self._selector = selector
+
+    def __getattr__(self, name):
+        value = getattr(self._assertions, name)
+        if name == "not_":
+            return _Assertions(value, self._recorder, self._selector)
+        if not callable(value):
+            return value
+
+        def call(*args, **kwargs):
+            span = self._recorder.span("expect", name, self._selector)
+            return self._recorder.timed(span, value(*(_unwrap(arg) for arg in args), **kwargs))
+
+        return call
+
+
+class _Harness:
+    """The script's ``__harness__`` with its pauses recorded as spans."""
+
+    def __init__(self, run, recorder: Recorder):
+        self._run = run
+        self._recorder = recorder
+
+    def __getattr__(self, name):
+        return getattr(self._run, name)
+
+    async def pause(self, ms: float, page=None, target=None) -> None:
+        span = self._recorder.span("harness", "pause", getattr(target, "_selector", None))
+        span["requested_ms"] = ms
+        await self._recorder.timed(span, self._run.pause(ms, page=_unwrap(page), target=_unwrap(target)))
+
+
+def trace_events(test_id: str, run, spans: list[dict]) -> dict:
+    """The spans and steps of one test as a Chrome trace-event document."""
+    pid = 1
+    events = [
+        {"ph": "M", "pid": pid, "name": "process_name", "args": {"name": test_id}},
+        {"ph": "M", "pid": pid, "tid": STEPS_TRACK, "name": "thread_name", "args": {"name": "steps"}},
+        {"ph": "M", "pid": pid, "tid": ACTIONS_TRACK, "name": "thread_name", "args": {"name": "actions"}},
+        {"ph": "M", "pid": pid, "tid": PAUSES_TRACK, "name": "thread_name", "args": {"name": "pauses"}},
+    ]
+    for step in run.steps:
+        if step.get("duration_ms") is None:
+            continue
+        events.append({"ph": "X", "pid": pid, "tid": STEPS_TRACK, "name": step["label"], "cat": "step",
+                       "ts": round((run.started_at * 1000 + step["offset_ms"]) * 1000),
+                       "dur": round(step["duration_ms"] * 1000)})
+    for span in spans:
+        if "duration_ms" not in span:
+            continue
+        start = round(span["start"] * 1_000_000)
+        pause = span["name"] == "harness.pause"
+        args = {key: span[key] for key in ("selector", "label", "step", "line", "outcome", "error",
+                                            "wait_ms", "action_ms", "requested_ms") if span.get(key) is not None}
+        title = span["name"] + (f" {span['selector']}" if span.get("selector") else "")
+        tid = PAUSES_TRACK if pause else ACTIONS_TRACK
+        events.append({"ph": "X", "pid": pid, "tid": tid, "name": title, "cat": "pause" if pause else "action",
+                       "ts": start, "dur": round(span["duration_ms"] * 1000), "args": args})
+        if span.get("wait_ms") is not None and not pause:
+            events.append({"ph": "X", "pid": pid, "tid": tid, "name": "wait", "cat": "wait",
+                           "ts": start, "dur": round(span["wait_ms"] * 1000)})
+            if span.get("action_ms") is not None:
+                events.append({"ph": "X", "pid": pid, "tid": tid, "name": span["name"], "cat": "action",
+                               "ts": start + round(span["wait_ms"] * 1000), "dur": round(span["action_ms"] * 1000)})
+    return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+
+class ActionTracer(Plugin):
+    def __init__(self, directory: Path = DEFAULT_DIR):
+        self.directory = Path(directory)
+        self._recorders: dict[object, Recorder] = {}
+        self._written: dict[str, int] = {}
+
+    def script_globals(self, run) -> dict:
+        recorder = self._recorders[run] = Recorder(run)
+        return {"expect": TracedExpect(recorder), "__harness__": _Harness(run, recorder)}
+
+    def wrap_context(self, run, handle):
+        recorder = self._recorders.get(run)
+        return handle if recorder is None else _TracedContext(handle, recorder)
+
+    async def after_test(self, run, result) -> None:
+        recorder = self._recorders.pop(run, None)
+        if recorder is None:
+            return
+        spans = recorder.spans
+        self.directory.mkdir(parents=True, exist_ok=True)
+        # One file per attempt: retries and --repeat runs do not overwrite each other
+        count = self._written[result.test_id] = self._written.get(result.test_id, 0) + 1
+        path = self.directory / (f"{result.test_id}.json" if count == 1 else f"{result.test_id}-{count}.json")
+        path.write_text(json.dumps(trace_events(result.test_id, run, spans)), encoding="utf-8")
+        done = [span for span in spans if "duration_ms" in span]
+        pauses = [span for span in done if span["name"] == "harness.pause"]
+        actions = [span for span in done if span["name"] != "harness.pause"]
+        result.metrics["actions"] = {
+            "trace": str(path),
+            "count": len(actions),
+            "wait_ms": round(sum(span.get("wait_ms", 0) for span in actions), 1),
+            "action_ms": round(sum(span.get("action_ms", 0) for span in actions), 1),
+            "pause_ms": round(sum(span["duration_ms"] for span in pauses), 1),
+            "failed": [span for span in actions if span.get("outcome") not in (None, "ok")],
+            "slowest": sorted(done, key=lambda span: -span["duration_ms"])[:SLOWEST],
+        }
+
+
+class _TracedContext:
+    """The script's context handle, handing out traced pages."""
+
+    def __init__(self, handle, recorder: Recorder):
+        self._handle = handle
+        self._recorder = recorder
+
+    def __getattr__(self, name):
+        return getattr(self._handle, name)
+
+    @property
+    def pages(self):
+        return self._recorder.wrap(self._handle.pages)
+
+    async def new_page(self):
+        span = self._recorder.span("context", "new_page", None)
+        return self._recorder.wrap(await self._recorder.timed(span, self._handle.new_page()))
+
+
+def format_actions(results) -> str:
+    """Where each test's time went: waits, actions and pauses."""
+    lines = []
+    for result in results:
+        actions = result.metrics.get("actions")
+        if not actions:
+            continue
+        lines.append(f"    {result.test_id}  {actions['count']:>3} actions  wait {actions['wait_ms'] / 1000:6.1f}s  "
+                     f"act {actions['action_ms'] / 1000:6.1f}s  pauses {actions['pause_ms'] / 1000:6.1f}s  "
+                     f"{actions['trace']}")
+    return "\n".join(lines)
@@ -0,0 +1,55 @@
+"""Facts about the frontend under test, mirrored from ``src/``, and its revision."""
+
+from __future__ import annotations
+
+import os
+import subprocess
+from pathlib import Path
+
+# The scripts hard-code the Vite dev server; .env.development sets VITE_API_URL
+APP_URL = os.environ.get("BOOKHAVEN_APP_URL", "http://localhost:5173")
+API_URL = os.environ.get("VITE_API_URL", "http://localhost:8080/api")
+
+# localStorage keys read by AuthContext.jsx and BookContext.jsx
+TOKEN_KEY = "token"
+USER_KEY = "user"
+CART_KEY = "cart"
+
+# What apiCall in BookContext.jsx shows for each failure class; a connection
+# reset has no mapping and surfaces as axios's own message
+API_TIMEOUT_MS = 10000
+API_ERROR_MESSAGES = {
+    "401": "Your session has expired. Please log in again.",
+    "403": "Access forbidden. You do not have permission to perform this action.",
+    "5xx": "Server error. Please try again later.",
+    "timeout": "Request timeout. Please check your connection and try again.",
+    "reset": "Network Error",
+}
+
+# Route patterns from App.tsx, used to group per-page measurements
+ROUTES = (
+    "/", "/login", "/register", "/books", "/books/:id", "/cart",
+    "/dashboard", "/my-books", "/add-book", "/edit-book/:id",
+)
+
+
+def route_pattern(path: str) -> str:
+    """Return the App.tsx route ``path`` renders, or ``path`` if none does."""
+    segments = path.rstrip("/").split("/") or [""]
+    for route in ROUTES:
+        pattern = route.rstrip("/").split("/")
+        if len(pattern) == len(segments) and all(
+            part.startswith(":") or part == segment for part, segment in zip(pattern, segments)
+        ):
+            return route
+    return path
+
+
+def git_label() -> str:
+    """``git describe`` of the checkout under test, to label measurements with."""
+    try:
+        completed = subprocess.run(["git", "describe", "--always", "--dirty"], cwd=Path(__file__).parent,
+                                   capture_output=True, text=True, timeout=10)
+    except (OSError, subprocess.TimeoutExpired):
+        return "unlabelled"
+    return completed.stdout.strip() or "unlabelled"
@@ -0,0 +1,195 @@
+"""Performance budgets evaluated after every test.
+
+A budget file sets upper limits per route, per interaction and per test::
+
+    {
+      "routes": {
+        "/books": {"lcp_ms": 1500},
+        "/": {"lcp_ms": 2500, "js_decoded_kb": 1500},
+        "*": {"cls": 0.1}
+      },
+      "interactions": {"Add to Cart": {"duration_ms": 100}},
+      "tests": {"TC014": {"duration_ms": 20000}}
+    }
+
+Route budgets take the ``vitals`` measurements (``fcp_ms``, ``lcp_ms``,
+``cls``, ``long_task_ms``, ``suspense_ms``...) of every navigation to the
+route, and the ``*_transfer_kb``/``*_decoded_kb`` chunk totals of its
+document loads. ``"*"`` applies to every route. Interaction budgets match
+the Event Timing label of the control (a glob, case-insensitive) and
+limit its input-to-next-paint ``duration_ms``. Test budgets limit the
+whole script's ``duration_ms``.
+
+With ``--repeat N`` each test runs N times and its budgets are checked
+once, after the last run, against the median of all samples. A test over
+budget is marked failed with the measured median and the threshold.
+"""
+
+from __future__ import annotations
+
+import json
+from collections import defaultdict
+from dataclasses import dataclass, field
+from fnmatch import fnmatch
+from pathlib import Path
+
+from .plugins import Plugin
+from .stats import median
+from .vitals import EVENT_THRESHOLD_MS
+from .vitals import FIELDS as VITALS_FIELDS
+
+DEFAULT_BUDGETS = Path(__file__).resolve().parent / "budgets.json"
+CHUNK_METRICS = frozenset({"js_transfer_kb", "js_decoded_kb", "css_transfer_kb", "css_decoded_kb"})
+ROUTE_METRICS = frozenset(VITALS_FIELDS.values()) | CHUNK_METRICS
+
+
+class BudgetError(ValueError):
+    pass
+
+
+@dataclass
+class Budgets:
+    routes: dict[str, dict[str, float]] = field(default_factory=dict)
+    interactions: dict[str, dict[str, float]] = field(default_factory=dict)
+    tests: dict[str, dict[str, float]] = field(default_factory=dict)
+
+    @classmethod
+    def load(cls, path: Path = DEFAULT_BUDGETS) -> Budgets:
+        try:
+            budgets = cls(**json.loads(Path(path).read_text(encoding="utf-8")))
+        except FileNotFoundError:
+            raise BudgetError(f"no budget file at {path}") from None
+        except (TypeError, ValueError) as exc:
+            raise BudgetError(f"{Path(path).name}: {exc}") from None
+        budgets.validate()
+        return budgets
+
+    def validate(self) -> None:
+        for scope, table, known in (
+            ("route", self.routes, ROUTE_METRICS),
+            ("interaction", self.interactions, {"duration_ms"}),
+            ("test", self.tests, {"duration_ms"}),
+        ):
+            for target, limits in table.items():
+                unknown = set(limits) - known
+                if unknown:
+                    raise BudgetError(f"unknown {scope} metric(s) for {target}: {', '.join(sorted(unknown))}")
+
+    @property
+    def needs_vitals(self) -> bool:
+        route_metrics = {metric for limits in self.routes.values() for metric in limits}
+        return bool(self.interactions) or bool(route_metrics - CHUNK_METRICS)
+
+    @property
+    def needs_chunks(self) -> bool:
+        return any(metric in CHUNK_METRICS for limits in self.routes.values() for metric in limits)
+
+
+def route_samples(metrics: dict, route: str, metric: str) -> list[float]:
+    """One value of ``metric`` per navigation to ``route`` in a test's metrics."""
+
+    def matches(entry):
+        return route == "*" or entry["route"] == route
+
+    if metric in CHUNK_METRICS:
+        # Client-side navigations reuse cached chunks, so only loads count
+        key = metric.removesuffix("_kb") + "_bytes"
+        return [
+            entry[key] / 1024
+            for entry in metrics.get("chunks", [])
+            if matches(entry) and entry["kind"] == "load"
+        ]
+    return [
+        entry[metric]
+        for entry in metrics.get("vitals", {}).get("navigations", [])
+        if matches(entry) and entry.get(metric) is not None
+    ]
+
+
+def interaction_samples(metrics: dict, pattern: str, metric: str) -> list[float]:
+    """Durations of the interactions labelled ``pattern``.
+
+    Inputs with no reported interaction were under the Event Timing
+    threshold; they count at the threshold, so leaving them out does not
+    push the median up. Summed over the test, since an interaction that
+    navigates is reported on the next route but counted on its own.
+    """
+
+    def matches(label):
+        return fnmatch(label.lower(), pattern.lower())
+
+    navigations = metrics.get("vitals", {}).get("navigations", [])
+    samples = [
+        interaction[metric]
+        for entry in navigations
+        for interaction in entry.get("interactions", [])
+        if matches(interaction["label"])
+    ]
+    inputs = sum(count for entry in navigations for label, count in entry.get("inputs", {}).items()
+                 if matches(label))
+    return samples + [EVENT_THRESHOLD_MS] * max(0, inputs - len(samples))
+
+
+class BudgetGate(Plugin):
+    """Collects samples per test and checks them after its last repeat.
+
+    Must come after the plugins that produce ``vitals`` and ``chunks``
+    metrics, since it reads them in ``after_test``. Attempts the runner
+    retries count neither as a repeat nor as samples.
+    """
+
+    def __init__(self, budgets: Budgets, repeat: int = 1):
+        self.budgets = budgets
+        self.repeat = max(1, repeat)
+        self._samples: dict[str, dict[tuple, list[float]]] = defaultdict(lambda: defaultdict(list))
+        self._runs: dict[str, int] = defaultdict(int)
+
+    def _collect(self, result) -> None:
+        samples = self._samples[result.test_id]
+        metrics = result.metrics
+        for route, limits in self.budgets.routes.items():
+            for metric in limits:
+                samples[("route", route, metric)] += route_samples(metrics, route, metric)
+        for pattern, limits in self.budgets.interactions.items():
+            for metric in limits:
+                samples[("interaction", pattern, metric)] += interaction_samples(metrics, pattern, metric)
+        for metric in self.budgets.tests.get(result.test_id, {}):
+            if metric == "duration_ms":
+                samples[("test", result.test_id, metric)].append(result.duration * 1000)
+
+    def _limit(self, scope: str, target: str, metric: str) -> float:
+        table = {"route": self.budgets.routes, "interaction": self.budgets.interactions,
+                 "test": self.budgets.tests}[scope]
+        return table[target][metric]
+
+    async def after_test(self, run, result) -> None:
+        if run.retrying:
+            # The retry stands in for this attempt, as one of the repeats
+            return
+        self._collect(result)
+        self._runs[result.test_id] += 1
+        if self._runs[result.test_id] < self.repeat:
+            return
+        checks = []
+        for (scope, target, metric), values in self._samples.pop(result.test_id, {}).items():
+            if not values:
+                continue
+            threshold = self._limit(scope, target, metric)
+            measured = median(values)
+            checks.append({
+                "scope": scope, "target": target, "metric": metric, "threshold": threshold,
+                "median": round(measured, 4), "samples": len(values), "passed": measured <= threshold,
+            })
+        if not checks:
+            return
+        result.metrics["budgets"] = checks
+        over = [check for check in checks if not check["passed"]]
+        if over:
+            listing = "; ".join(
+                f"{check['target']} {check['metric']} median {check['median']:g} > {check['threshold']:g} "
+                f"({check['samples']} samples)"
+                for check in over
+            )
+            message = f"Performance budget exceeded: {listing}"
+            result.status = "FAILED"
+            result.error = f"{result.error}\n{message}" if result.error else message
@@ -0,0 +1,243 @@
+"""Trace and screencast capture kept only for failing tests.
+
+Recording a full video of every test costs disk writes and encoder time
+in every parallel context, and nearly all of it is thrown away. Here each
+context runs Playwright tracing cut into one chunk per ``# ->`` step, and
+each page streams a CDP screencast of small JPEG frames. Both go into a
+ring buffer per test: the trace chunks of the last ``steps`` steps and the
+frames of the last ``seconds`` seconds. Nothing reaches the output
+directory unless the test fails, including failing a performance budget,
+so this plugin must come after ``BudgetGate``.
+
+On failure ``tmp/failures/TC0xx/`` gets one ``trace-NN-<step>.zip`` per
+buffered step and context (open with ``playwright show-trace``) and the
+frames as ``screencast.webm``, encoded at low resolution with VP9 when
+``ffmpeg`` is on the PATH, or as ``screencast.zip`` of the JPEG frames
+otherwise. The paths are stored in the test's ``capture`` metrics.
+
+Playwright can only export a trace chunk to a file, so each chunk goes
+through a scratch directory (``/dev/shm`` where there is one) and is read
+back into memory straight away.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import base64
+import json
+import os
+import re
+import shutil
+import tempfile
+import zipfile
+from collections import deque
+from pathlib import Path
+
+from playwright.async_api import Error as PlaywrightError
+
+from .loader import SUITE_DIR
+from .plugins import Plugin
+
+DEFAULT_DIR = SUITE_DIR / "tmp" / "failures"
+DEFAULT_SECONDS = 10.0
+DEFAULT_STEPS = 3
+# Page.startScreencast parameters: small, lossy frames
+SCREENCAST = {"format": "jpeg", "quality": 40, "maxWidth": 640, "maxHeight": 360, "everyNthFrame": 2}
+FFMPEG_ARGS = ["-c:v", "libvpx-vp9", "-crf", "45", "-b:v", "0", "-deadline", "realtime", "-cpu-used", "8",
+               "-vf", "scale=640:-2", "-pix_fmt", "yuv420p"]
+
+
+def _slug(label: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "-", label.lower()).strip("-")[:40] or "step"
+
+
+class RingBuffer:
+    """A test's buffered trace chunks and screencast frames."""
+
+    def __init__(self, seconds: float, steps: int):
+        self.seconds = seconds
+        # (step index, step label, context index, zip bytes), grouped by step
+        self.chunks: deque[list[tuple[int, str, int, bytes]]] = deque(maxlen=max(1, steps))
+        # (timestamp in seconds, page index, jpeg bytes)
+        self.frames: deque[tuple[float, int, bytes]] = deque()
+
+    def add_step(self, chunks: list[tuple[int, str, int, bytes]]) -> None:
+        if chunks:
+            self.chunks.append(chunks)
+
+    def add_frame(self, timestamp: float, page: int, jpeg: bytes) -> None:
+        self.frames.append((timestamp, page, jpeg))
+        while self.frames and self.frames[0][0] < timestamp - self.seconds:
+            self.frames.popleft()
+
+    @property
+    def size(self) -> int:
+        return (sum(len(data) for step in self.chunks for *_, data in step)
+                + sum(len(jpeg) for *_, jpeg in self.frames))
+
+
+class FailureCapture(Plugin):
+    def __init__(self, seconds: float = DEFAULT_SECONDS, steps: int = DEFAULT_STEPS,
+                 directory: Path = DEFAULT_DIR):
+        self.seconds = seconds
+        self.steps = steps
+        self.directory = Path(directory)
+        self._buffers: dict[object, RingBuffer] = {}
+        self._contexts: dict[object, list] = {}
+        self._sessions: dict[object, list] = {}
+        self._pending: dict[object, list[asyncio.Task]] = {}
+        self._acks: set[asyncio.Task] = set()
+        self._written: dict[str, int] = {}
+        self._scratch: tempfile.TemporaryDirectory | None = None
+
+    async def start(self, browser) -> None:
+        shm = "/dev/shm" if os.path.isdir("/dev/shm") else None
+        self._scratch = tempfile.TemporaryDirectory(prefix="bh-capture-", dir=shm)
+
+    async def stop(self) -> None:
+        if self._scratch is not None:
+            self._scratch.cleanup()
+            self._scratch = None
+
+    async def on_context(self, run, context) -> None:
+        buffer = self._buffers.setdefault(run, RingBuffer(self.seconds, self.steps))
+        sessions = self._sessions.setdefault(run, [])
+        pending = self._pending.setdefault(run, [])
+        self._contexts.setdefault(run, []).append(context)
+        await context.tracing.start(snapshots=True, screenshots=False, sources=False)
+
+        async def attach(page):
+            index = len(sessions)
+            try:
+                session = await context.new_cdp_session(page)
+                session.on("Page.screencastFrame", lambda params: on_frame(session, index, params))
+                await session.send("Page.startScreencast", SCREENCAST)
+            except PlaywrightError:
+                return
+            sessions.append(session)
+
+        def on_frame(session, index, params):
+            buffer.add_frame(params["metadata"].get("timestamp", 0.0), index, base64.b64decode(params["data"]))
+            ack = asyncio.ensure_future(self._ack(session, params["sessionId"]))
+            self._acks.add(ack)
+            ack.add_done_callback(self._acks.discard)
+
+        context.on("page", lambda page: pending.append(asyncio.ensure_future(attach(page))))
+
+    @staticmethod
+    async def _ack(session, frame_id: int) -> None:
+        try:
+            await session.send("Page.screencastFrameAck", {"sessionId": frame_id})
+        except PlaywrightError:
+            pass
+
+    async def after_step(self, run, step: dict) -> None:
+        buffer = self._buffers.get(run)
+        if buffer is None:
+            return
+        index = len(run.steps) - 1
+        chunks = []
+        for context_index, context in enumerate(self._contexts[run]):
+            data = await self._take_chunk(context, f"{id(run)}-{index}-{context_index}.zip")
+            if data is not None:
+                chunks.append((index, step["label"], context_index, data))
+            try:
+                await context.tracing.start_chunk()
+            except PlaywrightError:
+                pass
+        buffer.add_step(chunks)
+
+    async def _take_chunk(self, context, name: str) -> bytes | None:
+        path = Path(self._scratch.name) / name
+        try:
+            await context.tracing.stop_chunk(path=path)
+            return path.read_bytes()
+        except (PlaywrightError, OSError):
+            return None
+        finally:
+            path.unlink(missing_ok=True)
+
+    async def after_test(self, run, result) -> None:
+        buffer = self._buffers.pop(run, None)
+        if buffer is None:
+            return
+        await asyncio.gather(*self._pending.pop(run), return_exceptions=True)
+        for session in self._sessions.pop(run):
+            try:
+                await session.send("Page.stopScreencast")
+            except PlaywrightError:
+                pass
+        for context in self._contexts.pop(run):
+            try:
+                await context.tracing.stop()
+            except PlaywrightError:
+                pass
+        if result.passed:
+            return
+        result.metrics["capture"] = await self._write(result.test_id, buffer)
+
+    async def _write(self, test_id: str, buffer: RingBuffer) -> dict:
+        count = self._written[test_id] = self._written.get(test_id, 0) + 1
+        directory = self.directory / (test_id if count == 1 else f"{test_id}-{count}")
+        if directory.exists():
+            shutil.rmtree(directory)
+        directory.mkdir(parents=True)
+        traces = []
+        for step in buffer.chunks:
+            for index, label, context_index, data in step:
+                name = f"trace-{index:02d}-{_slug(label)}" + (f"-c{context_index}" if context_index else "")
+                path = directory / f"{name}.zip"
+                path.write_bytes(data)
+                traces.append(str(path))
+        capture = {"directory": str(directory), "traces": traces, "frames": len(buffer.frames),
+                   "buffered_bytes": buffer.size}
+        if buffer.frames:
+            capture["screencast"] = str(await write_screencast(list(buffer.frames), directory))
+        return capture
+
+
+async def write_screencast(frames: list[tuple[float, int, bytes]], directory: Path) -> Path:
+    """Encode ``frames`` as a low-resolution WebM, or zip them if ffmpeg is missing."""
+    frames = sorted(frames, key=lambda frame: frame[0])
+    ffmpeg = shutil.which("ffmpeg")
+    if ffmpeg:
+        path = directory / "screencast.webm"
+        if await _encode(ffmpeg, frames, path):
+            return path
+    path = directory / "screencast.zip"
+    started = frames[0][0]
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_STORED) as archive:
+        # JPEG does not compress further; the names carry the timing
+        for number, (timestamp, page, jpeg) in enumerate(frames):
+            archive.writestr(f"{number:05d}-p{page}-{(timestamp - started) * 1000:.0f}ms.jpg", jpeg)
+        archive.writestr("frames.json", json.dumps(
+            [{"offset_ms": round((timestamp - started) * 1000, 1), "page": page} for timestamp, page, _ in frames]))
+    return path
+
+
+async def _encode(ffmpeg: str, frames: list[tuple[float, int, bytes]], path: Path) -> bool:
+    with tempfile.TemporaryDirectory(prefix="bh-frames-") as scratch:
+        lines = []
+        for number, (timestamp, _, jpeg) in enumerate(frames):
+            name = Path(scratch) / f"{number:05d}.jpg"
+            name.write_bytes(jpeg)
+            following = frames[number + 1][0] if number + 1 < len(frames) else timestamp + 0.1
+            lines.append(f"file '{name}'\nduration {max(0.001, following - timestamp):.3f}\n")
+        # The concat demuxer ignores the last duration unless the file is repeated
+        lines.append(f"file '{Path(scratch) / f'{len(frames) - 1:05d}.jpg'}'\n")
+        listing = Path(scratch) / "frames.txt"
+        listing.write_text("".join(lines), encoding="utf-8")
+        process = await asyncio.create_subprocess_exec(
+            ffmpeg, "-y", "-loglevel", "error", "-f", "concat", "-safe", "0", "-i", str(listing),
+            *FFMPEG_ARGS, str(path),
+            stdout=asyncio.subprocess.DEVNULL, stderr=asyncio.subprocess.DEVNULL,
+        )
+        return await process.wait() == 0 and path.exists()
+
+
+def format_captures(results) -> str:
+    return "\n".join(
+        f"    {result.test_id}  {result.metrics['capture']['directory']}  "
+        f"({len(result.metrics['capture']['traces'])} trace chunks, {result.metrics['capture']['frames']} frames)"
+        for result in results if "capture" in result.metrics
+    )
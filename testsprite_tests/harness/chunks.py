@@ -0,0 +1,246 @@
+"""JS/CSS chunk waterfall and byte accounting per route.
+
+``App.tsx`` lazy-loads the Header, the Footer and every page, and
+``LazyBookCard.tsx`` adds a ``React.lazy`` boundary per card, so what a
+route costs depends on which chunks it pulls in. An init script
+(``js/chunks.js``) attributes every script and stylesheet request to the
+route that was current when it started, with its resource timing and
+sizes. For each navigation the plugin stores the chunks, their waterfall
+and the critical path to first render in the test's ``chunks`` metrics.
+
+The run's per-route report merges every test's navigations. Chunk names
+have Vite's content hash and query string removed, so reports from two
+builds can be compared::
+
+    python -m harness.chunks diff tmp/chunks-main.json tmp/chunks.json
+    python -m harness.chunks show tmp/chunks.json /books
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import re
+import sys
+from collections import defaultdict
+from pathlib import Path
+from urllib.parse import urlsplit
+
+from playwright.async_api import Error as PlaywrightError
+
+from .app import APP_URL, route_pattern
+from .loader import SUITE_DIR
+from .plugins import Plugin, read_js
+from .stats import median
+
+DEFAULT_REPORT = SUITE_DIR / "tmp" / "chunks.json"
+FLUSH_JS = "() => window.__bhChunks ? window.__bhChunks.flush() : null"
+CONTENT_HASH = re.compile(r"-[A-Za-z0-9_-]{8}(?=\.(?:m?js|css)$)")
+
+
+def chunk_name(url: str, origin: str = APP_URL) -> str:
+    """``url`` without query and content hash; host kept only if foreign."""
+    parts = urlsplit(url)
+    name = CONTENT_HASH.sub("", parts.path)
+    if f"{parts.scheme}://{parts.netloc}" != origin.rstrip("/"):
+        name = f"{parts.netloc}{name}"
+    return name
+
+
+def chunk_type(name: str) -> str:
+    return "css" if name.endswith(".css") else "js"
+
+
+def critical_path(chunks: list[dict], render_ms: float | None) -> list[str]:
+    """Chain of requests that each had to finish before the next started.
+
+    Resource timing does not record which module imported which, so the
+    chain is rebuilt from timing alone: start at the last chunk to finish
+    before first render, then repeatedly step to the last chunk that
+    finished before the current one started.
+    """
+    candidates = [chunk for chunk in chunks if render_ms is None or chunk["end_ms"] <= render_ms]
+    path = []
+    while candidates:
+        last = max(candidates, key=lambda chunk: chunk["end_ms"])
+        path.append(last["name"])
+        candidates = [chunk for chunk in candidates if chunk["end_ms"] <= last["start_ms"]]
+    return path[::-1]
+
+
+def navigation(record: dict) -> dict:
+    start = record["startMs"]
+    chunks = sorted(
+        (
+            {
+                "name": chunk_name(resource["url"]),
+                "type": chunk_type(chunk_name(resource["url"])),
+                "start_ms": round(resource["startMs"] - start, 1),
+                "end_ms": round(resource["endMs"] - start, 1),
+                "transfer_bytes": resource["transferBytes"],
+                "decoded_bytes": resource["decodedBytes"],
+            }
+            for resource in record["resources"]
+        ),
+        key=lambda chunk: chunk["start_ms"],
+    )
+    render_ms = record["renderMs"]
+    if render_ms is not None:
+        render_ms = round(render_ms - start, 1)
+    entry = {
+        "route": route_pattern(record["path"]),
+        "path": record["path"],
+        "kind": record["kind"],
+        "render_ms": render_ms,
+        "chunks": chunks,
+        "critical_path": critical_path(chunks, render_ms),
+    }
+    for kind in ("js", "css"):
+        of_kind = [chunk for chunk in chunks if chunk["type"] == kind]
+        entry[f"{kind}_transfer_bytes"] = sum(chunk["transfer_bytes"] for chunk in of_kind)
+        entry[f"{kind}_decoded_bytes"] = sum(chunk["decoded_bytes"] for chunk in of_kind)
+    return entry
+
+
+class ChunkAnalyzer(Plugin):
+    def __init__(self):
+        self._records: dict[object, list[dict]] = {}
+
+    async def on_context(self, run, context) -> None:
+        records = self._records.setdefault(run, [])
+
+        def on_report(source, record):
+            records.append(record)
+
+        await context.expose_binding("__bhChunksReport", on_report)
+        await context.add_init_script(read_js("chunks.js"))
+
+    async def after_test(self, run, result) -> None:
+        records = self._records.pop(run, None)
+        if records is None:
+            return
+        for page in run.pages():
+            try:
+                record = await page.evaluate(FLUSH_JS)
+            except PlaywrightError:
+                continue
+            if record:
+                records.append(record)
+        result.metrics["chunks"] = [navigation(record) for record in records]
+
+
+def build_report(results) -> dict:
+    """Merge every test's navigations into one entry per route."""
+    by_route = defaultdict(list)
+    for result in results:
+        for entry in result.metrics.get("chunks", []):
+            by_route[entry["route"]].append(entry)
+    routes = {}
+    for route, entries in sorted(by_route.items()):
+        chunks = {}
+        for entry in entries:
+            for chunk in entry["chunks"]:
+                known = chunks.setdefault(chunk["name"], {"type": chunk["type"], "transfer_bytes": 0,
+                                                          "decoded_bytes": 0})
+                # Warm-cache visits transfer nothing, so keep the cold numbers
+                known["transfer_bytes"] = max(known["transfer_bytes"], chunk["transfer_bytes"])
+                known["decoded_bytes"] = max(known["decoded_bytes"], chunk["decoded_bytes"])
+        # The visit that fetched the most shows the full waterfall
+        coldest = max(entries, key=lambda entry: (len(entry["chunks"]), entry["kind"] == "load"))
+        renders = [entry["render_ms"] for entry in entries if entry["render_ms"] is not None]
+        row = {
+            "visits": len(entries),
+            "render_ms": median(renders),
+            "chunks": dict(sorted(chunks.items())),
+            "waterfall": [
+                {key: chunk[key] for key in ("name", "start_ms", "end_ms")} for chunk in coldest["chunks"]
+            ],
+            "critical_path": coldest["critical_path"],
+        }
+        for kind in ("js", "css"):
+            of_kind = [chunk for chunk in chunks.values() if chunk["type"] == kind]
+            row[f"{kind}_transfer_bytes"] = sum(chunk["transfer_bytes"] for chunk in of_kind)
+            row[f"{kind}_decoded_bytes"] = sum(chunk["decoded_bytes"] for chunk in of_kind)
+        routes[route] = row
+    return {"routes": routes}
+
+
+def write_report(results, path: Path = DEFAULT_REPORT) -> Path:
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(build_report(results), indent=2) + "\n", encoding="utf-8")
+    return path
+
+
+def _kb(size: int) -> str:
+    return f"{size / 1024:+.1f} KB" if size else "0 KB"
+
+
+def diff_reports(old: dict, new: dict) -> list[str]:
+    """Describe per-route chunk and byte changes from ``old`` to ``new``."""
+    lines = []
+    for route in sorted(set(old["routes"]) | set(new["routes"])):
+        before = old["routes"].get(route)
+        after = new["routes"].get(route)
+        if before is None or after is None:
+            lines.append(f"{route}: {'only in new' if before is None else 'only in old'}")
+            continue
+        changes = []
+        for name in sorted(set(after["chunks"]) - set(before["chunks"])):
+            changes.append(f"  + {name} ({after['chunks'][name]['decoded_bytes'] / 1024:.1f} KB)")
+        for name in sorted(set(before["chunks"]) - set(after["chunks"])):
+            changes.append(f"  - {name} ({before['chunks'][name]['decoded_bytes'] / 1024:.1f} KB)")
+        for name in sorted(set(before["chunks"]) & set(after["chunks"])):
+            delta = after["chunks"][name]["decoded_bytes"] - before["chunks"][name]["decoded_bytes"]
+            if delta:
+                changes.append(f"  ~ {name} {_kb(delta)}")
+        if before["critical_path"] != after["critical_path"]:
+            changes.append(f"  critical path now: {' > '.join(after['critical_path'])}")
+        deltas = {kind: after[f"{kind}_decoded_bytes"] - before[f"{kind}_decoded_bytes"] for kind in ("js", "css")}
+        if changes or any(deltas.values()):
+            lines.append(f"{route}: " + ", ".join(f"{kind.upper()} {_kb(delta)}" for kind, delta in deltas.items()))
+            lines.extend(changes)
+    return lines or ["no changes"]
+
+
+def format_waterfall(route: str, row: dict, width: int = 50) -> str:
+    waterfall = row["waterfall"]
+    lines = [f"{route}  ({row['visits']} visits, JS {row['js_decoded_bytes'] / 1024:.1f} KB, "
+             f"CSS {row['css_decoded_bytes'] / 1024:.1f} KB)"]
+    if not waterfall:
+        return lines[0]
+    end = max(chunk["end_ms"] for chunk in waterfall) or 1
+    critical = set(row["critical_path"])
+    for chunk in waterfall:
+        left = int(chunk["start_ms"] / end * width)
+        bar = max(1, int(chunk["end_ms"] / end * width) - left)
+        marker = "*" if chunk["name"] in critical else " "
+        lines.append(f" {marker}{' ' * left}{'#' * bar:<{width - left}} {chunk['end_ms']:7.0f}ms  {chunk['name']}")
+    return "\n".join(lines)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m harness.chunks",
+                                     description="Inspect and compare chunk reports.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    diff = commands.add_parser("diff", help="compare two reports")
+    diff.add_argument("old", type=Path)
+    diff.add_argument("new", type=Path)
+    show = commands.add_parser("show", help="print per-route waterfalls (* = critical path)")
+    show.add_argument("report", type=Path, nargs="?", default=DEFAULT_REPORT)
+    show.add_argument("routes", nargs="*")
+    options = parser.parse_args(argv)
+
+    if options.command == "diff":
+        old, new = (json.loads(path.read_text(encoding="utf-8")) for path in (options.old, options.new))
+        print("\n".join(diff_reports(old, new)))
+        return 0
+    report = json.loads(options.report.read_text(encoding="utf-8"))
+    for route, row in report["routes"].items():
+        if not options.routes or route in options.routes:
+            print(format_waterfall(route, row) + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
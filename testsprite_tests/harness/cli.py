@@ -0,0 +1,359 @@
+"""Command-line entry point: ``python -m harness`` from ``testsprite_tests/``."""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+from .actions import ActionTracer, format_actions
+from .budgets import DEFAULT_BUDGETS, BudgetError, BudgetGate, Budgets
+from .capture import FailureCapture, format_captures
+from .chunks import DEFAULT_REPORT, ChunkAnalyzer, write_report
+from .cpu_profile import CpuProfiler, format_files
+from .flaky import Quarantine, RetryPolicy, quarantined, scores
+from .google_books import GoogleBooksFixtures
+from .har import HarMode
+from .history import DEFAULT_HISTORY, History, HistoryRecorder
+from .impact import changed_files, expected_durations, format_selection, select
+from .loader import discover
+from .mock_backend import MockBackend, format_stats, generate_catalog, load_catalog
+from .react_profile import ReactProfiler, format_steps
+from .report import DEFAULT_DIR as REPORT_DIR
+from .report import ReportWriter, RunReport
+from .results import DEFAULT_OUTPUT, write_results
+from .runner import Runner, TestResult, describe_error, run_legacy
+from .session import SessionCache
+from .shaping import NetworkShaping, ProfileError, load_profile, summarize_feedback
+from .sharding import default_shard_count, run_sharded
+from .storage import StorageTracer, format_totals
+from .vitals import WebVitals, format_routes
+from .waits import FixedWaits, WaitEngine
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="python -m harness",
+        description="Run the TestSprite suite on a shared browser.",
+    )
+    parser.add_argument("tests", nargs="*", metavar="TC0xx", help="test ids to run (default: all)")
+    parser.add_argument("--changed", nargs="?", const="HEAD", metavar="REV",
+                        help="run only the tests affected by the changes since REV (default: HEAD), "
+                             "following the import graph of src/")
+    parser.add_argument("-j", "--concurrency", type=int, default=4,
+                        help="maximum number of tests running at once (default: 4)")
+    parser.add_argument("--headed", action="store_true", help="show the browser window")
+    parser.add_argument("--shards", type=int, nargs="?", const=0, default=None, metavar="N",
+                        help="run across N worker processes, each with its own browser "
+                             "(N defaults to the number of CPU cores)")
+    parser.add_argument("-o", "--output", type=Path, default=DEFAULT_OUTPUT,
+                        help="merged results file in the tmp/test_results.json record shape "
+                             f"(default: {DEFAULT_OUTPUT.relative_to(DEFAULT_OUTPUT.parents[1])})")
+    parser.add_argument("--history", type=Path, default=DEFAULT_HISTORY, metavar="FILE",
+                        help="SQLite run history each result is added to as its test finishes "
+                             f"(default: {DEFAULT_HISTORY.relative_to(DEFAULT_HISTORY.parents[1])})")
+    parser.add_argument("--no-history", action="store_true", help="do not record the run in the history")
+    parser.add_argument("--report", action="store_true",
+                        help="write tmp/reports/run-N.md and .html, adding each test as it finishes")
+    parser.add_argument("--fixed-waits", action="store_true",
+                        help="keep the scripts' fixed sleeps instead of waiting for readiness")
+    parser.add_argument("--wait-ceiling", type=float, default=None, metavar="MS",
+                        help="cap every readiness wait at MS milliseconds "
+                             "(default: the script's original pause)")
+    parser.add_argument("--session-cache", action="store_true",
+                        help="log in once through the API and seed the login-dependent tests "
+                             "with the resulting storage state")
+    parser.add_argument("--login-email", default=os.environ.get("BOOKHAVEN_TEST_EMAIL", "testuser@example.com"),
+                        help="account used by --session-cache (env BOOKHAVEN_TEST_EMAIL)")
+    parser.add_argument("--login-password", default=os.environ.get("BOOKHAVEN_TEST_PASSWORD", "TestPassword123"),
+                        help="password used by --session-cache (env BOOKHAVEN_TEST_PASSWORD)")
+    parser.add_argument("--mock-backend", action="store_true",
+                        help="serve the REST API from an in-process mock on VITE_API_URL's port")
+    parser.add_argument("--mock-books", type=int, default=24, metavar="N",
+                        help="size of the mock's generated catalog (default: 24)")
+    parser.add_argument("--mock-catalog", type=Path, metavar="FILE",
+                        help="JSON list of books for the mock to serve instead")
+    parser.add_argument("--google-books", choices=("replay", "record"),
+                        help="serve Google Books searches from fixtures/google_books; "
+                             "'record' fetches and saves queries that have no fixture yet")
+    parser.add_argument("--random-seed", type=int, default=1234,
+                        help="seed for Math.random in the page when --google-books is on")
+    parser.add_argument("--har", choices=("record", "replay"),
+                        help="record each test's traffic to fixtures/har/TC0xx.N.har, "
+                             "or replay it from there")
+    parser.add_argument("--network-profile", metavar="NAME|FILE",
+                        help="shape the network with a profile from harness/profiles "
+                             "or a JSON file: latency, bandwidth caps and injected faults")
+    parser.add_argument("--vitals", action="store_true",
+                        help="record FCP, LCP, CLS, long tasks and Suspense time "
+                             "for every route each test visits")
+    parser.add_argument("--chunks", type=Path, nargs="?", const=DEFAULT_REPORT, metavar="FILE",
+                        help="record the JS/CSS chunks each route fetches and write a per-route "
+                             f"report (default: {DEFAULT_REPORT.relative_to(DEFAULT_REPORT.parents[1])})")
+    parser.add_argument("--react-profile", action="store_true",
+                        help="count React commits and component renders in every step of the scripts")
+    parser.add_argument("--storage-trace", action="store_true",
+                        help="count localStorage calls, bytes and sync time in every step of the scripts")
+    parser.add_argument("--cpu-profile", choices=("test", "step"), nargs="?", const="test",
+                        help="record a CPU profile of every page per test (default) or per step "
+                             "into tmp/profiles, with self time per source file")
+    parser.add_argument("--trace-actions", action="store_true",
+                        help="time every Playwright call of the scripts as a span and write "
+                             "tmp/traces/TC0xx.json in the Chrome trace-event format")
+    parser.add_argument("--capture-failures", action="store_true",
+                        help="buffer a Playwright trace per step and a low-resolution screencast, "
+                             "and write them to tmp/failures only for tests that fail")
+    parser.add_argument("--capture-seconds", type=float, default=10, metavar="S",
+                        help="screencast kept for --capture-failures (default: the last 10 s)")
+    parser.add_argument("--capture-steps", type=int, default=3, metavar="N",
+                        help="trace kept for --capture-failures (default: the last 3 steps)")
+    parser.add_argument("--budgets", type=Path, nargs="?", const=DEFAULT_BUDGETS, metavar="FILE",
+                        help="fail tests whose median measurements exceed the performance "
+                             "budgets in FILE (default: harness/budgets.json)")
+    parser.add_argument("--repeat", type=int, default=1, metavar="N",
+                        help="run every test N times; budgets are checked against the medians")
+    parser.add_argument("--retry-flaky", type=int, nargs="?", const=1, default=0, metavar="N",
+                        help="retry a failed test up to N times (default: 1) when its error is a known "
+                             "flaky failure, from the built-in patterns or the history")
+    parser.add_argument("--quarantine", action="store_true",
+                        help="run the tests the history marks as flaky in a separate lane "
+                             "that does not decide the exit status")
+    parser.add_argument("--baseline", action="store_true",
+                        help="also run every script in its own process, sequentially, "
+                             "and report the speedup against that")
+    # Set by main() before any shard starts
+    parser.set_defaults(history_run=None, report_base=None, quarantine_ids=())
+    return parser
+
+
+# The option enabling each plugin and how to build it, in plugin order:
+# ``factory(options, budgets)``. Budgets also turn on the vitals and chunks
+# they check, see build_runner.
+PLUGINS = (
+    ("session_cache", lambda options, budgets: SessionCache(options.login_email, options.login_password)),
+    ("google_books", lambda options, budgets: GoogleBooksFixtures(record=options.google_books == "record",
+                                                                   seed=options.random_seed)),
+    ("har", lambda options, budgets: HarMode(options.har)),
+    ("vitals", lambda options, budgets: WebVitals()),
+    ("chunks", lambda options, budgets: ChunkAnalyzer()),
+    ("react_profile", lambda options, budgets: ReactProfiler()),
+    ("storage_trace", lambda options, budgets: StorageTracer()),
+    ("cpu_profile", lambda options, budgets: CpuProfiler(per=options.cpu_profile)),
+    ("trace_actions", lambda options, budgets: ActionTracer()),
+    # After the plugins whose metrics it reads
+    ("budgets", lambda options, budgets: BudgetGate(budgets, repeat=options.repeat)),
+    # After BudgetGate, so tests over budget count as failed
+    ("capture_failures", lambda options, budgets: FailureCapture(seconds=options.capture_seconds,
+                                                                 steps=options.capture_steps)),
+    # Last, so its routes are tried before the fixture handlers
+    ("network_profile", lambda options, budgets: NetworkShaping(load_profile(options.network_profile))),
+    # Once every other plugin has had its say on the result
+    ("report_base", lambda options, budgets: ReportWriter(options.report_base)),
+    ("history_run", lambda options, budgets: HistoryRecorder(options.history, options.history_run)),
+)
+
+
+def build_runner(options: argparse.Namespace, quarantine: bool = False) -> Runner:
+    if options.fixed_waits:
+        waits = FixedWaits()
+    else:
+        waits = WaitEngine(ceiling_ms=options.wait_ceiling)
+    budgets = Budgets.load(options.budgets) if options.budgets else None
+    enabled = dict(vars(options),
+                   vitals=options.vitals or (budgets is not None and budgets.needs_vitals),
+                   chunks=options.chunks or (budgets is not None and budgets.needs_chunks))
+    # First, so every later plugin sees the lane
+    plugins = [Quarantine()] if quarantine else []
+    plugins += [factory(options, budgets) for option, factory in PLUGINS if enabled[option]]
+    retry = RetryPolicy.from_history(options.history, options.retry_flaky) if options.retry_flaky else None
+    return Runner(concurrency=options.concurrency, headless=not options.headed,
+                  waits=waits, plugins=plugins, repeat=options.repeat, retry=retry)
+
+
+def print_results(label: str, results: list[TestResult], wall: float) -> None:
+    print(f"\n{label}")
+    for result in results:
+        line = f"  {result.test_id}  {result.status:<7} {result.duration:7.2f}s  {result.title}"
+        waits = result.metrics.get("waits")
+        if waits and waits["pauses"]:
+            line += f"  (saved {waits['saved_ms'] / 1000:.1f}s of {waits['fixed_ms'] / 1000:.0f}s sleeps)"
+        print(line)
+        if result.error:
+            print(f"         {result.error.splitlines()[0][:120]}")
+    passed = sum(result.passed for result in results)
+    busy = sum(result.duration for result in results)
+    print(f"  {passed}/{len(results)} passed, wall clock {wall:.2f}s, "
+          f"summed test time {busy:.2f}s")
+    saved = sum(result.metrics.get("waits", {}).get("saved_ms", 0) for result in results)
+    if saved:
+        print(f"  {saved / 1000:.1f}s of fixed sleeps avoided by readiness waits")
+    replays = [result.metrics["har"] for result in results if "saved_ms" in result.metrics.get("har", {})]
+    if replays:
+        live = sum(replay["live_ms"] for replay in replays)
+        replayed = sum(replay["replay_ms"] for replay in replays)
+        print(f"  HAR replay: {replayed / 1000:.1f}s against {live / 1000:.1f}s live "
+              f"({(live - replayed) / 1000:.1f}s saved over {len(replays)} tests)")
+    if any("vitals" in result.metrics for result in results):
+        print("  Per-route medians:")
+        print(format_routes(results))
+    if any("react" in result.metrics for result in results):
+        print("  Steps with the most React renders:")
+        print(format_steps(results))
+    if any("storage" in result.metrics for result in results):
+        print("  Web Storage:")
+        print(format_totals(results))
+    if any("cpu" in result.metrics for result in results):
+        print("  CPU self time per file:")
+        print(format_files(results))
+    if any("actions" in result.metrics for result in results):
+        print("  Action traces:")
+        print(format_actions(results))
+    checks = [check for result in results for check in result.metrics.get("budgets", [])]
+    if checks:
+        over = sum(not check["passed"] for check in checks)
+        print(f"  Budgets: {len(checks) - over}/{len(checks)} checks within budget")
+    if any("capture" in result.metrics for result in results):
+        print("  Failure captures:")
+        print(format_captures(results))
+    feedback = summarize_feedback(results)
+    if feedback:
+        print("  Time to error message:")
+        for name, summary in feedback.items():
+            if summary["count"]:
+                print(f"    {name:<8} {summary['count']}/{summary['injected']} shown, "
+                      f"p50 {summary['p50']:.0f} ms, max {summary['max']:.0f} ms")
+            else:
+                print(f"    {name:<8} 0/{summary['injected']} shown")
+
+
+async def _timed(coroutine):
+    started = time.perf_counter()
+    results = await coroutine
+    return results, time.perf_counter() - started
+
+
+async def _quarantine_lane(options: argparse.Namespace, scripts) -> tuple[list[TestResult], float]:
+    """Run the quarantined tests; if the lane itself breaks, its tests fail, not the run."""
+    started = time.time()
+    try:
+        return await _timed(build_runner(options, quarantine=True).run(scripts))
+    except Exception as exc:
+        error = f"Quarantine lane failed: {describe_error(exc)}"
+        finished = time.time()
+        return [TestResult(script.test_id, script.name, "FAILED", error, started, finished,
+                           metrics={"quarantined": True}) for script in scripts], finished - started
+
+
+def build_backend(options: argparse.Namespace) -> MockBackend | None:
+    if not options.mock_backend:
+        return None
+    if options.mock_catalog:
+        return MockBackend(catalog=load_catalog(options.mock_catalog))
+    return MockBackend(catalog=generate_catalog(options.mock_books))
+
+
+async def _execute(options: argparse.Namespace, scripts) -> list[TestResult]:
+    # The mock runs in this process's loop; shard workers reach it over HTTP
+    backend = build_backend(options)
+    if backend is not None:
+        await backend.start()
+    held = [script for script in scripts if script.test_id in options.quarantine_ids]
+    scripts = [script for script in scripts if script.test_id not in options.quarantine_ids]
+    held_results = []
+    lane = None
+    try:
+        # Started first, but only awaited once the suite's verdict is out
+        lane = asyncio.ensure_future(_quarantine_lane(options, held)) if held else None
+        if not scripts:
+            results, wall = [], 0.0
+            label = "Suite"
+        elif options.shards is None:
+            results, wall = await _timed(build_runner(options).run(scripts))
+            label = f"Shared browser, concurrency {options.concurrency}"
+        else:
+            shards = options.shards or default_shard_count()
+            results, wall = await _timed(run_sharded(scripts, shards, build_runner, options))
+            label = (f"Sharded across {min(shards, len(scripts))} processes, "
+                     f"concurrency {options.concurrency} each")
+        print_results(label, results, wall)
+        retried = [result for result in results if "retry" in result.metrics]
+        if retried:
+            print(f"  {len(retried)} tests retried after a known flaky failure, "
+                  f"{sum(result.passed for result in retried)} recovered")
+        if lane is not None:
+            held_results, held_wall = await lane
+            print_results("Quarantine lane (not part of the verdict)", held_results, held_wall)
+        print(f"  results written to {write_results(results + held_results, options.output)}")
+        if options.report_base is not None:
+            report = RunReport(options.report_base)
+            report.finish(results + held_results, wall)
+            print(f"  report written to {', '.join(str(path) for path in report.paths)}")
+        if options.chunks:
+            print(f"  chunk report written to {write_report(results, options.chunks)}")
+
+        # Over the same tests as the suite: quarantined ones are left out of both
+        if options.baseline and scripts:
+            legacy, legacy_wall = await _timed(run_legacy(scripts))
+            print_results("One process per test (baseline)", legacy, legacy_wall)
+            speedup = f"{legacy_wall / wall:.2f}x" if wall else "n/a"
+            print(f"\nSpeedup: {speedup} ({legacy_wall:.2f}s -> {wall:.2f}s)")
+        elif options.baseline:
+            print("\nSpeedup: n/a (every selected test is quarantined)")
+    finally:
+        if lane is not None and not lane.done():
+            lane.cancel()
+        if backend is not None:
+            await backend.stop()
+            print(f"\nMock backend on {backend.url}")
+            print(format_stats(backend.stats()))
+    return results
+
+
+def main(argv: list[str] | None = None) -> int:
+    options = build_parser().parse_args(argv)
+    scripts = discover(only=options.tests or None)
+    if not scripts:
+        print("No matching TC0xx scripts found.")
+        return 2
+    if options.changed:
+        try:
+            changed = changed_files(options.changed)
+        except subprocess.CalledProcessError as exc:
+            print(f"git diff against {options.changed} failed: {exc.stderr.strip()}")
+            return 2
+        selection = select(changed, [script.test_id for script in scripts])
+        print(format_selection(selection, scripts, expected_durations([script.test_id for script in scripts])))
+        scripts = [script for script in scripts if script.test_id in selection.reasons]
+        if not scripts:
+            print("No tests are affected by the change.")
+            return 0
+    # Fail before any worker starts rather than once per shard
+    try:
+        if options.network_profile:
+            load_profile(options.network_profile)
+        if options.budgets:
+            Budgets.load(options.budgets)
+    except (ProfileError, BudgetError) as exc:
+        print(f"Invalid configuration: {exc}")
+        return 2
+    if options.quarantine and options.history.exists():
+        with History(options.history) as history:
+            options.quarantine_ids = quarantined(scores(history, [script.test_id for script in scripts]))
+        if options.quarantine_ids:
+            print(f"Quarantined as flaky: {' '.join(sorted(options.quarantine_ids))}")
+    if not options.no_history:
+        with History(options.history) as history:
+            options.history_run = history.begin_run(sys.argv[1:] if argv is None else argv)
+    if options.report:
+        name = options.history_run if options.history_run is not None else time.strftime("%Y%m%d-%H%M%S")
+        options.report_base = REPORT_DIR / f"run-{name}"
+        RunReport(options.report_base).begin(f"BookHaven suite run {name}", len(scripts) * options.repeat)
+    results = asyncio.run(_execute(options, scripts))
+    if options.history_run is not None:
+        with History(options.history) as history:
+            history.finish_run(options.history_run)
+    return 0 if all(result.passed for result in results) else 1
@@ -0,0 +1,198 @@
+"""CPU profiles of the app per test or per step.
+
+Each page a test opens gets a CDP session with the sampling ``Profiler``
+running. With ``per="test"`` one profile per page covers the whole test;
+with ``per="step"`` the profile is cut and restarted at every ``# ->``
+step. Profiles are written to ``tmp/profiles`` as ``.cpuprofile`` files,
+which the DevTools Performance panel and speedscope open.
+
+Frames are mapped to their original files through the scripts' source
+maps (fetched once per URL; Vite dev server URLs already name the file),
+so self time adds up per ``src/pages/*.jsx``, ``src/contexts/*.jsx`` and
+``node_modules/<package>``. The test's ``cpu`` metrics keep the self time
+per file and the hottest functions, and a ``TC0xx.collapsed`` file holds
+the samples as collapsed stacks (``root;caller;callee microseconds``) for
+flamegraph.pl or speedscope, with the step as the root frame.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import re
+from collections import Counter
+from pathlib import Path
+
+from playwright.async_api import Error as PlaywrightError
+
+from .loader import SUITE_DIR
+from .plugins import Plugin
+from .sourcemap import SourceMap, decode_data_url, map_reference, source_file
+
+DEFAULT_DIR = SUITE_DIR / "tmp" / "profiles"
+SAMPLING_INTERVAL_US = 200
+# Entries kept in the metrics, most self time first
+TOP_FILES = 25
+TOP_FUNCTIONS = 15
+
+
+def _slug(label: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "-", label.lower()).strip("-")[:40] or "step"
+
+
+def frame_name(file: str, function: str) -> str:
+    if file == function:
+        return function
+    return f"{function} {file}" if file.startswith("(") else f"{function} ({file})"
+
+
+def self_times(profile: dict) -> Counter:
+    """Microseconds of self time per node id."""
+    samples, deltas = profile.get("samples", []), profile.get("timeDeltas", [])
+    times = Counter()
+    # timeDeltas[i] is the gap before sample i, so sample i lasts until i + 1
+    for index, node_id in enumerate(samples[:-1]):
+        times[node_id] += max(0, deltas[index + 1])
+    return times
+
+
+class CpuProfiler(Plugin):
+    def __init__(self, per: str = "test", directory: Path = DEFAULT_DIR,
+                 interval_us: int = SAMPLING_INTERVAL_US):
+        if per not in ("test", "step"):
+            raise ValueError(f"per must be 'test' or 'step', not {per!r}")
+        self.per = per
+        self.directory = Path(directory)
+        self.interval_us = interval_us
+        self._sessions: dict[object, list] = {}
+        self._pending: dict[object, list[asyncio.Task]] = {}
+        self._profiles: dict[object, list[tuple[str, dict]]] = {}
+        self._requests: dict[object, object] = {}
+        self._maps: dict[str, SourceMap | None] = {}
+
+    async def on_context(self, run, context) -> None:
+        sessions = self._sessions.setdefault(run, [])
+        pending = self._pending.setdefault(run, [])
+        self._profiles.setdefault(run, [])
+        self._requests[run] = context.request
+
+        async def attach(page):
+            try:
+                session = await context.new_cdp_session(page)
+                await session.send("Profiler.enable")
+                await session.send("Profiler.setSamplingInterval", {"interval": self.interval_us})
+                await session.send("Profiler.start")
+            except PlaywrightError:
+                return
+            sessions.append(session)
+
+        context.on("page", lambda page: pending.append(asyncio.ensure_future(attach(page))))
+
+    async def _collect(self, run, label: str, restart: bool) -> None:
+        await asyncio.gather(*self._pending.get(run, []), return_exceptions=True)
+        for session in list(self._sessions.get(run, [])):
+            try:
+                profile = (await session.send("Profiler.stop"))["profile"]
+                if restart:
+                    await session.send("Profiler.start")
+            except PlaywrightError:
+                # The page is gone and its profile with it
+                self._sessions[run].remove(session)
+                continue
+            self._profiles[run].append((label, profile))
+
+    async def after_step(self, run, step: dict) -> None:
+        if self.per == "step" and run in self._sessions:
+            await self._collect(run, step["label"], restart=True)
+
+    async def after_test(self, run, result) -> None:
+        if run not in self._sessions:
+            return
+        if self.per == "test":
+            await self._collect(run, "test", restart=False)
+        profiles = self._profiles.pop(run)
+        self._sessions.pop(run)
+        self._pending.pop(run)
+        request = self._requests.pop(run)
+        if not profiles:
+            return
+        self.directory.mkdir(parents=True, exist_ok=True)
+        files = Counter()
+        functions = Counter()
+        stacks = Counter()
+        written = []
+        for index, (label, profile) in enumerate(profiles):
+            name = f"{result.test_id}-{index:02d}" + (f"-{_slug(label)}" if self.per == "step" else "")
+            path = self.directory / f"{name}.cpuprofile"
+            path.write_text(json.dumps(profile), encoding="utf-8")
+            written.append(str(path))
+            frames = await self._frames(request, profile)
+            parents = {child: node["id"] for node in profile["nodes"] for child in node.get("children", [])}
+            for node_id, micros in self_times(profile).items():
+                file, function = frames[node_id]
+                files[file] += micros
+                functions[frame_name(file, function)] += micros
+                stack = []
+                current = node_id
+                while current is not None:
+                    file, function = frames[current]
+                    if function != "(root)":
+                        stack.append(frame_name(file, function))
+                    current = parents.get(current)
+                stacks[";".join([label, *reversed(stack)])] += micros
+        collapsed = self.directory / f"{result.test_id}.collapsed"
+        collapsed.write_text("".join(f"{stack} {micros}\n" for stack, micros in sorted(stacks.items())),
+                             encoding="utf-8")
+        result.metrics["cpu"] = {
+            "profiles": written,
+            "collapsed": str(collapsed),
+            "total_ms": round(sum(files.values()) / 1000, 1),
+            "self_ms": {file: round(micros / 1000, 1) for file, micros in files.most_common(TOP_FILES)},
+            "functions_ms": {name: round(micros / 1000, 1) for name, micros in functions.most_common(TOP_FUNCTIONS)},
+        }
+
+    async def _source_map(self, request, url: str) -> SourceMap | None:
+        if url in self._maps:
+            return self._maps[url]
+        source_map = None
+        try:
+            script = await (await request.get(url)).text()
+            reference = map_reference(url, script)
+            if reference and reference.startswith("data:"):
+                source_map = SourceMap.parse(decode_data_url(reference))
+            elif reference:
+                source_map = SourceMap.parse(await (await request.get(reference)).text())
+        except (PlaywrightError, ValueError, KeyError):
+            pass
+        self._maps[url] = source_map
+        return source_map
+
+    async def _frames(self, request, profile: dict) -> dict[int, tuple[str, str]]:
+        """Node id -> (original file, function name)."""
+        frames = {}
+        for node in profile["nodes"]:
+            frame = node["callFrame"]
+            url, function = frame.get("url", ""), frame.get("functionName") or "(anonymous)"
+            if not url:
+                # (root), (program), (idle), (garbage collector) and native code
+                frames[node["id"]] = ("(native)" if not function.startswith("(") else function, function)
+                continue
+            file = source_file(url)
+            if url.startswith("http"):
+                source_map = await self._source_map(request, url)
+                original = source_map and source_map.lookup(frame["lineNumber"], frame["columnNumber"])
+                if original:
+                    file = source_file(original[0])
+            frames[node["id"]] = (file, function)
+        return frames
+
+
+def format_files(results, limit: int = 12) -> str:
+    """Self time per source file summed over ``results``, app files first."""
+    files = Counter()
+    for result in results:
+        for file, ms in result.metrics.get("cpu", {}).get("self_ms", {}).items():
+            files[file] += ms
+    app = [(file, ms) for file, ms in files.most_common() if file.startswith("src/")]
+    other = [(file, ms) for file, ms in files.most_common() if not file.startswith("src/")]
+    return "\n".join(f"    {ms:>9.1f} ms  {file}" for file, ms in (app[:limit] + other[:limit // 2]))
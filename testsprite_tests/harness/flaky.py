@@ -0,0 +1,182 @@
+"""Flakiness scores from the run history, targeted retries and quarantine.
+
+The scripts wait with fixed timeouts (``set_default_timeout(5000)``) and
+click absolute XPaths, so some of them fail on one run and pass on the
+next. Every execution is in the run history (``harness.history``), retries
+included, and a test's flakiness score is its flip rate: how often the
+outcome changed between consecutive executions, over the newest ``last``
+of them. A test that always fails scores 0; it is broken, not flaky.
+
+``RetryPolicy`` retries a failed test only if the first line of its error,
+with numbers masked (its signature), matches ``FLAKY_PATTERNS`` (timeouts,
+detached or covered elements, dropped connections...) or a signature that
+a retry has already recovered from in the history. Assertion failures and
+budget overruns are never retried. A retried execution carries
+``retry.attempt`` and the earlier errors in its metrics.
+
+Tests scoring at least ``QUARANTINE_SCORE`` over at least
+``QUARANTINE_MIN_RUNS`` executions are quarantined: with ``--quarantine``
+they run in a lane of their own, in parallel with the suite, and their
+results are reported and recorded but do not decide the exit status. They
+leave quarantine once their recent history is stable again::
+
+    python -m harness --retry-flaky --quarantine
+    python -m harness.flaky --last 30
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import re
+import sys
+from pathlib import Path
+
+from .history import DEFAULT_HISTORY, History
+from .plugins import Plugin
+
+DEFAULT_LAST = 30
+QUARANTINE_SCORE = 0.3
+QUARANTINE_MIN_RUNS = 8
+# Signatures of failures that come and go with timing, not with the code
+FLAKY_PATTERNS = tuple(re.compile(pattern, re.IGNORECASE) for pattern in (
+    r"Timeout N+ms exceeded",
+    r"Target page, context or browser has been closed",
+    r"Execution context was destroyed",
+    r"Element is not attached to the DOM",
+    r"element is not (visible|stable|enabled)",
+    r"intercepts pointer events",
+    r"net::ERR_(CONNECTION_\w+|NETWORK_CHANGED|TIMED_OUT|ABORTED)",
+    r"ECONNRESET|socket hang up",
+))
+
+
+def signature(error: str) -> str:
+    """First line of ``error`` with every number masked as ``N``."""
+    line = (error or "").strip().split("\n", 1)[0]
+    return re.sub(r"\d", "N", re.sub(r"\s+", " ", line))[:200]
+
+
+def flip_rate(statuses: list[str]) -> float:
+    if len(statuses) < 2:
+        return 0.0
+    flips = sum(before != after for before, after in zip(statuses, statuses[1:]))
+    return flips / (len(statuses) - 1)
+
+
+def scores(history: History, test_ids, last: int = DEFAULT_LAST) -> dict[str, dict]:
+    """Flip rate, executions, failures and recovering retries per test."""
+    table = {}
+    for test_id in test_ids:
+        rows = history.durations(test_id, last)
+        if not rows:
+            continue
+        statuses = [status for _, status in reversed(rows)]
+        table[test_id] = {
+            "score": round(flip_rate(statuses), 3),
+            "runs": len(statuses),
+            "failures": statuses.count("FAILED"),
+            "recovered": _recovered(history, test_id, last),
+        }
+    return table
+
+
+def _recovered(history: History, test_id: str, last: int) -> int:
+    """Retries among the newest ``last`` executions of ``test_id`` that passed."""
+    row = history.db.execute(
+        "SELECT COUNT(*) FROM (SELECT id, status FROM tests WHERE test_id = ? ORDER BY started_at DESC LIMIT ?) AS recent"
+        " JOIN test_metrics ON test_metrics.test_row = recent.id AND test_metrics.name = 'retry.attempt'"
+        " WHERE recent.status = 'PASSED'",
+        (test_id, last),
+    ).fetchone()
+    return row[0]
+
+
+def quarantined(table: dict[str, dict]) -> set[str]:
+    return {
+        test_id for test_id, entry in table.items()
+        if entry["runs"] >= QUARANTINE_MIN_RUNS and entry["score"] >= QUARANTINE_SCORE
+    }
+
+
+def recovered_signatures(history: History) -> set[str]:
+    """Signatures of failures that a retry has recovered from."""
+    rows = history.db.execute(
+        "SELECT tests.metrics FROM test_metrics JOIN tests ON tests.id = test_metrics.test_row"
+        " WHERE test_metrics.name = 'retry.attempt' AND tests.status = 'PASSED'"
+    )
+    return {
+        signature(error)
+        for (metrics,) in rows
+        for error in json.loads(metrics or "{}").get("retry", {}).get("after", [])
+    }
+
+
+class RetryPolicy:
+    """Retries failures whose signature is known to be flaky, ``retries`` times at most."""
+
+    def __init__(self, retries: int = 1, known: set[str] | None = None):
+        self.retries = retries
+        self.known = set(known or ())
+
+    @classmethod
+    def from_history(cls, path: Path = DEFAULT_HISTORY, retries: int = 1) -> RetryPolicy:
+        if not Path(path).exists():
+            return cls(retries)
+        with History(path) as history:
+            return cls(retries, recovered_signatures(history))
+
+    def is_flaky(self, error: str | None) -> bool:
+        failure = signature(error or "")
+        return bool(failure) and (failure in self.known or any(pattern.search(failure)
+                                                               for pattern in FLAKY_PATTERNS))
+
+    def should_retry(self, result, attempt: int) -> bool:
+        return attempt <= self.retries and self.is_flaky(result.error)
+
+
+class Quarantine(Plugin):
+    """Marks the results of the quarantine lane."""
+
+    async def after_test(self, run, result) -> None:
+        result.metrics["quarantined"] = True
+
+
+def format_scores(table: dict[str, dict], only_flaky: bool = False) -> str:
+    held = quarantined(table)
+    lines = [f"  {'test':<6} {'score':>6} {'runs':>5} {'failed':>7} {'recovered':>10}"]
+    for test_id, entry in sorted(table.items(), key=lambda item: (-item[1]["score"], item[0])):
+        if only_flaky and not entry["score"]:
+            continue
+        lines.append(f"  {test_id:<6} {entry['score']:>6.2f} {entry['runs']:>5} {entry['failures']:>7} "
+                     f"{entry['recovered']:>10}" + ("  quarantined" if test_id in held else ""))
+    return "\n".join(lines)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m harness.flaky",
+                                     description="Flakiness scores and quarantine from the run history.")
+    parser.add_argument("tests", nargs="*", metavar="TC0xx", help="tests to score (default: all recorded)")
+    parser.add_argument("--db", type=Path, default=DEFAULT_HISTORY,
+                        help="history database (default: tmp/history.sqlite)")
+    parser.add_argument("--last", type=int, default=DEFAULT_LAST, metavar="N",
+                        help=f"score over the newest N executions (default: {DEFAULT_LAST})")
+    parser.add_argument("--flaky", action="store_true", help="only list tests with a non-zero score")
+    options = parser.parse_args(argv)
+
+    if not options.db.exists():
+        print(f"No history at {options.db}.", file=sys.stderr)
+        return 1
+    with History(options.db) as history:
+        test_ids = options.tests or [row[0] for row in history.db.execute("SELECT DISTINCT test_id FROM tests")]
+        table = scores(history, [test_id.upper() for test_id in test_ids], options.last)
+        print(format_scores(table, options.flaky))
+        known = recovered_signatures(history)
+    if known:
+        print("  Failures a retry has recovered from:")
+        print("\n".join(f"    {failure}" for failure in sorted(known)))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,122 @@
+"""Deterministic, offline Google Books search for the suite.
+
+``fetchGoogleBooks`` in ``BookContext.jsx`` queries the Google Books volumes
+API on every non-empty search and assigns each result a ``Math.random()``
+price, so neither the results nor their rendering are reproducible. This
+plugin routes the volumes endpoint to a fixture store on disk and seeds
+``Math.random`` through an init script.
+
+Fixtures are content-addressed: the file name is the SHA-256 of the
+normalised request (``q`` lower-cased with whitespace collapsed, other
+parameters sorted, the API ``key`` dropped). In ``record`` mode, queries
+without a fixture are fetched from the network and saved. In ``replay``
+mode they get an empty result and are counted as misses.
+
+The frontend only calls the API when ``VITE_BOOK_API_KEY`` is set. Since
+the key is not part of the fixture key, any placeholder value works for
+replay.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+from collections import Counter
+from pathlib import Path
+from urllib.parse import parse_qsl, urlsplit
+
+from .loader import SUITE_DIR
+from .plugins import Plugin
+
+VOLUMES_URL = "https://www.googleapis.com/books/v1/volumes"
+FIXTURE_DIR = SUITE_DIR / "fixtures" / "google_books"
+EMPTY_RESULT = json.dumps({"kind": "books#volumes", "totalItems": 0}).encode()
+CORS_HEADERS = {"access-control-allow-origin": "*"}
+
+# mulberry32: small, fast and identical in every browser
+SEEDED_RANDOM_JS = """
+(() => {
+  let state = %d >>> 0;
+  Math.random = () => {
+    state = (state + 0x6D2B79F5) >>> 0;
+    let t = state;
+    t = Math.imul(t ^ (t >>> 15), t | 1);
+    t ^= t + Math.imul(t ^ (t >>> 7), t | 61);
+    return ((t ^ (t >>> 14)) >>> 0) / 4294967296;
+  };
+})();
+"""
+
+
+def normalized_request(url: str) -> dict:
+    params = {}
+    for name, value in parse_qsl(urlsplit(url).query, keep_blank_values=True):
+        if name == "key":
+            continue
+        if name == "q":
+            value = " ".join(value.lower().split())
+        params[name] = value
+    return dict(sorted(params.items()))
+
+
+def fixture_key(url: str) -> str:
+    canonical = json.dumps(normalized_request(url), sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+class GoogleBooksFixtures(Plugin):
+    def __init__(self, directory: Path = FIXTURE_DIR, record: bool = False, seed: int = 1234):
+        self.directory = Path(directory)
+        self.record = record
+        self.seed = seed
+        self._cache: dict[str, bytes] = {}
+        self._counts: dict[object, Counter] = {}
+
+    def _path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}.json"
+
+    def load(self, key: str) -> bytes | None:
+        body = self._cache.get(key)
+        if body is None:
+            try:
+                fixture = json.loads(self._path(key).read_text(encoding="utf-8"))
+            except FileNotFoundError:
+                return None
+            body = self._cache[key] = json.dumps(fixture["response"]).encode()
+        return body
+
+    def store(self, key: str, url: str, body: bytes) -> None:
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fixture = {"request": normalized_request(url), "response": json.loads(body)}
+        path.write_text(json.dumps(fixture, indent=2) + "\n", encoding="utf-8")
+        self._cache[key] = body
+
+    async def on_context(self, run, context) -> None:
+        counts = self._counts.setdefault(run, Counter())
+        await context.add_init_script(SEEDED_RANDOM_JS % self.seed)
+
+        async def handle(route):
+            url = route.request.url
+            key = fixture_key(url)
+            body = self.load(key)
+            if body is not None:
+                counts["hits"] += 1
+            elif self.record:
+                response = await route.fetch()
+                if response.ok:
+                    self.store(key, url, await response.body())
+                    counts["recorded"] += 1
+                await route.fulfill(response=response)
+                return
+            else:
+                counts["misses"] += 1
+                body = EMPTY_RESULT
+            await route.fulfill(status=200, content_type="application/json", body=body, headers=CORS_HEADERS)
+
+        await context.route(f"{VOLUMES_URL}?*", handle)
+
+    async def after_test(self, run, result) -> None:
+        counts = self._counts.pop(run, None)
+        if counts:
+            result.metrics["google_books"] = dict(counts)
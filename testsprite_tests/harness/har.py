@@ -0,0 +1,186 @@
+"""Per-test HAR record and replay.
+
+``record`` captures each test's network traffic through Playwright's
+``record_har_path``, one ``fixtures/har/TC0xx.N.har`` per context the test
+opens (so ``--repeat`` and multi-context tests do not overwrite each
+other), together with a small ``TC0xx.meta.json`` holding the live run's
+duration. A new recording replaces the test's old files. ``replay`` serves
+every request of the test from all of its HARs through ``context.route``.
+
+Replay matches on method, scheme/host/path and a normalised query:
+cache-busting parameters (Vite's ``t``/``v`` and the Google Books ``key``)
+are dropped and the rest sorted. When no entry has the same query, the
+entry for the same method and path that shares the most query parameters
+is used, but only among entries whose identifying parameters (``q``,
+``startIndex``, ``maxResults``) are the same: a search for another term
+never gets this one's results. Requests with no recorded match at all are
+aborted and fail the test, so stale fixtures surface immediately.
+"""
+
+from __future__ import annotations
+
+import base64
+import json
+import re
+from collections import defaultdict
+from pathlib import Path
+from urllib.parse import parse_qsl, urlsplit
+
+from .loader import SUITE_DIR
+from .plugins import Plugin
+
+HAR_DIR = SUITE_DIR / "fixtures" / "har"
+VOLATILE_PARAMS = frozenset({"t", "v", "_", "key"})
+# Parameters that pick the response; a fallback match must agree on all of them
+IDENTIFYING_PARAMS = ("q", "startIndex", "maxResults")
+# The body is replayed decoded, so these would describe the wrong bytes
+DROPPED_HEADERS = frozenset({"content-encoding", "content-length", "transfer-encoding"})
+
+
+class HarError(RuntimeError):
+    pass
+
+
+def normalized_query(query: str) -> tuple:
+    params = (
+        (name, " ".join(value.split()))
+        for name, value in parse_qsl(query, keep_blank_values=True)
+        if name not in VOLATILE_PARAMS
+    )
+    return tuple(sorted(params))
+
+
+def request_key(method: str, url: str) -> tuple[str, str, tuple]:
+    parts = urlsplit(url)
+    return method.upper(), f"{parts.scheme}://{parts.netloc}{parts.path}", normalized_query(parts.query)
+
+
+def _identity(query: tuple) -> tuple:
+    params = dict(query)
+    return tuple(params.get(name) for name in IDENTIFYING_PARAMS)
+
+
+def recordings(test_id: str, directory: Path = HAR_DIR) -> list[Path]:
+    """The HAR files recorded for ``test_id``, in recording order."""
+    numbered = re.compile(rf"^{re.escape(test_id)}(?:\.(\d+))?\.har$")
+    found = [(match, path) for path in Path(directory).glob(f"{test_id}*.har")
+             if (match := numbered.match(path.name))]
+    return [path for match, path in sorted(found, key=lambda item: int(item[0].group(1) or 0))]
+
+
+class HarArchive:
+    """Recorded responses indexed for fuzzy lookup.
+
+    Repeated requests with the same key are answered in recorded order; once
+    they run out, the last response is reused.
+    """
+
+    def __init__(self, entries: list[dict]):
+        self._by_path = defaultdict(lambda: defaultdict(list))
+        for entry in entries:
+            method, path, query = request_key(entry["request"]["method"], entry["request"]["url"])
+            self._by_path[(method, path)][query].append(entry["response"])
+        self._served = defaultdict(int)
+
+    @classmethod
+    def load(cls, *paths: Path) -> HarArchive:
+        entries = []
+        for path in paths:
+            entries.extend(json.loads(Path(path).read_text(encoding="utf-8"))["log"]["entries"])
+        return cls(entries)
+
+    def match(self, method: str, url: str) -> dict | None:
+        method, path, query = request_key(method, url)
+        candidates = self._by_path.get((method, path))
+        if not candidates:
+            return None
+        if query not in candidates:
+            wanted, identity = set(query), _identity(query)
+            similar = [recorded for recorded in candidates if _identity(recorded) == identity]
+            if not similar:
+                return None
+            query = max(similar, key=lambda recorded: len(wanted & set(recorded)))
+        responses = candidates[query]
+        index = self._served[(method, path, query)]
+        self._served[(method, path, query)] += 1
+        return responses[min(index, len(responses) - 1)]
+
+
+def _fulfil_args(response: dict) -> dict:
+    content = response.get("content", {})
+    text = content.get("text") or ""
+    body = base64.b64decode(text) if content.get("encoding") == "base64" else text.encode()
+    headers = {
+        header["name"]: header["value"]
+        for header in response.get("headers", [])
+        if header["name"].lower() not in DROPPED_HEADERS
+    }
+    return {"status": response["status"], "headers": headers, "body": body}
+
+
+class HarMode(Plugin):
+    def __init__(self, mode: str, directory: Path = HAR_DIR):
+        if mode not in ("record", "replay"):
+            raise ValueError(f"unknown HAR mode {mode!r}")
+        self.mode = mode
+        self.directory = Path(directory)
+        self._unmatched: dict[object, list[str]] = {}
+        # Contexts recorded per test in this session
+        self._recorded: dict[str, int] = {}
+
+    def meta_path(self, script) -> Path:
+        return self.directory / f"{script.test_id}.meta.json"
+
+    async def context_options(self, script) -> dict:
+        if self.mode != "record":
+            return {}
+        self.directory.mkdir(parents=True, exist_ok=True)
+        if script.test_id not in self._recorded:
+            for path in recordings(script.test_id, self.directory):
+                path.unlink()
+        number = self._recorded[script.test_id] = self._recorded.get(script.test_id, 0) + 1
+        path = self.directory / f"{script.test_id}.{number}.har"
+        return {"record_har_path": str(path), "record_har_content": "embed"}
+
+    async def on_context(self, run, context) -> None:
+        if self.mode != "replay":
+            return
+        paths = recordings(run.script.test_id, self.directory)
+        if not paths:
+            raise HarError(f"no HAR recorded for {run.script.test_id} in {self.directory}; "
+                           "run with --har record first")
+        archive = HarArchive.load(*paths)
+        unmatched = self._unmatched.setdefault(run, [])
+
+        async def handle(route):
+            request = route.request
+            response = archive.match(request.method, request.url)
+            if response is None:
+                unmatched.append(f"{request.method} {request.url}")
+                await route.abort("failed")
+                return
+            await route.fulfill(**_fulfil_args(response))
+
+        await context.route("**/*", handle)
+
+    async def after_test(self, run, result) -> None:
+        if self.mode == "record":
+            meta = {"durationMs": round(result.duration * 1000), "recorded": result.created}
+            self.meta_path(run.script).write_text(json.dumps(meta, indent=2) + "\n", encoding="utf-8")
+            return
+
+        unmatched = self._unmatched.pop(run, [])
+        replay = {"replay_ms": round(result.duration * 1000), "unmatched": unmatched}
+        try:
+            live = json.loads(self.meta_path(run.script).read_text(encoding="utf-8"))["durationMs"]
+        except (OSError, ValueError, KeyError):
+            live = None
+        if live is not None:
+            replay.update(live_ms=live, saved_ms=live - replay["replay_ms"])
+        result.metrics["har"] = replay
+        if unmatched:
+            listing = "\n".join(f"  {request}" for request in unmatched[:20])
+            message = (f"HAR replay: {len(unmatched)} request(s) had no recorded match "
+                       f"in {run.script.test_id}'s HARs; re-record the fixture:\n{listing}")
+            result.status = "FAILED"
+            result.error = f"{result.error}\n{message}" if result.error else message
@@ -0,0 +1,335 @@
+"""Run history in SQLite, one row per test written as the test finishes.
+
+``tmp/test_results.json`` and ``tmp/harness_results.json`` hold one run
+each and are rewritten whole. The history database keeps every run:
+
+- ``runs``: when, on which git revision and with which arguments;
+- ``tests``: one row per executed test with its status, error, timing and
+  the remaining metrics as JSON, indexed by ``TC0xx`` id and time, by
+  TestSprite ``testId`` and by status and time;
+- ``steps``: each ``# ->`` step of a test with its offset and duration and
+  whatever the plugins added to it;
+- ``test_metrics``: every numeric leaf of a test's metrics under a dotted
+  name (``waits.saved_ms``, ``cpu.total_ms``...), for querying them across
+  runs without parsing JSON.
+
+``python -m harness`` records into ``tmp/history.sqlite`` unless run with
+``--no-history``; sharded workers write to the same run. The module is
+also a small command-line tool::
+
+    python -m harness.history runs
+    python -m harness.history stats TC014 --last 50
+    python -m harness.history export --run 12 -o tmp/run-12.json
+    python -m harness.history import tmp/test_results.json
+
+``stats`` reads the newest rows of one test through the
+``(test_id, started_at)`` index, so it stays fast with thousands of runs.
+``export`` writes a run in the ``tmp/test_results.json`` record shape.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sqlite3
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+from .app import git_label
+from .loader import SUITE_DIR
+from .plugins import Plugin
+from .results import load_legacy_ids, to_record
+from .runner import TestResult
+from .stats import summarize
+
+DEFAULT_HISTORY = SUITE_DIR / "tmp" / "history.sqlite"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    started_at REAL NOT NULL,
+    finished_at REAL,
+    revision TEXT,
+    arguments TEXT
+);
+CREATE TABLE IF NOT EXISTS tests (
+    id INTEGER PRIMARY KEY,
+    run_id INTEGER NOT NULL REFERENCES runs(id),
+    test_id TEXT NOT NULL,
+    legacy_id TEXT,
+    title TEXT NOT NULL,
+    status TEXT NOT NULL,
+    error TEXT,
+    started_at REAL NOT NULL,
+    finished_at REAL NOT NULL,
+    duration_ms REAL NOT NULL,
+    metrics TEXT
+);
+CREATE TABLE IF NOT EXISTS steps (
+    test_row INTEGER NOT NULL REFERENCES tests(id),
+    position INTEGER NOT NULL,
+    label TEXT NOT NULL,
+    offset_ms REAL,
+    duration_ms REAL,
+    metrics TEXT,
+    PRIMARY KEY (test_row, position)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS test_metrics (
+    test_row INTEGER NOT NULL REFERENCES tests(id),
+    name TEXT NOT NULL,
+    value REAL NOT NULL,
+    PRIMARY KEY (test_row, name)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS runs_started ON runs(started_at);
+CREATE INDEX IF NOT EXISTS tests_test_started ON tests(test_id, started_at);
+CREATE INDEX IF NOT EXISTS tests_legacy ON tests(legacy_id);
+CREATE INDEX IF NOT EXISTS tests_status_started ON tests(status, started_at);
+CREATE INDEX IF NOT EXISTS tests_run ON tests(run_id);
+CREATE INDEX IF NOT EXISTS test_metrics_name ON test_metrics(name);
+"""
+
+
+def numeric_leaves(metrics: dict, prefix: str = ""):
+    """``(dotted name, value)`` for every number in nested dicts; lists are skipped."""
+    for key, value in metrics.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            yield from numeric_leaves(value, f"{name}.")
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            yield name, value
+
+
+def _step_metrics(step: dict) -> str | None:
+    """What the plugins added to a step, as JSON."""
+    extra = {key: value for key, value in step.items() if key not in ("label", "offset_ms", "duration_ms")}
+    return json.dumps(extra) if extra else None
+
+
+def _epoch(timestamp: str) -> float:
+    return datetime.fromisoformat(timestamp.replace("Z", "+00:00")).timestamp()
+
+
+class History:
+    def __init__(self, path: Path = DEFAULT_HISTORY):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # Shard workers write to the same file from their own processes
+        self.db = sqlite3.connect(self.path, timeout=30)
+        self.db.row_factory = sqlite3.Row
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.executescript(SCHEMA)
+
+    def close(self) -> None:
+        self.db.close()
+
+    def __enter__(self) -> History:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def begin_run(self, arguments: list[str] | None = None, started_at: float | None = None,
+                  revision: str | None = None) -> int:
+        with self.db:
+            cursor = self.db.execute(
+                "INSERT INTO runs (started_at, revision, arguments) VALUES (?, ?, ?)",
+                (started_at or time.time(), revision if revision is not None else git_label(),
+                 json.dumps(arguments or [])),
+            )
+        return cursor.lastrowid
+
+    def finish_run(self, run_id: int, finished_at: float | None = None) -> None:
+        with self.db:
+            self.db.execute("UPDATE runs SET finished_at = ? WHERE id = ?", (finished_at or time.time(), run_id))
+
+    def record(self, run_id: int, result: TestResult, legacy_id: str | None = None) -> int:
+        """Store one test result and its steps in a single transaction."""
+        metrics = dict(result.metrics)
+        steps = metrics.pop("steps", [])
+        with self.db:
+            cursor = self.db.execute(
+                "INSERT INTO tests (run_id, test_id, legacy_id, title, status, error, started_at, finished_at,"
+                " duration_ms, metrics) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (run_id, result.test_id, legacy_id, result.title, result.status, result.error,
+                 result.started_at, result.finished_at, round(result.duration * 1000, 1),
+                 json.dumps(metrics) if metrics else None),
+            )
+            row = cursor.lastrowid
+            self.db.executemany(
+                "INSERT INTO steps (test_row, position, label, offset_ms, duration_ms, metrics)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                [
+                    (row, position, step["label"], step.get("offset_ms"), step.get("duration_ms"), _step_metrics(step))
+                    for position, step in enumerate(steps)
+                ],
+            )
+            self.db.executemany(
+                "INSERT OR REPLACE INTO test_metrics (test_row, name, value) VALUES (?, ?, ?)",
+                [(row, name, value) for name, value in numeric_leaves(metrics)],
+            )
+        return row
+
+    def runs(self, limit: int = 20) -> list[dict]:
+        rows = self.db.execute(
+            "SELECT runs.*, COUNT(tests.id) AS tests, SUM(tests.status = 'PASSED') AS passed"
+            " FROM (SELECT * FROM runs ORDER BY started_at DESC LIMIT ?) AS runs"
+            " LEFT JOIN tests ON tests.run_id = runs.id"
+            " GROUP BY runs.id ORDER BY runs.started_at DESC",
+            (limit,),
+        )
+        return [dict(row) for row in rows]
+
+    def durations(self, test_id: str, last: int = 50) -> list[tuple[float, str]]:
+        """``(duration_ms, status)`` of the newest ``last`` executions of ``test_id``."""
+        rows = self.db.execute(
+            "SELECT duration_ms, status FROM tests WHERE test_id = ? ORDER BY started_at DESC LIMIT ?",
+            (test_id, last),
+        )
+        return [(row["duration_ms"], row["status"]) for row in rows]
+
+    def stats(self, test_id: str, last: int = 50) -> dict:
+        rows = self.durations(test_id, last)
+        summary = summarize(duration for duration, _ in rows)
+        if rows:
+            summary["pass_rate"] = sum(status == "PASSED" for _, status in rows) / len(rows)
+        return summary
+
+    def results(self, run_id: int) -> list[tuple[TestResult, str | None]]:
+        """The run's results with their steps put back, and TestSprite ids."""
+        tests = self.db.execute("SELECT * FROM tests WHERE run_id = ? ORDER BY started_at, id", (run_id,)).fetchall()
+        steps = {}
+        for step in self.db.execute(
+            "SELECT steps.* FROM steps JOIN tests ON tests.id = steps.test_row"
+            " WHERE tests.run_id = ? ORDER BY steps.test_row, steps.position",
+            (run_id,),
+        ):
+            entry = {"label": step["label"], "offset_ms": step["offset_ms"]}
+            if step["duration_ms"] is not None:
+                entry["duration_ms"] = step["duration_ms"]
+            entry.update(json.loads(step["metrics"] or "{}"))
+            steps.setdefault(step["test_row"], []).append(entry)
+        results = []
+        for test in tests:
+            metrics = json.loads(test["metrics"] or "{}")
+            if test["id"] in steps:
+                metrics["steps"] = steps[test["id"]]
+            result = TestResult(test["test_id"], test["title"], test["status"], test["error"],
+                                test["started_at"], test["finished_at"], metrics)
+            results.append((result, test["legacy_id"]))
+        return results
+
+    def latest_run(self) -> int | None:
+        row = self.db.execute("SELECT id FROM runs ORDER BY started_at DESC LIMIT 1").fetchone()
+        return row["id"] if row else None
+
+    def export(self, run_id: int) -> list[dict]:
+        """The run as ``tmp/test_results.json`` records."""
+        return [
+            to_record(result, {result.test_id: legacy_id} if legacy_id else None)
+            for result, legacy_id in self.results(run_id)
+        ]
+
+    def import_records(self, records: list[dict]) -> int:
+        """Store results-file records (ours or TestSprite's) as one new run."""
+        started = min((_epoch(record["created"]) for record in records), default=time.time())
+        run_id = self.begin_run(["import"], started_at=started, revision="")
+        for record in records:
+            created, modified = _epoch(record["created"]), _epoch(record["modified"])
+            finished = created + record["durationMs"] / 1000 if "durationMs" in record else modified
+            result = TestResult(record["title"].split("-", 1)[0], record["title"], record["testStatus"],
+                                record.get("testError") or None, created, finished, record.get("metrics", {}))
+            self.record(run_id, result, record.get("testId"))
+        self.finish_run(run_id, max(_epoch(record["modified"]) for record in records) if records else None)
+        return run_id
+
+
+class HistoryRecorder(Plugin):
+    """Writes each result to the history as soon as its test is done.
+
+    Goes last, after every plugin that adds metrics or changes the verdict.
+    """
+
+    def __init__(self, path: Path, run_id: int):
+        self.path = Path(path)
+        self.run_id = run_id
+        self._history: History | None = None
+        self._legacy_ids: dict[str, str] = {}
+
+    async def start(self, browser) -> None:
+        self._history = History(self.path)
+        self._legacy_ids = load_legacy_ids()
+
+    async def stop(self) -> None:
+        if self._history is not None:
+            self._history.close()
+            self._history = None
+
+    async def after_test(self, run, result) -> None:
+        self._history.record(self.run_id, result, self._legacy_ids.get(result.test_id))
+
+
+def format_runs(runs: list[dict]) -> str:
+    lines = []
+    for run in runs:
+        started = datetime.fromtimestamp(run["started_at"]).strftime("%Y-%m-%d %H:%M:%S")
+        wall = f"{run['finished_at'] - run['started_at']:7.1f}s" if run["finished_at"] else "   ... "
+        lines.append(f"  {run['id']:>5}  {started}  {wall}  {run['passed'] or 0:>3}/{run['tests']:<3} passed  "
+                     f"{run['revision'] or '-':<16} {' '.join(json.loads(run['arguments'] or '[]'))}")
+    return "\n".join(lines)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m harness.history",
+                                     description="Query and export the SQLite run history.")
+    parser.add_argument("--db", type=Path, default=DEFAULT_HISTORY,
+                        help="history database (default: tmp/history.sqlite)")
+    commands = parser.add_subparsers(dest="command", required=True)
+    listing = commands.add_parser("runs", help="list the most recent runs")
+    listing.add_argument("--limit", type=int, default=20)
+    stats = commands.add_parser("stats", help="duration percentiles and pass rate of tests")
+    stats.add_argument("tests", nargs="+", metavar="TC0xx")
+    stats.add_argument("--last", type=int, default=50, metavar="N", help="newest N executions (default: 50)")
+    export = commands.add_parser("export", help="write a run in the tmp/test_results.json shape")
+    export.add_argument("--run", type=int, help="run id (default: the latest run)")
+    export.add_argument("-o", "--output", type=Path, help="output file (default: stdout)")
+    imported = commands.add_parser("import", help="store a results file as a new run")
+    imported.add_argument("file", type=Path)
+    options = parser.parse_args(argv)
+
+    with History(options.db) as history:
+        if options.command == "runs":
+            print(format_runs(history.runs(options.limit)))
+        elif options.command == "stats":
+            for test_id in options.tests:
+                started = time.perf_counter()
+                summary = history.stats(test_id, options.last)
+                elapsed = (time.perf_counter() - started) * 1000
+                if not summary["count"]:
+                    print(f"  {test_id}  no runs recorded")
+                    continue
+                print(f"  {test_id}  {summary['count']} runs  p50 {summary['p50']:.0f} ms  "
+                      f"p95 {summary['p95']:.0f} ms  max {summary['max']:.0f} ms  "
+                      f"pass rate {summary['pass_rate']:.0%}  (query {elapsed:.1f} ms)")
+        elif options.command == "export":
+            run_id = options.run or history.latest_run()
+            if run_id is None:
+                print("No runs recorded.", file=sys.stderr)
+                return 1
+            text = json.dumps(history.export(run_id), indent=2) + "\n"
+            if options.output:
+                options.output.parent.mkdir(parents=True, exist_ok=True)
+                options.output.write_text(text, encoding="utf-8")
+                print(f"run {run_id} written to {options.output}")
+            else:
+                sys.stdout.write(text)
+        else:
+            records = json.loads(options.file.read_text(encoding="utf-8"))
+            print(f"imported {len(records)} records as run {history.import_records(records)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
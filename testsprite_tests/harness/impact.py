@@ -0,0 +1,273 @@
+"""Pick the tests a change can affect, from the diff and the import graph.
+
+``tmp/code_summary.json`` maps each feature to its source files and
+``TEST_FEATURES`` below maps each script to the features it exercises (the
+test plan does not). A test covers its features' files and everything they
+import, statically or through ``React.lazy``, plus the files every page
+loads: the static imports of ``src/main.tsx`` and the Header and Footer
+that ``App.tsx`` renders on every route, and the home page, which every
+script opens first. ``App.tsx``'s other lazy imports are the pages, which
+only load on their route, so they are not followed.
+
+The changed files are ``git diff --name-only BASE`` plus untracked files.
+A change to a file a test covers selects it; a change to a script selects
+that script; a change to the build setup, ``public/`` or the harness
+selects everything (for the harness: its Python outside ``tests/``, ``js/``,
+``profiles/`` and ``budgets.json``); anything else (docs, reports) selects nothing::
+
+    python -m harness.impact                 # against HEAD: uncommitted work
+    python -m harness.impact --base main
+    python -m harness --changed main         # run only the selected tests
+
+The saving is estimated from each test's median duration in the run
+history, or its last ``tmp/harness_results.json`` record.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import posixpath
+import re
+import subprocess
+import sys
+from collections import deque
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from .history import DEFAULT_HISTORY, History
+from .loader import SUITE_DIR, TestScript, discover
+from .results import DEFAULT_OUTPUT
+from .stats import median
+
+REPO_DIR = SUITE_DIR.parent
+CODE_SUMMARY = SUITE_DIR / "tmp" / "code_summary.json"
+ENTRY = "src/main.tsx"
+ROUTER = "src/App.tsx"
+# Lazy in App.tsx, but rendered around every route
+LAYOUT = ("src/components/Header.jsx", "src/components/Footer.jsx")
+# Every script's first ``page.goto`` is ``/``
+HOME = "src/pages/Home.jsx"
+# Outside src/, but every test runs against what they build
+BUILD_FILES = re.compile(
+    r"^(package(-lock)?\.json|index\.html|vite\.config\.\w+|tsconfig[\w.]*\.json|tailwind\.config\.\w+"
+    r"|postcss\.config\.\w+|\.env[\w.]*|public/.*"
+    # The harness's code, scripts and data; its README and unit tests cover no script
+    r"|testsprite_tests/harness/((?!tests/)[\w/]+\.py|js/[\w.-]+\.js|profiles/[\w.-]+\.json|budgets\.json))$"
+)
+SCRIPT_FILE = re.compile(r"^testsprite_tests/(TC\d{3})_\w+\.py$")
+SOURCE_SUFFIXES = (".js", ".jsx", ".ts", ".tsx")
+IMPORT = re.compile(
+    r"""(?:^|[;\s])(?:import|export)\s[^'";]*?\bfrom\s*['"]([^'"]+)['"]"""
+    r"""|(?:^|[;\s])import\s*['"]([^'"]+)['"]"""
+    r"""|\bimport\(\s*['"]([^'"]+)['"]\s*\)""",
+    re.MULTILINE,
+)
+
+# Features (by code_summary.json name) each script exercises
+TEST_FEATURES = {
+    "TC001": ("Authentication System",),
+    "TC002": ("Authentication System",),
+    "TC003": ("Authentication System",),
+    "TC004": ("Authentication System",),
+    "TC005": ("Protected Routes", "Authentication System", "User Dashboard", "My Books Management"),
+    "TC006": ("Protected Routes", "Authentication System"),
+    "TC007": ("Books Catalog", "Book Card Component", "Lazy Loading Components"),
+    "TC008": ("Books Catalog", "Book Card Component", "Lazy Loading Components"),
+    "TC009": ("Books Catalog", "Book Card Component", "Lazy Loading Components"),
+    "TC010": ("Book Detail Page", "Books Catalog"),
+    "TC011": ("Book Detail Page", "Shopping Cart", "Book Management Context"),
+    "TC012": ("Shopping Cart", "Book Management Context"),
+    "TC013": ("Shopping Cart", "Book Management Context"),
+    "TC014": ("Shopping Cart", "Book Management Context"),
+    "TC015": ("Add/Edit Book", "Book Management Context", "Authentication System"),
+    "TC016": ("Add/Edit Book", "My Books Management", "Authentication System"),
+    "TC017": ("My Books Management", "Book Management Context", "Authentication System"),
+    "TC018": ("Newsletter Subscription", "Footer Component"),
+    "TC019": ("Newsletter Subscription", "Footer Component"),
+    "TC020": ("Navigation Header",),
+    "TC021": ("Footer Component",),
+    "TC022": ("Loading Spinner", "Home Page", "Books Catalog"),
+    "TC023": ("Google Books Service Integration", "Books Catalog"),
+    "TC024": ("Authentication System",),
+    "TC025": ("Book Management Context", "Authentication System", "Shopping Cart"),
+}
+
+
+def load_features(path: Path = CODE_SUMMARY) -> dict[str, list[str]]:
+    summary = json.loads(Path(path).read_text(encoding="utf-8"))
+    return {feature["name"]: feature["files"] for feature in summary["features"]}
+
+
+def _resolve(importer: str, specifier: str, files: set[str]) -> str | None:
+    """The ``src/`` file a relative specifier names, or None for packages."""
+    if not specifier.startswith("."):
+        return None
+    base = posixpath.normpath(posixpath.join(posixpath.dirname(importer), specifier))
+    candidates = [base, *(base + suffix for suffix in SOURCE_SUFFIXES),
+                  *(f"{base}/index{suffix}" for suffix in SOURCE_SUFFIXES)]
+    return next((candidate for candidate in candidates if candidate in files), None)
+
+
+def import_graph(repo: Path = REPO_DIR) -> dict[str, list[tuple[str, bool]]]:
+    """``src/`` file -> ``(imported file, lazy)`` for every relative import."""
+    files = {path.relative_to(repo).as_posix() for path in (repo / "src").rglob("*") if path.is_file()}
+    graph = {}
+    for name in sorted(files):
+        edges = []
+        if name.endswith(SOURCE_SUFFIXES):
+            text = (repo / name).read_text(encoding="utf-8", errors="replace")
+            for match in IMPORT.finditer(text):
+                static = match.group(1) or match.group(2)
+                target = _resolve(name, static or match.group(3), files)
+                if target is not None:
+                    edges.append((target, static is None))
+        graph[name] = edges
+    return graph
+
+
+def closure(graph: dict, roots, follow_lazy: bool = True) -> dict[str, str | None]:
+    """Every file reachable from ``roots``, mapped to the file that imported it."""
+    parents = {root: None for root in roots if root in graph}
+    queue = deque(parents)
+    while queue:
+        current = queue.popleft()
+        lazy_ok = follow_lazy and current != ROUTER
+        for target, lazy in graph[current]:
+            if target not in parents and (lazy_ok or not lazy):
+                parents[target] = current
+                queue.append(target)
+    return parents
+
+
+def _chain(parents: dict, name: str) -> list[str]:
+    chain = [name]
+    while parents.get(chain[-1]) is not None:
+        chain.append(parents[chain[-1]])
+    return chain[::-1]
+
+
+def changed_files(base: str = "HEAD", repo: Path = REPO_DIR) -> list[str]:
+    """Files that differ from ``base`` in the working tree, plus untracked ones."""
+    def git(*args):
+        completed = subprocess.run(["git", *args], cwd=repo, capture_output=True, text=True, check=True)
+        return completed.stdout.splitlines()
+
+    return sorted(set(git("diff", "--name-only", base)) | set(git("ls-files", "--others", "--exclude-standard")))
+
+
+@dataclass
+class Selection:
+    changed: list[str]
+    # test id -> why it was selected
+    reasons: dict[str, list[str]] = field(default_factory=dict)
+    ignored: list[str] = field(default_factory=list)
+
+    def select(self, test_id: str, reason: str) -> None:
+        self.reasons.setdefault(test_id, []).append(reason)
+
+
+def select(changed: list[str], test_ids: list[str], graph: dict | None = None,
+           features: dict[str, list[str]] | None = None) -> Selection:
+    graph = import_graph() if graph is None else graph
+    features = load_features() if features is None else features
+    selection = Selection(changed)
+    shell = closure(graph, [ENTRY], follow_lazy=False)
+    layout = closure(graph, (*LAYOUT, HOME))
+    for name in changed:
+        script = SCRIPT_FILE.match(name)
+        if script:
+            if script.group(1) in test_ids:
+                selection.select(script.group(1), f"{name} changed")
+        elif BUILD_FILES.match(name):
+            for test_id in test_ids:
+                selection.select(test_id, f"{name} affects every test")
+        elif name in shell or name in layout:
+            via = _chain(shell, name) if name in shell else _chain(layout, name)
+            for test_id in test_ids:
+                selection.select(test_id, f"every page loads {' -> '.join(via)}")
+        elif name in graph or name.startswith("src/"):
+            hit = False
+            for test_id in test_ids:
+                for feature in TEST_FEATURES.get(test_id, ()):
+                    reached = closure(graph, features.get(feature, []))
+                    if name in reached:
+                        selection.select(test_id, f"{feature}: {' -> '.join(_chain(reached, name))}")
+                        hit = True
+                        break
+            if not hit:
+                selection.ignored.append(name)
+        else:
+            selection.ignored.append(name)
+    return selection
+
+
+def expected_durations(test_ids, history_path: Path = DEFAULT_HISTORY,
+                       results_path: Path = DEFAULT_OUTPUT, last: int = 20) -> dict[str, float]:
+    """Seconds each test is expected to take: its history median, else its last result."""
+    durations = {}
+    if Path(history_path).exists():
+        with History(history_path) as history:
+            for test_id in test_ids:
+                values = [duration for duration, _ in history.durations(test_id, last)]
+                if values:
+                    durations[test_id] = median(values) / 1000
+    try:
+        records = json.loads(Path(results_path).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        records = []
+    for record in records:
+        test_id = record["title"].split("-", 1)[0]
+        if test_id in test_ids and test_id not in durations and "durationMs" in record:
+            durations[test_id] = record["durationMs"] / 1000
+    return durations
+
+
+def format_selection(selection: Selection, scripts: list[TestScript], durations: dict[str, float]) -> str:
+    lines = [f"{len(selection.changed)} changed files, {len(selection.reasons)}/{len(scripts)} tests selected"]
+    # Tests selected for the same first reason share a line
+    by_reason = {}
+    for script in scripts:
+        reasons = selection.reasons.get(script.test_id)
+        if reasons:
+            by_reason.setdefault(reasons[0], []).append(script.test_id)
+    for reason, test_ids in by_reason.items():
+        lines.append(f"  {' '.join(test_ids)}: {reason}")
+    if selection.ignored:
+        lines.append(f"  no test covers: {', '.join(selection.ignored)}")
+    skipped = [script.test_id for script in scripts if script.test_id not in selection.reasons]
+    known = [test_id for test_id in skipped if test_id in durations]
+    if skipped:
+        total = sum(durations.get(script.test_id, 0) for script in scripts)
+        saved = sum(durations[test_id] for test_id in known)
+        estimate = f"{saved:.0f}s of {total:.0f}s summed test time" if known else "unknown, no recorded durations"
+        lines.append(f"  {len(skipped)} tests skipped, estimated time saved: {estimate}"
+                     + (f" ({len(skipped) - len(known)} without a recorded duration)"
+                        if known and len(known) < len(skipped) else ""))
+    return "\n".join(lines)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m harness.impact",
+                                     description="Show which tests a change affects and why.")
+    parser.add_argument("--base", default="HEAD", help="git revision to diff against (default: HEAD)")
+    parser.add_argument("--json", action="store_true", help="print the selection as JSON")
+    options = parser.parse_args(argv)
+
+    scripts = discover()
+    try:
+        changed = changed_files(options.base)
+    except subprocess.CalledProcessError as exc:
+        print(f"git diff against {options.base} failed: {exc.stderr.strip()}", file=sys.stderr)
+        return 2
+    selection = select(changed, [script.test_id for script in scripts])
+    if options.json:
+        print(json.dumps({"base": options.base, "changed": changed, "selected": selection.reasons,
+                          "ignored": selection.ignored}, indent=2))
+    else:
+        print(format_selection(selection, scripts, expected_durations([script.test_id for script in scripts])))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
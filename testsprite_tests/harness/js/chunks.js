@@ -0,0 +1,104 @@
+// Script and stylesheet accounting for harness/chunks.py.
+//
+// Collects resource timing entries for JS and CSS and attributes each one
+// to the route that was current when the request started. Routes change on
+// document loads and on react-router's History API calls. A route's record
+// is handed to the __bhChunksReport binding when the route changes or the
+// page is hidden; flush() returns the current one to the harness.
+//
+// renderMs marks the first render of the route: FCP for a document load,
+// and for a client-side navigation the moment the Suspense fallback left
+// the screen (null if none was shown).
+(() => {
+  if (window.__bhChunks) return;
+
+  const FALLBACKS = '.book__pg-shadow, .animate-pulse';
+  const CODE = /\.(m?js|jsx|tsx?|css)$/;
+
+  const newRecord = (kind, start) => ({
+    path: location.pathname,
+    kind,
+    startMs: start,
+    renderMs: null,
+    resources: [],
+    fallbackSeen: false,
+  });
+
+  let current = newRecord('load', 0);
+
+  const finish = () => {
+    const record = current;
+    if (!record) return null;
+    current = null;
+    const { fallbackSeen, ...payload } = record;
+    return payload;
+  };
+  const report = () => {
+    const payload = finish();
+    if (payload && window.__bhChunksReport) window.__bhChunksReport(payload);
+  };
+
+  const isCode = (entry) => {
+    if (entry.initiatorType === 'script' || entry.initiatorType === 'css') return true;
+    try {
+      return CODE.test(new URL(entry.name).pathname);
+    } catch (e) {
+      return false;
+    }
+  };
+
+  performance.setResourceTimingBufferSize(5000);
+  const observe = (type, callback) => {
+    try {
+      new PerformanceObserver((list) => list.getEntries().forEach(callback))
+        .observe({ type, buffered: true });
+    } catch (e) {
+      // Entry type not supported by this browser
+    }
+  };
+
+  observe('resource', (entry) => {
+    if (!current || !isCode(entry) || entry.startTime < current.startMs) return;
+    current.resources.push({
+      url: entry.name,
+      initiator: entry.initiatorType,
+      startMs: entry.startTime,
+      endMs: entry.responseEnd,
+      transferBytes: entry.transferSize,
+      encodedBytes: entry.encodedBodySize,
+      decodedBytes: entry.decodedBodySize,
+    });
+  });
+  observe('paint', (entry) => {
+    if (entry.name === 'first-contentful-paint' && current && current.kind === 'load') {
+      current.renderMs = entry.startTime;
+    }
+  });
+
+  new MutationObserver(() => {
+    if (!current || current.kind !== 'spa' || current.renderMs !== null) return;
+    if (document.querySelector(FALLBACKS)) {
+      current.fallbackSeen = true;
+    } else if (current.fallbackSeen) {
+      current.renderMs = performance.now();
+    }
+  }).observe(document, { childList: true, subtree: true });
+
+  const routeChanged = () => {
+    if (current && current.path === location.pathname) return;
+    report();
+    current = newRecord('spa', performance.now());
+  };
+  for (const method of ['pushState', 'replaceState']) {
+    const original = history[method];
+    history[method] = function (...args) {
+      const result = original.apply(this, args);
+      routeChanged();
+      return result;
+    };
+  }
+  window.addEventListener('popstate', routeChanged);
+  window.addEventListener('pagehide', report);
+
+  window.__bhChunks = { flush: finish };
+})();
@@ -0,0 +1,45 @@
+// Error-message watcher for network shaping (harness/shaping.py).
+//
+// Reports, through the __bhErrorShown binding, the wall-clock time at which
+// one of the watched messages appears in the document. A message is
+// reported again only after it has disappeared, which BookContext does on
+// its own five seconds after an error.
+(() => {
+  if (window.__bhErrorWatch) return;
+
+  const shown = new Set();
+  let messages = [];
+  let scheduled = false;
+
+  const scan = () => {
+    scheduled = false;
+    const text = document.body ? document.body.textContent : '';
+    for (const message of messages) {
+      if (!text.includes(message)) {
+        shown.delete(message);
+      } else if (!shown.has(message)) {
+        shown.add(message);
+        // Stamp it on the frame that paints the message
+        requestAnimationFrame(() => window.__bhErrorShown(message, Date.now()));
+      }
+    }
+  };
+
+  const schedule = () => {
+    if (!scheduled) {
+      scheduled = true;
+      queueMicrotask(scan);
+    }
+  };
+
+  window.__bhErrorWatch = {
+    watch(list) {
+      messages = list;
+      new MutationObserver(schedule).observe(document, {
+        childList: true,
+        subtree: true,
+        characterData: true,
+      });
+    },
+  };
+})();
@@ -0,0 +1,82 @@
+// Keystroke and request log for the search audit (harness/keystrokes.py).
+//
+// Every `input` event on the watched box is a keystroke; its latency runs
+// from the keydown (or the input event when there is none) to the first
+// frame painted after it. fetch and XMLHttpRequest (which axios uses) are
+// wrapped so each request is tied to the keystroke it followed, the query
+// in the box at that moment and how it ended: completed, cancelled
+// (XHR abort or an AbortError) or failed. A completed request is stale
+// when the box no longer holds its query by the time it finishes.
+(() => {
+  if (window.__bhKeys) return;
+
+  let selector = null;
+  let keystrokes = [];
+  let requests = [];
+  let keydownAt = null;
+
+  const current = () => (selector ? document.querySelector(selector)?.value ?? null : null);
+  const afterPaint = (callback) => requestAnimationFrame(() => setTimeout(callback, 0));
+
+  document.addEventListener('keydown', (event) => {
+    if (selector && event.target.matches?.(selector)) keydownAt = event.timeStamp;
+  }, true);
+  document.addEventListener('input', (event) => {
+    if (!selector || !event.target.matches?.(selector)) return;
+    const entry = { value: event.target.value, start: keydownAt ?? event.timeStamp, paintMs: null };
+    keydownAt = null;
+    keystrokes.push(entry);
+    afterPaint(() => { entry.paintMs = performance.now() - entry.start; });
+  }, true);
+
+  const open = (transport, url) => {
+    const entry = {
+      transport, url: String(url), keystroke: keystrokes.length - 1, query: current(),
+      start: performance.now(), end: null, outcome: 'pending', stale: false,
+    };
+    requests.push(entry);
+    return (outcome) => {
+      if (entry.outcome !== 'pending') return;
+      entry.outcome = outcome;
+      entry.end = performance.now();
+      entry.stale = outcome === 'completed' && current() !== entry.query;
+    };
+  };
+
+  const fetch = window.fetch;
+  window.fetch = function (input, init) {
+    const settle = open('fetch', input instanceof Request ? input.url : input);
+    return fetch.call(this, input, init).then(
+      (response) => { settle('completed'); return response; },
+      (error) => { settle(error?.name === 'AbortError' ? 'cancelled' : 'failed'); throw error; },
+    );
+  };
+
+  const xhrOpen = XMLHttpRequest.prototype.open;
+  const xhrSend = XMLHttpRequest.prototype.send;
+  XMLHttpRequest.prototype.open = function (method, url, ...rest) {
+    this.__bhUrl = url;
+    return xhrOpen.call(this, method, url, ...rest);
+  };
+  XMLHttpRequest.prototype.send = function (body) {
+    const settle = open('xhr', this.__bhUrl);
+    this.addEventListener('load', () => settle('completed'));
+    this.addEventListener('abort', () => settle('cancelled'));
+    this.addEventListener('error', () => settle('failed'));
+    this.addEventListener('timeout', () => settle('failed'));
+    return xhrSend.call(this, body);
+  };
+
+  window.__bhKeys = {
+    watch(css) { selector = css; },
+    // Keystrokes and requests since the last take(); requests still in
+    // flight are returned as pending.
+    take() {
+      const taken = { keystrokes, requests };
+      keystrokes = [];
+      requests = [];
+      return taken;
+    },
+    pending: () => requests.filter((entry) => entry.outcome === 'pending').length,
+  };
+})();
@@ -0,0 +1,81 @@
+// React commit counter (harness/react_profile.py).
+//
+// React DOM looks for __REACT_DEVTOOLS_GLOBAL_HOOK__ when it loads and,
+// if present, calls onCommitFiberRoot after every commit. This stands in
+// for the DevTools extension: it walks the committed tree and counts the
+// components that rendered, the way DevTools decides it (a mount, or the
+// PerformedWork flag on an updated fiber; subtrees whose child list was
+// reused did not render). Commit durations come from the root's
+// actualDuration, which only development and profiling builds keep.
+(() => {
+  if (window.__REACT_DEVTOOLS_GLOBAL_HOOK__ || window.__bhReact) return;
+
+  const PERFORMED_WORK = 0b1;
+  // FunctionComponent, ClassComponent, IndeterminateComponent, ForwardRef,
+  // MemoComponent, SimpleMemoComponent
+  const COMPONENT_TAGS = new Set([0, 1, 2, 11, 14, 15]);
+
+  let counts = null;
+  const reset = () => {
+    counts = { commits: 0, renders: 0, commitMs: 0, maxCommitMs: 0, timed: 0, components: {} };
+  };
+  reset();
+
+  const nameOf = (fiber) => {
+    let type = fiber.type;
+    if (type && typeof type === 'object') type = type.type || type.render || type;
+    return (type && (type.displayName || type.name)) || 'Anonymous';
+  };
+
+  const walk = (fiber, mounting) => {
+    for (let node = fiber; node; node = node.sibling) {
+      const previous = node.alternate;
+      const mounted = mounting || previous === null;
+      if (COMPONENT_TAGS.has(node.tag) && (mounted || (node.flags & PERFORMED_WORK) === PERFORMED_WORK)) {
+        const name = nameOf(node);
+        counts.components[name] = (counts.components[name] || 0) + 1;
+        counts.renders += 1;
+      }
+      if (node.child && (mounted || node.child !== previous.child)) walk(node.child, mounted);
+    }
+  };
+
+  const renderers = new Map();
+  let nextId = 1;
+  window.__REACT_DEVTOOLS_GLOBAL_HOOK__ = {
+    renderers,
+    supportsFiber: true,
+    isDisabled: false,
+    checkDCE() {},
+    inject(renderer) {
+      const id = nextId++;
+      renderers.set(id, renderer);
+      return id;
+    },
+    onScheduleFiberRoot() {},
+    onCommitFiberUnmount() {},
+    onPostCommitFiberRoot() {},
+    onCommitFiberRoot(id, root) {
+      const current = root.current;
+      counts.commits += 1;
+      walk(current.child, false);
+      const duration = current.actualDuration;
+      if (typeof duration === 'number') {
+        counts.commitMs += duration;
+        counts.maxCommitMs = Math.max(counts.maxCommitMs, duration);
+        counts.timed += 1;
+      }
+    },
+  };
+
+  const take = () => {
+    const taken = counts;
+    reset();
+    return taken;
+  };
+  window.__bhReact = { take };
+  // A document load would lose the counts of the step it happens in
+  window.addEventListener('pagehide', () => {
+    if (counts.commits && window.__bhReactReport) window.__bhReactReport(take());
+  });
+})();
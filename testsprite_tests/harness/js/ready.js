@@ -0,0 +1,43 @@
+// Readiness probe for the wait engine (harness/waits.py).
+//
+// Counts in-flight XMLHttpRequest (axios) and fetch (Google Books) calls and
+// reports whether a Suspense fallback is still on screen: the <Loader /> that
+// App.tsx renders while a lazy route chunk loads, or the BookCardSkeleton
+// that LazyBookCard.tsx shows until BookCard has loaded.
+(() => {
+  if (window.__bhReady) return;
+
+  let inflight = 0;
+  let lastChange = performance.now();
+  const track = (delta) => {
+    inflight += delta;
+    lastChange = performance.now();
+  };
+
+  const send = XMLHttpRequest.prototype.send;
+  XMLHttpRequest.prototype.send = function (...args) {
+    track(1);
+    this.addEventListener('loadend', () => track(-1), { once: true });
+    return send.apply(this, args);
+  };
+
+  const fetch = window.fetch;
+  window.fetch = function (...args) {
+    track(1);
+    return fetch.apply(this, args).finally(() => track(-1));
+  };
+
+  const FALLBACKS = '.book__pg-shadow, .animate-pulse';
+
+  window.__bhReady = {
+    inflight: () => inflight,
+    fallbackVisible: () => document.querySelector(FALLBACKS) !== null,
+    // Ready once the DOM is parsed, no fallback is showing and the network
+    // has been quiet for `quietMs`.
+    isReady: (quietMs) =>
+      document.readyState !== 'loading' &&
+      inflight === 0 &&
+      performance.now() - lastChange >= quietMs &&
+      document.querySelector(FALLBACKS) === null,
+  };
+})();
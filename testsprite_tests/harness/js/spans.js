@@ -0,0 +1,61 @@
+// In-page timing spans for the catalog scaling benchmark (harness/scaling.py).
+//
+// Every span is a pair of performance marks and a performance.measure, so
+// it also shows up in a DevTools performance recording. A span ends on the
+// first frame painted after the work it measures: a requestAnimationFrame
+// callback runs before that paint, and a task queued from it runs after.
+(() => {
+  if (window.__bhSpans) return;
+
+  const afterPaint = () => new Promise((resolve) => requestAnimationFrame(() => setTimeout(resolve, 0)));
+
+  const measure = (name) => {
+    const duration = performance.measure(name, `${name}:start`, `${name}:end`).duration;
+    performance.clearMarks(`${name}:start`);
+    performance.clearMarks(`${name}:end`);
+    performance.clearMeasures(name);
+    return duration;
+  };
+
+  // React tracks input values itself; going through the prototype setter
+  // makes it see the change when the event arrives.
+  const setValue = (element, value) => {
+    const prototype = Object.getPrototypeOf(element);
+    Object.getOwnPropertyDescriptor(prototype, 'value').set.call(element, value);
+  };
+
+  let renderedAt = null;
+  let renderedSelector = null;
+  const checkRendered = () => {
+    if (renderedAt !== null || !renderedSelector || !renderedSelector()) return;
+    renderedAt = -1;
+    afterPaint().then(() => {
+      performance.mark('render:end');
+      renderedAt = performance.now();
+    });
+  };
+  new MutationObserver(checkRendered).observe(document, { childList: true, subtree: true });
+
+  window.__bhSpans = {
+    // Resolve renderedAt() once `selector` matches and `pending` does not.
+    watchRender(selector, pending) {
+      renderedSelector = () => document.querySelector(selector) && !document.querySelector(pending);
+      checkRendered();
+    },
+    // Milliseconds from navigation start to the first paint with the list,
+    // or null while it has not rendered.
+    renderedAt: () => (renderedAt === null || renderedAt < 0 ? null : renderedAt),
+
+    // Set a form control's value the way a user would and time it to paint.
+    async change(name, selector, value, eventType) {
+      const element = document.querySelector(selector);
+      if (!element) throw new Error(`no element matches ${selector}`);
+      performance.mark(`${name}:start`);
+      setValue(element, value);
+      element.dispatchEvent(new Event(eventType, { bubbles: true }));
+      await afterPaint();
+      performance.mark(`${name}:end`);
+      return measure(name);
+    },
+  };
+})();
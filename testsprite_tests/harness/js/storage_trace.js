@@ -0,0 +1,107 @@
+// Web Storage tracer (harness/storage.py).
+//
+// Wraps the Storage.prototype methods, so both localStorage and
+// sessionStorage calls are counted per key and method with the bytes
+// written or read and the synchronous time of the call. JSON.stringify and
+// JSON.parse are wrapped too: a string serialized right before it is
+// written, or parsed right after it was read, has that time added to the
+// key as serializeMs/parseMs, which is where a growing cart costs most.
+(() => {
+  if (window.__bhStorage) return;
+
+  let counts = {};
+  const writes = {};
+  const now = () => performance.now();
+
+  const name = (storage, key) => (storage === window.sessionStorage ? `session:${key}` : String(key));
+  const entry = (key, method) => {
+    const methods = counts[key] || (counts[key] = {});
+    return methods[method] || (methods[method] = { calls: 0, bytes: 0, ms: 0, serializeMs: 0, parseMs: 0 });
+  };
+
+  let serialized = null;
+  let serializeMs = 0;
+  let read = null;
+
+  const stringify = JSON.stringify;
+  JSON.stringify = function (...args) {
+    const started = now();
+    const text = stringify.apply(this, args);
+    serializeMs = now() - started;
+    serialized = text;
+    return text;
+  };
+  const parse = JSON.parse;
+  JSON.parse = function (text, ...rest) {
+    const started = now();
+    const value = parse.call(this, text, ...rest);
+    if (read && text === read.value) {
+      entry(read.key, 'getItem').parseMs += now() - started;
+      read = null;
+    }
+    return value;
+  };
+
+  const proto = Storage.prototype;
+  const { getItem, setItem, removeItem, clear } = proto;
+
+  proto.setItem = function (key, value) {
+    const text = String(value);
+    const started = now();
+    try {
+      return setItem.call(this, key, value);
+    } finally {
+      const record = entry(name(this, key), 'setItem');
+      record.ms += now() - started;
+      record.calls += 1;
+      record.bytes += text.length * 2; // UTF-16, as the quota counts it
+      if (text === serialized) record.serializeMs += serializeMs;
+      serialized = null;
+      writes[name(this, key)] = (writes[name(this, key)] || 0) + 1;
+    }
+  };
+  proto.getItem = function (key) {
+    const started = now();
+    const value = getItem.call(this, key);
+    const record = entry(name(this, key), 'getItem');
+    record.ms += now() - started;
+    record.calls += 1;
+    record.bytes += value === null ? 0 : value.length * 2;
+    read = value === null ? null : { key: name(this, key), value };
+    return value;
+  };
+  proto.removeItem = function (key) {
+    const started = now();
+    try {
+      return removeItem.call(this, key);
+    } finally {
+      const record = entry(name(this, key), 'removeItem');
+      record.ms += now() - started;
+      record.calls += 1;
+    }
+  };
+  proto.clear = function () {
+    const started = now();
+    try {
+      return clear.call(this);
+    } finally {
+      const record = entry(this === window.sessionStorage ? 'session:*' : '*', 'clear');
+      record.ms += now() - started;
+      record.calls += 1;
+    }
+  };
+
+  const take = () => {
+    const taken = counts;
+    counts = {};
+    return taken;
+  };
+  window.__bhStorage = {
+    take,
+    // setItem calls on `key` since the page loaded; never reset
+    writes: (key) => writes[key] || 0,
+  };
+  window.addEventListener('pagehide', () => {
+    if (Object.keys(counts).length && window.__bhStorageReport) window.__bhStorageReport(take());
+  });
+})();
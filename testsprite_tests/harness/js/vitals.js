@@ -0,0 +1,139 @@
+// Per-route performance probe for harness/vitals.py.
+//
+// Keeps one record per route visited by the document: the initial load and
+// every client-side navigation react-router makes through the History API.
+// A record is handed to the __bhVitalsReport binding when the route changes
+// or the page is hidden; flush() returns the current one to the harness.
+//
+// FCP and LCP are only defined for the document load. CLS and long tasks
+// are attributed to the route that is current when they happen, and the
+// Suspense time is when the last fallback (App.tsx's <Loader /> or a
+// LazyBookCard skeleton) left the screen, measured from the route start.
+// Interactions come from the Event Timing API: input to next paint, the
+// longest event per interaction, labelled with the control's name. The API
+// never reports events under 16 ms, its lowest durationThreshold, so every
+// pointerdown and keydown is also counted per label (inputs): the inputs
+// without an interaction were faster than that.
+(() => {
+  if (window.__bhVitals) return;
+
+  const FALLBACKS = '.book__pg-shadow, .animate-pulse';
+
+  const newRecord = (kind, start) => ({
+    path: location.pathname,
+    kind,
+    startMs: start,
+    fcpMs: null,
+    lcpMs: null,
+    cls: 0,
+    longTasks: 0,
+    longTaskMs: 0,
+    longestTaskMs: 0,
+    suspenseMs: null,
+    interactions: new Map(),
+    inputs: new Map(),
+    fallbackSeen: false,
+  });
+
+  let current = newRecord('load', 0);
+
+  const finish = () => {
+    const record = current;
+    if (!record) return null;
+    // Event entries the observer has not been called back with yet
+    if (eventObserver) eventObserver.takeRecords().forEach(recordEvent);
+    current = null;
+    const { fallbackSeen, interactions, inputs, ...payload } = record;
+    return { ...payload, interactions: [...interactions.values()], inputs: Object.fromEntries(inputs) };
+  };
+  const report = () => {
+    const payload = finish();
+    if (payload && window.__bhVitalsReport) window.__bhVitalsReport(payload);
+  };
+
+  const observe = (type, callback, options = {}) => {
+    try {
+      const observer = new PerformanceObserver((list) => list.getEntries().forEach(callback));
+      observer.observe({ type, buffered: true, ...options });
+      return observer;
+    } catch (e) {
+      // Entry type not supported by this browser
+      return null;
+    }
+  };
+
+  observe('paint', (entry) => {
+    if (entry.name === 'first-contentful-paint' && current && current.kind === 'load') {
+      current.fcpMs = entry.startTime;
+    }
+  });
+  observe('largest-contentful-paint', (entry) => {
+    if (current && current.kind === 'load') current.lcpMs = entry.startTime;
+  });
+  observe('layout-shift', (entry) => {
+    if (current && !entry.hadRecentInput) current.cls += entry.value;
+  });
+  observe('longtask', (entry) => {
+    if (!current) return;
+    current.longTasks += 1;
+    current.longTaskMs += entry.duration;
+    current.longestTaskMs = Math.max(current.longestTaskMs, entry.duration);
+  });
+
+  const CONTROLS = 'button, a, [role="button"], input, select, textarea';
+  const label = (node) => {
+    const control = node && node.closest ? node.closest(CONTROLS) || node : null;
+    if (!control) return '';
+    const text = control.getAttribute('aria-label') || control.textContent ||
+      control.getAttribute('placeholder') || control.tagName.toLowerCase();
+    return text.replace(/\s+/g, ' ').trim().slice(0, 80);
+  };
+  const recordEvent = (entry) => {
+    if (!current || !entry.interactionId) return;
+    const known = current.interactions.get(entry.interactionId);
+    if (known && known.durationMs >= entry.duration) return;
+    current.interactions.set(entry.interactionId, {
+      type: entry.name,
+      label: known ? known.label : label(entry.target),
+      durationMs: entry.duration,
+    });
+  };
+  const eventObserver = observe('event', recordEvent, { durationThreshold: 16 });
+  const countInput = (event) => {
+    if (!current || event.repeat) return;
+    const name = label(event.target);
+    current.inputs.set(name, (current.inputs.get(name) || 0) + 1);
+  };
+  window.addEventListener('pointerdown', countInput, { capture: true, passive: true });
+  window.addEventListener('keydown', countInput, { capture: true, passive: true });
+
+  const checkFallback = () => {
+    if (!current) return;
+    if (document.querySelector(FALLBACKS)) {
+      current.fallbackSeen = true;
+    } else if (current.fallbackSeen) {
+      current.suspenseMs = performance.now() - current.startMs;
+      current.fallbackSeen = false;
+    }
+  };
+  new MutationObserver(checkFallback).observe(document, { childList: true, subtree: true });
+
+  const routeChanged = () => {
+    if (current && current.path === location.pathname) return;
+    report();
+    current = newRecord('spa', performance.now());
+    checkFallback();
+  };
+  for (const method of ['pushState', 'replaceState']) {
+    const original = history[method];
+    history[method] = function (...args) {
+      const result = original.apply(this, args);
+      routeChanged();
+      return result;
+    };
+  }
+  window.addEventListener('popstate', routeChanged);
+  window.addEventListener('pagehide', report);
+
+  window.__bhVitals = { flush: finish };
+})();
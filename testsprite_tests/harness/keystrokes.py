@@ -0,0 +1,267 @@
+"""Keystroke-to-request audit of the search boxes.
+
+``setSearchQuery`` runs on every change of the header search (TC022) and
+the catalog search on ``/books`` (TC007), and every change re-runs the
+fetch effect in ``BookContext.jsx``: a Google Books ``fetch`` for a
+non-empty query, which is never aborted, or an axios ``GET /books``, which
+the effect cancels through its ``CancelToken`` when the query changes
+again. Nothing is debounced.
+
+This tool types realistic queries into either box, one key at a time at
+each of the ``--speeds`` (characters per minute, with some jitter), and
+logs through an init script (``js/keystrokes.js``) every keystroke and
+every request the page sends. A search session is one query typed, then
+``--settle`` ms for the requests to finish. On ``/books`` a search swaps
+the page for the loading spinner, which unmounts the box mid-query, so
+before each key the audit waits for the box to be back and refocuses it
+(the session's ``refocused`` count). A session that still logs fewer
+keystrokes than its query has characters is marked invalid and left out
+of the totals. Per surface and speed the report gives:
+
+    requests/key   outbound requests per keystroke
+    completed      requests that finished, and how many of them were stale
+                   (the box held another query by then)
+    cancelled      XHRs aborted by the CancelToken (or aborted fetches)
+    wasted         cancelled + stale requests, and the ms they were open
+    input->paint   keydown to the next painted frame, p50/p95
+
+Google Books searches are answered from ``fixtures/google_books`` after
+``--google-latency`` ms, so their overlap resembles the real API; the
+frontend only searches Google Books when ``VITE_BOOK_API_KEY`` is set::
+
+    python -m harness.keystrokes --speeds 200,400,800 --mock-backend
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import random
+import sys
+from collections import defaultdict
+from pathlib import Path
+
+from playwright.async_api import Error as PlaywrightError
+from playwright.async_api import async_playwright
+
+from .app import APP_URL
+from .google_books import CORS_HEADERS, EMPTY_RESULT, VOLUMES_URL, GoogleBooksFixtures, fixture_key
+from .loader import SUITE_DIR
+from .mock_backend import MockBackend, format_stats, generate_catalog
+from .plugins import read_js
+from .stats import summarize
+
+DEFAULT_REPORT = SUITE_DIR / "tmp" / "keystrokes.json"
+DEFAULT_QUERIES = ("harry potter", "the great gatsby", "science fiction", "tolkien", "history of rome")
+DEFAULT_SPEEDS = (200, 400, 800)
+OUTCOMES = ("completed", "cancelled", "failed", "pending")
+
+SEARCH_PLACEHOLDER = "Search books, authors, genres..."
+# Where each box lives: the page to open and the input's selector
+SURFACES = {
+    "header": ("/", f'header input[placeholder="{SEARCH_PLACEHOLDER}"]'),
+    "catalog": ("/books", f'main input[placeholder="{SEARCH_PLACEHOLDER}"]'),
+}
+
+
+def session_stats(log: dict, query: str) -> dict:
+    """Counts for one typed query from the page's keystroke/request log."""
+    keystrokes, requests = log["keystrokes"], log["requests"]
+    outcomes = {outcome: 0 for outcome in OUTCOMES}
+    for request in requests:
+        outcomes[request["outcome"]] += 1
+    stale = [request for request in requests if request["stale"]]
+    wasted = stale + [request for request in requests if request["outcome"] == "cancelled"]
+    return {
+        # Keys that reached another element are missing from the log
+        "valid": len(keystrokes) == len(query),
+        "keystrokes": len(keystrokes),
+        "requests": len(requests),
+        **outcomes,
+        "stale": len(stale),
+        "wasted": len(wasted),
+        "wasted_ms": sum(request["end"] - request["start"] for request in wasted),
+        "by_transport": dict(sorted(
+            (transport, sum(1 for request in requests if request["transport"] == transport))
+            for transport in {request["transport"] for request in requests}
+        )),
+        "paint_ms": [key["paintMs"] for key in keystrokes if key["paintMs"] is not None],
+    }
+
+
+class KeystrokeAudit:
+    def __init__(
+        self,
+        surfaces=tuple(SURFACES),
+        speeds=DEFAULT_SPEEDS,
+        queries=DEFAULT_QUERIES,
+        settle_ms: float = 3000,
+        google_latency_ms: float = 250,
+        jitter: float = 0.3,
+        headless: bool = True,
+        seed: int = 1,
+    ):
+        self.surfaces = list(surfaces)
+        self.speeds = list(speeds)
+        self.queries = list(queries)
+        self.settle_ms = settle_ms
+        self.google_latency_ms = google_latency_ms
+        self.jitter = jitter
+        self.headless = headless
+        self.rng = random.Random(seed)
+        self.fixtures = GoogleBooksFixtures()
+        self.sessions: list[dict] = []
+
+    async def _google_books(self, route) -> None:
+        await asyncio.sleep(self.google_latency_ms / 1000)
+        body = self.fixtures.load(fixture_key(route.request.url)) or EMPTY_RESULT
+        try:
+            await route.fulfill(status=200, content_type="application/json", body=body, headers=CORS_HEADERS)
+        except PlaywrightError:
+            # The page may be gone by the time the delay is over
+            pass
+
+    async def run(self) -> dict:
+        async with async_playwright() as pw:
+            browser = await pw.chromium.launch(headless=self.headless)
+            try:
+                for surface in self.surfaces:
+                    for speed in self.speeds:
+                        await self._audit(browser, surface, speed)
+            finally:
+                await browser.close()
+        return self.report()
+
+    async def _audit(self, browser, surface: str, speed: int) -> None:
+        path, selector = SURFACES[surface]
+        context = await browser.new_context()
+        try:
+            await context.route(f"{VOLUMES_URL}?*", self._google_books)
+            await context.add_init_script(read_js("keystrokes.js"))
+            await context.add_init_script(f"window.__bhKeys.watch({json.dumps(selector)})")
+            page = await context.new_page()
+            await page.goto(f"{APP_URL}{path}")
+            box = page.locator(selector)
+            await box.wait_for()
+            for query in self.queries:
+                await self._settle(page)
+                await page.evaluate("() => window.__bhKeys.take()")
+                await box.click()
+                refocused = 0
+                for char in query:
+                    if not await box.evaluate("element => element === document.activeElement"):
+                        await box.focus()
+                        await page.keyboard.press("End")
+                        refocused += 1
+                    await page.keyboard.type(char)
+                    delay = 60 / speed * self.rng.uniform(1 - self.jitter, 1 + self.jitter)
+                    await asyncio.sleep(delay)
+                await self._settle(page)
+                log = await page.evaluate("() => window.__bhKeys.take()")
+                self.sessions.append({"surface": surface, "speed": speed, "query": query,
+                                      "refocused": refocused, **session_stats(log, query)})
+                # Clearing the box reloads the catalog; not part of the session
+                await box.fill("")
+        finally:
+            await context.close()
+
+    async def _settle(self, page) -> None:
+        try:
+            await page.wait_for_function("() => window.__bhKeys.pending() === 0", timeout=self.settle_ms)
+        except PlaywrightError:
+            pass
+
+    def report(self) -> dict:
+        groups = defaultdict(list)
+        for session in self.sessions:
+            groups[(session["surface"], session["speed"])].append(session)
+        rows = []
+        for (surface, speed), every in groups.items():
+            sessions = [session for session in every if session["valid"]]
+            totals = {
+                key: sum(session[key] for session in sessions)
+                for key in ("keystrokes", "requests", *OUTCOMES, "stale", "wasted", "wasted_ms")
+            }
+            rows.append({
+                "surface": surface,
+                "speed_cpm": speed,
+                "sessions": len(sessions),
+                "invalid": len(every) - len(sessions),
+                "refocused": sum(session["refocused"] for session in every),
+                **totals,
+                "requests_per_keystroke": totals["requests"] / totals["keystrokes"] if totals["keystrokes"] else 0.0,
+                "input_to_paint_ms": summarize(ms for session in sessions for ms in session["paint_ms"]),
+            })
+        return {"summary": rows, "sessions": self.sessions}
+
+
+def format_report(report: dict) -> str:
+    lines = [f"  {'surface':<8} {'cpm':>5} {'keys':>5} {'req/key':>7} {'done':>5} {'stale':>5} "
+             f"{'cancel':>6} {'failed':>6} {'wasted':>6} {'wasted ms':>9} {'paint p50/p95':>14}"]
+    for row in report["summary"]:
+        paint = row["input_to_paint_ms"]
+        cell = f"{paint['p50']:.0f}/{paint['p95']:.0f}ms" if paint["count"] else "-"
+        lines.append(
+            f"  {row['surface']:<8} {row['speed_cpm']:>5} {row['keystrokes']:>5} "
+            f"{row['requests_per_keystroke']:>7.2f} {row['completed']:>5} {row['stale']:>5} "
+            f"{row['cancelled']:>6} {row['failed']:>6} {row['wasted']:>6} {row['wasted_ms']:>9.0f} {cell:>14}"
+        )
+        if row["invalid"]:
+            lines.append(f"           ! {row['invalid']} session(s) lost keystrokes and are left out")
+    return "\n".join(lines)
+
+
+async def _main(options: argparse.Namespace) -> dict:
+    backend = MockBackend(catalog=generate_catalog(options.mock_books)) if options.mock_backend else None
+    if backend is not None:
+        await backend.start()
+    try:
+        audit = KeystrokeAudit(
+            options.surfaces, options.speeds, options.queries, settle_ms=options.settle,
+            google_latency_ms=options.google_latency, headless=not options.headed,
+        )
+        return await audit.run()
+    finally:
+        if backend is not None:
+            await backend.stop()
+            print(f"Mock backend on {backend.url}")
+            print(format_stats(backend.stats()))
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m harness.keystrokes",
+                                     description="Count the requests each search keystroke causes.")
+    parser.add_argument("--surfaces", type=lambda text: text.split(","), default=list(SURFACES),
+                        help="comma-separated search boxes: header, catalog (default: both)")
+    parser.add_argument("--speeds", type=lambda text: [int(speed) for speed in text.split(",")],
+                        default=list(DEFAULT_SPEEDS),
+                        help="typing speeds in characters per minute (default: 200,400,800)")
+    parser.add_argument("--queries", type=lambda text: text.split(","), default=list(DEFAULT_QUERIES),
+                        help="comma-separated queries to type")
+    parser.add_argument("--settle", type=float, default=3000, metavar="MS",
+                        help="wait for requests to finish after each query (default: 3000)")
+    parser.add_argument("--google-latency", type=float, default=250, metavar="MS",
+                        help="delay of the Google Books fixtures (default: 250)")
+    parser.add_argument("--headed", action="store_true", help="show the browser window")
+    parser.add_argument("--mock-backend", action="store_true",
+                        help="serve the REST API from the in-process mock")
+    parser.add_argument("--mock-books", type=int, default=200, metavar="N",
+                        help="size of the mock's catalog (default: 200)")
+    parser.add_argument("-o", "--output", type=Path, default=DEFAULT_REPORT,
+                        help="report file (default: tmp/keystrokes.json)")
+    options = parser.parse_args(argv)
+    unknown = set(options.surfaces) - set(SURFACES)
+    if unknown:
+        parser.error(f"unknown surface(s): {', '.join(sorted(unknown))}")
+
+    report = asyncio.run(_main(options))
+    print(format_report(report))
+    options.output.parent.mkdir(parents=True, exist_ok=True)
+    options.output.write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+    print(f"report written to {options.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,358 @@
+"""Multi-user browser load for the browse -> cart -> checkout journey.
+
+TC007, TC010, TC011 and TC014 describe the shopping flow, but the generated
+scripts only scroll and reload, so the journey is driven here from the
+app's own markup. Each virtual user is a browser context holding its own
+account, and repeats:
+
+    home         open ``/`` until the header's Books link is up
+    browse       follow it to ``/books`` until the catalog lists books
+    book         open a random listed book's ``/books/:id`` until "Add to Cart" shows
+    add_to_cart  click it and wait for ``POST /cart/add``
+    cart         follow the header cart link until the cart items render
+    checkout     "Proceed to checkout" until the "Order Confirmed!" dialog
+
+The journey does not search: any search query makes ``BookContext``
+replace the catalog with ``fetchGoogleBooks`` results, which are empty
+when the dev server has no ``VITE_BOOK_API_KEY`` (``.env.development``
+sets none) and otherwise carry Google ids that no backend can add to a
+cart. The unsearched ``/books`` list is the API's ``GET /books``.
+
+A run is a list of stages, each holding a number of users for a number of
+seconds. Users added by a stage start spread over ``ramp`` seconds; users
+beyond the target stop after their current journey. For every stage the
+report gives journeys per minute, the error rate and per-step latency
+percentiles, so throughput and failures can be read against concurrency::
+
+    python -m harness.load --stages 5:30,25:60,100:60 --mock-backend
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from playwright.async_api import Error as PlaywrightError
+from playwright.async_api import async_playwright
+
+from .app import API_URL, APP_URL
+from .loader import SUITE_DIR
+from .mock_backend import MockBackend, format_stats, generate_catalog
+from .session import storage_state
+from .stats import summarize
+
+STEPS = ("home", "browse", "book", "add_to_cart", "cart", "checkout")
+DEFAULT_REPORT = SUITE_DIR / "tmp" / "load_report.json"
+# Images and fonts do not change what the journey exercises
+BLOCKED_RESOURCES = frozenset({"image", "font", "media"})
+
+BOOKS_LINK = 'header nav a[href="/books"]'
+RESULT_LINK = 'main a[href^="/books/"]'
+CART_LINK = 'header a[href="/cart"]'
+CART_ITEM = '[aria-label^="Increase quantity of"]'
+CHECKOUT_BUTTON = 'button[aria-label="Proceed to checkout"]'
+ORDER_DIALOG = '[role="dialog"]:has-text("Order Confirmed!")'
+
+
+class JourneyError(RuntimeError):
+    pass
+
+
+@dataclass(frozen=True)
+class Stage:
+    users: int
+    seconds: float
+
+
+def parse_stages(text: str) -> list[Stage]:
+    """Parse ``"10:30,50:60"`` into stages of (users, seconds)."""
+    stages = []
+    for part in text.split(","):
+        users, _, seconds = part.strip().partition(":")
+        try:
+            stage = Stage(int(users), float(seconds))
+        except ValueError:
+            raise argparse.ArgumentTypeError(f"bad stage {part!r}; expected USERS:SECONDS") from None
+        if stage.users < 0 or stage.seconds <= 0:
+            raise argparse.ArgumentTypeError(f"bad stage {part!r}")
+        stages.append(stage)
+    return stages
+
+
+@dataclass
+class Journey:
+    stage: int
+    started: float
+    steps: dict[str, float] = field(default_factory=dict)
+    error: str | None = None
+    failed_step: str | None = None
+
+
+class Shopper:
+    """One virtual user: a context, an account and a page."""
+
+    def __init__(self, context, rng: random.Random, timeout_ms: float):
+        self.context = context
+        self.rng = rng
+        self.timeout_ms = timeout_ms
+        self.page = None
+
+    async def journey(self, stage: int) -> Journey:
+        journey = Journey(stage, time.time())
+        for step in STEPS:
+            started = time.perf_counter()
+            try:
+                await getattr(self, f"_{step}")()
+            except (PlaywrightError, JourneyError) as exc:
+                journey.failed_step = step
+                journey.error = f"{type(exc).__name__}: {str(exc).splitlines()[0] if str(exc) else ''}"
+                break
+            journey.steps[step] = (time.perf_counter() - started) * 1000
+        return journey
+
+    async def _visible(self, selector: str):
+        locator = self.page.locator(selector).first
+        await locator.wait_for(state="visible", timeout=self.timeout_ms)
+        return locator
+
+    async def _home(self):
+        if self.page is None or self.page.is_closed():
+            self.page = await self.context.new_page()
+        await self.page.goto(f"{APP_URL}/", timeout=self.timeout_ms)
+        await self._visible(BOOKS_LINK)
+
+    async def _browse(self):
+        await (await self._visible(BOOKS_LINK)).click(timeout=self.timeout_ms)
+        await self.page.wait_for_url("**/books", timeout=self.timeout_ms)
+        await self._visible(RESULT_LINK)
+
+    async def _book(self):
+        links = self.page.locator(RESULT_LINK)
+        count = min(await links.count(), 12)
+        if not count:
+            raise JourneyError("/books listed no books")
+        await links.nth(self.rng.randrange(count)).click(timeout=self.timeout_ms)
+        await self.page.wait_for_url("**/books/*", timeout=self.timeout_ms)
+        await self._visible('button:has-text("Add to Cart")')
+
+    async def _add_to_cart(self):
+        button = await self._visible('button:has-text("Add to Cart")')
+        async with self.page.expect_response(
+            lambda response: response.url.endswith("/cart/add") and response.request.method == "POST",
+            timeout=self.timeout_ms,
+        ) as info:
+            await button.click(timeout=self.timeout_ms)
+        response = await info.value
+        if not response.ok:
+            raise JourneyError(f"POST /cart/add returned {response.status}")
+
+    async def _cart(self):
+        await (await self._visible(CART_LINK)).click(timeout=self.timeout_ms)
+        await self.page.wait_for_url("**/cart", timeout=self.timeout_ms)
+        await self._visible(CART_ITEM)
+
+    async def _checkout(self):
+        await (await self._visible(CHECKOUT_BUTTON)).click(timeout=self.timeout_ms)
+        await self._visible(ORDER_DIALOG)
+
+
+class LoadGenerator:
+    def __init__(
+        self,
+        stages: list[Stage],
+        ramp: float = 5.0,
+        timeout_ms: float = 15000,
+        block_assets: bool = True,
+        headless: bool = True,
+        api_url: str = API_URL,
+        seed: int = 1,
+    ):
+        self.stages = stages
+        self.ramp = ramp
+        self.timeout_ms = timeout_ms
+        self.block_assets = block_assets
+        self.headless = headless
+        self.api_url = api_url.rstrip("/")
+        self.rng = random.Random(seed)
+        self.journeys: list[Journey] = []
+        self._stage = 0
+        self._run_id = f"{int(time.time()):x}"
+
+    async def _account(self, request, number: int) -> dict:
+        email = f"load-{self._run_id}-{number}@example.com"
+        credentials = {
+            "username": f"load{self._run_id}{number}", "email": email, "password": "LoadPassword123",
+        }
+        response = await request.post(f"{self.api_url}/auth/register", data=credentials)
+        if response.status == 409:
+            response = await request.post(f"{self.api_url}/auth/login", data=credentials)
+        if not response.ok:
+            raise JourneyError(f"could not create account {email}: HTTP {response.status}")
+        body = await response.json()
+        user = {key: body.get(key) for key in ("id", "username", "email", "createdAt")}
+        return storage_state(body["token"], user)
+
+    async def _user(self, browser, request, number: int, stop: asyncio.Event, delay: float) -> None:
+        await asyncio.sleep(delay)
+        if stop.is_set():
+            return
+        try:
+            state = await self._account(request, number)
+        except (PlaywrightError, JourneyError) as exc:
+            self.journeys.append(Journey(self._stage, time.time(), error=str(exc), failed_step="account"))
+            return
+        context = await browser.new_context(storage_state=state, viewport={"width": 1280, "height": 720})
+        if self.block_assets:
+            async def block(route):
+                if route.request.resource_type in BLOCKED_RESOURCES:
+                    await route.abort()
+                else:
+                    await route.fallback()
+
+            await context.route("**/*", block)
+        shopper = Shopper(context, random.Random(self.rng.random()), self.timeout_ms)
+        try:
+            while not stop.is_set():
+                journey = await shopper.journey(self._stage)
+                self.journeys.append(journey)
+                if journey.error and shopper.page is not None:
+                    # Start the next journey from a fresh page
+                    await shopper.page.close()
+        finally:
+            await context.close()
+
+    async def run(self) -> dict:
+        async with async_playwright() as pw:
+            browser = await pw.chromium.launch(headless=self.headless)
+            request = await pw.request.new_context()
+            users: list[asyncio.Event] = []
+            tasks: list[asyncio.Task] = []
+            started_at = []
+            try:
+                for index, stage in enumerate(self.stages):
+                    self._stage = index
+                    started_at.append(time.time())
+                    # Drop surplus users; they finish the journey they are on
+                    while len(users) > stage.users:
+                        users.pop().set()
+                    added = stage.users - len(users)
+                    for offset in range(added):
+                        stop = asyncio.Event()
+                        delay = self.ramp * offset / added
+                        tasks.append(asyncio.create_task(
+                            self._user(browser, request, len(tasks), stop, delay)
+                        ))
+                        users.append(stop)
+                    await asyncio.sleep(stage.seconds)
+            finally:
+                for stop in users:
+                    stop.set()
+                # Let in-flight journeys finish, but not forever
+                if tasks:
+                    _, late = await asyncio.wait(tasks, timeout=self.timeout_ms / 1000 * len(STEPS))
+                    for task in late:
+                        task.cancel()
+                    await asyncio.gather(*tasks, return_exceptions=True)
+                await request.dispose()
+                await browser.close()
+        return self.report(started_at)
+
+    def report(self, started_at: list[float]) -> dict:
+        stages = []
+        for index, stage in enumerate(self.stages):
+            journeys = [journey for journey in self.journeys if journey.stage == index]
+            failed = [journey for journey in journeys if journey.error]
+            steps = defaultdict(list)
+            for journey in journeys:
+                for step, ms in journey.steps.items():
+                    steps[step].append(ms)
+            errors = defaultdict(int)
+            for journey in failed:
+                errors[f"{journey.failed_step}: {journey.error}"] += 1
+            stages.append({
+                "users": stage.users,
+                "seconds": stage.seconds,
+                "started": started_at[index] if index < len(started_at) else None,
+                "journeys": len(journeys) - len(failed),
+                "failed": len(failed),
+                "journeys_per_minute": (len(journeys) - len(failed)) / stage.seconds * 60,
+                "error_rate": len(failed) / len(journeys) if journeys else 0.0,
+                "steps": {step: summarize(steps[step]) for step in STEPS if steps[step]},
+                "errors": dict(sorted(errors.items(), key=lambda item: -item[1])),
+            })
+        return {"stages": stages}
+
+
+def format_report(report: dict) -> str:
+    """Per-stage throughput, error rate and p50/p95 step latency in ms."""
+    lines = [f"  {'users':>5} {'journeys/min':>12} {'errors':>7} " + "".join(f"{step:>13}" for step in STEPS)]
+    for stage in report["stages"]:
+        cells = []
+        for step in STEPS:
+            summary = stage["steps"].get(step)
+            cells.append(f"{summary['p50']:>7.0f}/{summary['p95']:<5.0f}" if summary else f"{'-':>13}")
+        lines.append(f"  {stage['users']:>5} {stage['journeys_per_minute']:>12.1f} "
+                     f"{stage['error_rate']:>7.1%} " + "".join(cells))
+        for error, count in list(stage["errors"].items())[:3]:
+            lines.append(f"        {count:>4} x {error[:110]}")
+    return "\n".join(lines)
+
+
+async def _main(options: argparse.Namespace) -> dict:
+    backend = MockBackend(catalog=generate_catalog(options.mock_books)) if options.mock_backend else None
+    if backend is not None:
+        await backend.start()
+    try:
+        generator = LoadGenerator(
+            options.stages, ramp=options.ramp,
+            timeout_ms=options.step_timeout, block_assets=not options.with_assets,
+            headless=not options.headed,
+        )
+        return await generator.run()
+    finally:
+        if backend is not None:
+            await backend.stop()
+            print(f"Mock backend on {backend.url}")
+            print(format_stats(backend.stats()))
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m harness.load",
+                                     description="Drive many concurrent shoppers through the app.")
+    parser.add_argument("--stages", type=parse_stages, default=parse_stages("5:30,20:60,50:60"),
+                        help="USERS:SECONDS plateaus, comma-separated (default: 5:30,20:60,50:60)")
+    parser.add_argument("--ramp", type=float, default=5.0,
+                        help="seconds over which a stage's new users start (default: 5)")
+    parser.add_argument("--step-timeout", type=float, default=15000, metavar="MS",
+                        help="timeout of each journey step (default: 15000)")
+    parser.add_argument("--with-assets", action="store_true", help="load images and fonts too")
+    parser.add_argument("--headed", action="store_true", help="show the browser window")
+    parser.add_argument("--mock-backend", action="store_true",
+                        help="serve the REST API from the in-process mock")
+    parser.add_argument("--mock-books", type=int, default=200, metavar="N",
+                        help="size of the mock's catalog (default: 200)")
+    parser.add_argument("-o", "--output", type=Path, default=DEFAULT_REPORT,
+                        help="report file (default: tmp/load_report.json)")
+    options = parser.parse_args(argv)
+
+    try:
+        report = asyncio.run(_main(options))
+    except JourneyError as exc:
+        print(f"Load run failed: {exc}", file=sys.stderr)
+        return 2
+    print(format_report(report))
+    options.output.parent.mkdir(parents=True, exist_ok=True)
+    options.output.write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+    print(f"report written to {options.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
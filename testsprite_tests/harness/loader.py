@@ -0,0 +1,202 @@
+"""Discovery and import of the generated ``TC0xx_*.py`` scripts.
+
+Every script ends with a module-level ``asyncio.run(run_test())``, so a plain
+``import`` would execute the test. The loader parses the source, drops that
+entry point and executes the remaining module body in a fresh namespace,
+which leaves ``run_test`` available as an un-awaited coroutine function.
+
+The fixed pauses are rewritten on the way in: ``page.wait_for_timeout(ms)``
+and ``asyncio.sleep(s)`` become ``__harness__.pause(ms, page=..., target=...)``,
+where ``target`` is the locator the next statement acts on, if any. The
+runner supplies ``__harness__`` (see ``waits.py``).
+
+The scripts narrate their flow in ``# -> ...`` comments. Each one becomes
+an ``await __harness__.step(label)`` in front of the statement it
+introduces, so the runner can attribute measurements to the step.
+"""
+
+from __future__ import annotations
+
+import ast
+import io
+import re
+import tokenize
+import types
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+
+SUITE_DIR = Path(__file__).resolve().parent.parent
+SCRIPT_PATTERN = re.compile(r"^(TC\d{3})_(.+)\.py$")
+# Locator methods whose target a preceding pause should wait for
+TARGET_ACTIONS = {"click", "dblclick", "fill", "type", "press", "check", "uncheck", "hover", "select_option"}
+# ``# -> Click the Add to Cart button`` and ``# --> Assertions to verify final state``
+STEP_COMMENT = re.compile(r"^#\s*-+>\s*(.+?)\s*$")
+
+
+@dataclass(frozen=True)
+class TestScript:
+    test_id: str
+    title: str
+    path: Path
+
+    @property
+    def name(self) -> str:
+        # Same form as the ``title`` field in tmp/test_results.json
+        return f"{self.test_id}-{self.title}"
+
+
+def discover(directory: Path = SUITE_DIR, only: list[str] | None = None) -> list[TestScript]:
+    """Return the suite's scripts in test-id order, optionally filtered by id."""
+    wanted = {test_id.upper() for test_id in only} if only else None
+    scripts = []
+    for path in sorted(Path(directory).iterdir()):
+        match = SCRIPT_PATTERN.match(path.name)
+        if not match:
+            continue
+        test_id, slug = match.groups()
+        if wanted is not None and test_id not in wanted:
+            continue
+        scripts.append(TestScript(test_id, slug.replace("_", " "), path))
+    return scripts
+
+
+def _is_entrypoint(node: ast.stmt) -> bool:
+    # Matches the trailing ``asyncio.run(run_test())`` statement
+    if not isinstance(node, ast.Expr) or not isinstance(node.value, ast.Call):
+        return False
+    func = node.value.func
+    return (
+        isinstance(func, ast.Attribute)
+        and func.attr == "run"
+        and isinstance(func.value, ast.Name)
+        and func.value.id == "asyncio"
+    )
+
+
+def _awaited_call(node: ast.stmt) -> ast.Call | None:
+    if isinstance(node, ast.Expr) and isinstance(node.value, ast.Await):
+        if isinstance(node.value.value, ast.Call):
+            return node.value.value
+    return None
+
+
+def _pause_call(call: ast.Call) -> ast.Call | None:
+    """Translate a fixed sleep into ``__harness__.pause(ms, ...)``."""
+    func = call.func
+    if not isinstance(func, ast.Attribute) or len(call.args) != 1 or call.keywords:
+        return None
+    keywords = []
+    if func.attr == "wait_for_timeout":
+        milliseconds = call.args[0]
+        keywords.append(ast.keyword("page", func.value))
+    elif func.attr == "sleep" and isinstance(func.value, ast.Name) and func.value.id == "asyncio":
+        milliseconds = ast.BinOp(call.args[0], ast.Mult(), ast.Constant(1000))
+    else:
+        return None
+    pause = ast.Attribute(ast.Name("__harness__", ast.Load()), "pause", ast.Load())
+    return ast.Call(pause, [milliseconds], keywords)
+
+
+class _PauseRewriter(ast.NodeTransformer):
+    def generic_visit(self, node):
+        super().generic_visit(node)
+        for name in ("body", "orelse", "finalbody"):
+            statements = getattr(node, name, None)
+            if isinstance(statements, list):
+                self._rewrite(statements)
+        return node
+
+    @staticmethod
+    def _rewrite(statements: list) -> None:
+        for index, statement in enumerate(statements):
+            call = _awaited_call(statement)
+            pause = call and _pause_call(call)
+            if pause is None:
+                continue
+            # ``await page.wait_for_timeout(3000); await elem.click(...)``
+            following = _awaited_call(statements[index + 1]) if index + 1 < len(statements) else None
+            if (
+                following is not None
+                and isinstance(following.func, ast.Attribute)
+                and following.func.attr in TARGET_ACTIONS
+                and isinstance(following.func.value, ast.Name)
+            ):
+                pause.keywords.append(ast.keyword("target", ast.Name(following.func.value.id, ast.Load())))
+            statement.value.value = ast.copy_location(pause, call)
+
+
+def step_comments(source: str) -> dict[int, str]:
+    """Line number -> label of every ``# ->`` comment in ``source``."""
+    comments = {}
+    for token in tokenize.generate_tokens(io.StringIO(source).readline):
+        if token.type == tokenize.COMMENT:
+            match = STEP_COMMENT.match(token.string)
+            if match:
+                comments[token.start[0]] = match.group(1)
+    return comments
+
+
+class _StepInserter(ast.NodeVisitor):
+    """Put ``await __harness__.step(label)`` before each commented statement.
+
+    Only statements of async functions get one, since the call is awaited.
+    """
+
+    def __init__(self, comments: dict[int, str]):
+        self.comments = comments
+
+    def visit_AsyncFunctionDef(self, node):
+        self._insert(node, node.lineno)
+
+    def _insert(self, node, start: int) -> None:
+        for name in ("body", "orelse", "finalbody"):
+            statements = getattr(node, name, None)
+            if not isinstance(statements, list):
+                continue
+            previous = start
+            rewritten = []
+            for statement in statements:
+                lines = [line for line in self.comments if previous < line < statement.lineno]
+                if lines:
+                    label = self.comments[max(lines)]
+                    for line in lines:
+                        del self.comments[line]
+                    step = ast.Attribute(ast.Name("__harness__", ast.Load()), "step", ast.Load())
+                    call = ast.Expr(ast.Await(ast.Call(step, [ast.Constant(label)], [])))
+                    rewritten.append(ast.copy_location(call, statement))
+                rewritten.append(statement)
+                if not isinstance(statement, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+                    self._insert(statement, statement.lineno)
+                previous = statement.end_lineno
+            setattr(node, name, rewritten)
+        for handler in getattr(node, "handlers", []):
+            self._insert(handler, handler.lineno)
+
+
+@lru_cache(maxsize=None)
+def _compile(path: Path) -> types.CodeType:
+    source = path.read_text(encoding="utf-8")
+    tree = ast.parse(source, filename=str(path))
+    tree.body = [node for node in tree.body if not _is_entrypoint(node)]
+    tree = _PauseRewriter().visit(tree)
+    # After the pauses, so a step call never separates a pause from its target
+    _StepInserter(step_comments(source)).visit(tree)
+    tree = ast.fix_missing_locations(tree)
+    return compile(tree, str(path), "exec")
+
+
+def load_module(script: TestScript, overrides: dict | None = None) -> types.ModuleType:
+    """Execute a script's module body without running its test.
+
+    ``overrides`` are written into the module globals after the body has run,
+    so they replace names the script imported itself (``async_api`` etc.).
+    A fresh module is built on every call, which keeps concurrent runs of the
+    same script from sharing globals.
+    """
+    module = types.ModuleType(f"testsprite_{script.test_id}")
+    module.__file__ = str(script.path)
+    exec(_compile(script.path), module.__dict__)
+    if overrides:
+        module.__dict__.update(overrides)
+    return module
@@ -0,0 +1,473 @@
+"""In-process stand-in for the BookHaven REST API.
+
+Serves the endpoints the frontend calls (``src/contexts/AuthContext.jsx``
+and ``src/contexts/BookContext.jsx``) from memory, over a small asyncio
+HTTP/1.1 server with keep-alive, so the suite no longer depends on the
+backend at ``http://localhost:8080/api`` being up::
+
+    POST /auth/login    POST /auth/register    GET /auth/me    POST /auth/logout
+    GET  /books         GET  /books/:id        POST /books     PUT  /books/:id
+    DELETE /books/:id
+    GET  /cart          POST /cart/add         PUT  /cart/update/:id
+    DELETE /cart/:id    POST /cart/checkout
+
+Per-endpoint request counts and handling latency are available from
+``MockBackend.stats()`` and ``GET /__mock__/stats``.
+
+Tokens are HS256-signed JWTs whose header and payload use the standard
+base64 alphabet: ``isValidToken`` decodes the payload with ``atob``, which
+rejects the ``-``/``_`` characters of base64url.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import base64
+import hashlib
+import hmac
+import json
+import random
+import re
+import time
+import uuid
+from array import array
+from datetime import date, datetime, timedelta, timezone
+from http import HTTPStatus
+from pathlib import Path
+from urllib.parse import urlsplit
+
+from .app import API_URL
+from .stats import summarize
+
+DEFAULT_USERS = [
+    {"username": "testuser", "email": "testuser@example.com", "password": "TestPassword123"},
+    {"username": "validuser", "email": "validuser@example.com", "password": "ValidPassword123"},
+]
+
+GENRES = [
+    "Fiction", "Mystery", "Science Fiction", "Fantasy", "Romance",
+    "History", "Biography", "Self-Help", "Science", "Poetry",
+]
+_TITLE_WORDS = [
+    "Silent", "Hidden", "Last", "Golden", "Broken", "Distant", "Secret", "Winter",
+    "River", "Garden", "Kingdom", "Shadow", "Library", "Ocean", "Letters", "Journey",
+]
+_NAMES = ["Ava", "Noah", "Maya", "Liam", "Zara", "Omar", "Iris", "Hugo", "Lena", "Ravi"]
+_SURNAMES = ["Hart", "Okafor", "Silva", "Nakamura", "Reyes", "Novak", "Shah", "Brennan"]
+
+
+def generate_catalog(size: int, seed: int = 1) -> list[dict]:
+    """Return ``size`` deterministic books in the shape ``/books`` serves."""
+    rng = random.Random(seed)
+    epoch = date(1950, 1, 1)
+    books = []
+    for index in range(1, size + 1):
+        title = " ".join(rng.sample(_TITLE_WORDS, 2)) + f" {index}"
+        genre = rng.choice(GENRES)
+        books.append({
+            # BookDetail.jsx compares against the route param, so ids are strings
+            "id": str(index),
+            "title": title,
+            "author": f"{rng.choice(_NAMES)} {rng.choice(_SURNAMES)}",
+            "genre": genre,
+            "price": round(rng.uniform(5, 60), 2),
+            "rating": round(rng.uniform(1, 5), 1),
+            "image": "https://via.placeholder.com/150",
+            "description": f"A {genre.lower()} title from the seeded test catalog.",
+            "publicationDate": (epoch + timedelta(days=rng.randrange(27000))).isoformat(),
+            "inStock": rng.random() > 0.1,
+        })
+    return books
+
+
+def _b64(data: bytes, urlsafe: bool = False) -> str:
+    encode = base64.urlsafe_b64encode if urlsafe else base64.b64encode
+    return encode(data).decode("ascii").rstrip("=")
+
+
+class HttpError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class EndpointStats:
+    __slots__ = ("errors", "latencies")
+
+    def __init__(self):
+        self.errors = 0
+        self.latencies = array("d")
+
+    def as_dict(self) -> dict:
+        summary = summarize(latency * 1000 for latency in self.latencies)
+        return {"errors": self.errors, **{
+            key if key == "count" else f"{key}_ms": value for key, value in summary.items()
+        }}
+
+
+class MockBackend:
+    """The mock API server. Use as ``async with MockBackend(...) as backend``."""
+
+    def __init__(
+        self,
+        catalog: list[dict] | None = None,
+        users: list[dict] | None = None,
+        api_url: str = API_URL,
+        host: str | None = None,
+        port: int | None = None,
+        token_ttl: int = 3600,
+        secret: bytes = b"bookhaven-mock",
+    ):
+        parts = urlsplit(api_url)
+        self.host = host or parts.hostname or "127.0.0.1"
+        self.port = port if port is not None else parts.port or 80
+        self.prefix = parts.path.rstrip("/")
+        self.token_ttl = token_ttl
+        self.secret = secret
+        self.users = {}
+        for user in users if users is not None else DEFAULT_USERS:
+            self._add_user(user["username"], user["email"], user["password"])
+        self.seed(catalog if catalog is not None else generate_catalog(24))
+        self.carts: dict[str, dict[str, dict]] = {}
+        self.endpoints: dict[str, EndpointStats] = {}
+        self._server = None
+        self._connections: set[asyncio.StreamWriter] = set()
+        self._routes = [
+            ("POST", r"/auth/login", "/auth/login", self._login, False),
+            ("POST", r"/auth/register", "/auth/register", self._register, False),
+            ("GET", r"/auth/me", "/auth/me", self._me, True),
+            ("POST", r"/auth/logout", "/auth/logout", self._logout, True),
+            ("GET", r"/books", "/books", self._list_books, False),
+            ("POST", r"/books", "/books", self._create_book, True),
+            ("GET", r"/books/([^/]+)", "/books/:id", self._get_book, False),
+            ("PUT", r"/books/([^/]+)", "/books/:id", self._update_book, True),
+            ("DELETE", r"/books/([^/]+)", "/books/:id", self._delete_book, True),
+            ("GET", r"/cart", "/cart", self._get_cart, True),
+            ("POST", r"/cart/add", "/cart/add", self._add_to_cart, True),
+            ("POST", r"/cart/checkout", "/cart/checkout", self._checkout, True),
+            ("PUT", r"/cart/update/([^/]+)", "/cart/update/:id", self._update_cart, True),
+            ("DELETE", r"/cart/([^/]+)", "/cart/:id", self._remove_from_cart, True),
+        ]
+        self._routes = [
+            (method, re.compile(pattern + r"/?$"), template, handler, auth)
+            for method, pattern, template, handler, auth in self._routes
+        ]
+
+    # Lifecycle
+
+    async def start(self) -> None:
+        self._server = await asyncio.start_server(self._serve, self.host, self.port, backlog=1024)
+
+    async def stop(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            # Idle keep-alive connections would otherwise outlive the server
+            for writer in list(self._connections):
+                writer.close()
+            await self._server.wait_closed()
+            await asyncio.sleep(0)
+            self._server = None
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.stop()
+        return False
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}{self.prefix}"
+
+    # State
+
+    def seed(self, catalog: list[dict]) -> None:
+        """Replace the catalog; cart contents are left alone."""
+        self.books = {str(book["id"]): dict(book, id=str(book["id"])) for book in catalog}
+        numeric = [int(book_id) for book_id in self.books if book_id.isdigit()]
+        self._next_book_id = max(numeric, default=0) + 1
+
+    def stats(self) -> dict:
+        return {route: stats.as_dict() for route, stats in sorted(self.endpoints.items())}
+
+    def issue_token(self, user: dict) -> str:
+        header = _b64(json.dumps({"alg": "HS256", "typ": "JWT"}).encode())
+        payload = _b64(json.dumps({
+            "sub": user["id"],
+            "email": user["email"],
+            "iat": int(time.time()),
+            "exp": int(time.time()) + self.token_ttl,
+        }).encode())
+        signature = hmac.new(self.secret, f"{header}.{payload}".encode(), hashlib.sha256).digest()
+        return f"{header}.{payload}.{_b64(signature, urlsafe=True)}"
+
+    def _user_for_token(self, token: str) -> dict:
+        try:
+            header, payload, signature = token.split(".")
+            expected = hmac.new(self.secret, f"{header}.{payload}".encode(), hashlib.sha256).digest()
+            if not hmac.compare_digest(_b64(expected, urlsafe=True), signature):
+                raise ValueError("bad signature")
+            claims = json.loads(base64.b64decode(payload + "=" * (-len(payload) % 4)))
+            expiry, subject = float(claims["exp"]), claims["sub"]
+        except (ValueError, KeyError, TypeError):
+            raise HttpError(401, "Invalid token") from None
+        if expiry <= time.time():
+            raise HttpError(401, "Token expired")
+        for user in self.users.values():
+            if user["id"] == subject:
+                return user
+        raise HttpError(401, "Invalid token")
+
+    def _add_user(self, username: str, email: str, password: str) -> dict:
+        user = {
+            "id": str(uuid.uuid5(uuid.NAMESPACE_URL, f"bookhaven:{email}")),
+            "username": username,
+            "email": email,
+            "password": password,
+            "createdAt": datetime.now(timezone.utc).isoformat(),
+        }
+        self.users[email.lower()] = user
+        return user
+
+    @staticmethod
+    def _public(user: dict) -> dict:
+        return {key: user[key] for key in ("id", "username", "email", "createdAt")}
+
+    @staticmethod
+    def _quantity(value) -> int:
+        try:
+            return int(value)
+        except (ValueError, TypeError):
+            raise HttpError(400, f"Bad request: invalid quantity {value!r}") from None
+
+    # Handlers: (user, body, *path params) -> (status, payload)
+
+    def _login(self, user, body):
+        account = self.users.get(str(body.get("email", "")).lower())
+        if account is None or account["password"] != body.get("password"):
+            raise HttpError(401, "invalid credentials")
+        return 200, {**self._public(account), "token": self.issue_token(account)}
+
+    def _register(self, user, body):
+        email = str(body.get("email", ""))
+        if "@" not in email or not body.get("password") or not body.get("username"):
+            raise HttpError(400, "username, a valid email and password are required")
+        if email.lower() in self.users:
+            raise HttpError(409, "Email is already registered")
+        account = self._add_user(body["username"], email, body["password"])
+        return 201, {**self._public(account), "token": self.issue_token(account)}
+
+    def _me(self, user, body):
+        return 200, self._public(user)
+
+    def _logout(self, user, body):
+        return 200, {"message": "Logged out"}
+
+    def _list_books(self, user, body):
+        return 200, list(self.books.values())
+
+    def _get_book(self, user, body, book_id):
+        if book_id not in self.books:
+            raise HttpError(404, "Book not found")
+        return 200, self.books[book_id]
+
+    def _create_book(self, user, body):
+        if not body.get("title") or not body.get("author"):
+            raise HttpError(400, "title and author are required")
+        book = {**body, "id": str(self._next_book_id), "sellerId": user["id"]}
+        self._next_book_id += 1
+        self.books[book["id"]] = book
+        return 201, book
+
+    def _update_book(self, user, body, book_id):
+        if book_id not in self.books:
+            raise HttpError(404, "Book not found")
+        self.books[book_id] = {**self.books[book_id], **body, "id": book_id}
+        return 200, self.books[book_id]
+
+    def _delete_book(self, user, body, book_id):
+        if self.books.pop(book_id, None) is None:
+            raise HttpError(404, "Book not found")
+        return 200, {"message": "Book deleted"}
+
+    def _get_cart(self, user, body):
+        return 200, list(self.carts.get(user["id"], {}).values())
+
+    def _add_to_cart(self, user, body):
+        book_id = str(body.get("bookId", ""))
+        book = self.books.get(book_id)
+        if book is None:
+            raise HttpError(404, "Book not found")
+        cart = self.carts.setdefault(user["id"], {})
+        quantity = self._quantity(body.get("quantity") or 1)
+        if book_id in cart:
+            cart[book_id]["quantity"] += quantity
+        else:
+            cart[book_id] = {**book, "quantity": quantity}
+        return 200, cart[book_id]
+
+    def _update_cart(self, user, body, book_id):
+        cart = self.carts.setdefault(user["id"], {})
+        if book_id not in cart:
+            raise HttpError(404, "Item not in cart")
+        cart[book_id]["quantity"] = self._quantity(body.get("quantity", cart[book_id]["quantity"]))
+        return 200, cart[book_id]
+
+    def _remove_from_cart(self, user, body, book_id):
+        if self.carts.get(user["id"], {}).pop(book_id, None) is None:
+            raise HttpError(404, "Item not in cart")
+        return 200, {"message": "Item removed"}
+
+    def _checkout(self, user, body):
+        items = list(self.carts.pop(user["id"], {}).values())
+        if not items:
+            raise HttpError(400, "Cart is empty")
+        total = round(sum(item["price"] * item["quantity"] for item in items), 2)
+        return 200, {"orderId": str(uuid.uuid4()), "items": items, "total": total}
+
+    # HTTP
+
+    def _dispatch(self, method: str, target: str, headers: dict, body: bytes):
+        path = urlsplit(target).path
+        if path == "/__mock__/stats":
+            return 200, self.stats(), None
+        if not path.startswith(self.prefix):
+            return 404, {"message": "Not found"}, None
+        path = path[len(self.prefix):] or "/"
+        allowed = False
+        for route_method, pattern, template, handler, needs_auth in self._routes:
+            match = pattern.match(path)
+            if match is None:
+                continue
+            allowed = True
+            if route_method != method:
+                continue
+            route = f"{method} {template}"
+            try:
+                user = None
+                if needs_auth:
+                    scheme, _, token = headers.get("authorization", "").partition(" ")
+                    if scheme.lower() != "bearer" or not token:
+                        raise HttpError(401, "Authentication required")
+                    user = self._user_for_token(token)
+                try:
+                    payload = json.loads(body) if body else {}
+                except ValueError as error:
+                    raise HttpError(400, f"Bad request: {error}") from None
+                if not isinstance(payload, dict):
+                    raise HttpError(400, "Bad request: expected a JSON object")
+                status, result = handler(user, payload, *match.groups())
+            except HttpError as error:
+                status, result = error.status, {"message": str(error)}
+            except Exception as error:
+                # A handler bug, or data it cannot handle (a --mock-catalog
+                # book without a price): answer instead of dropping the connection
+                status, result = 500, {"message": f"Internal error: {type(error).__name__}: {error}"}
+            return status, result, route
+        if allowed:
+            return 405, {"message": "Method not allowed"}, None
+        return 404, {"message": "Not found"}, None
+
+    @staticmethod
+    def _response(status: int, payload, keep_alive: bool) -> bytes:
+        body = b"" if payload is None else json.dumps(payload).encode()
+        lines = [
+            f"HTTP/1.1 {status} {HTTPStatus(status).phrase}",
+            "Content-Type: application/json",
+            f"Content-Length: {len(body)}",
+            "Access-Control-Allow-Origin: *",
+            "Access-Control-Allow-Headers: Authorization, Content-Type",
+            "Access-Control-Allow-Methods: GET, POST, PUT, DELETE, OPTIONS",
+            "Access-Control-Max-Age: 600",
+            f"Connection: {'keep-alive' if keep_alive else 'close'}",
+        ]
+        return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + body
+
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self._connections.add(writer)
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                    break
+                started = time.perf_counter()
+                request_line, *header_lines = head.decode("latin-1").rstrip("\r\n").split("\r\n")
+                headers = {}
+                for line in header_lines:
+                    name, _, value = line.partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                try:
+                    method, target, version = request_line.split(" ", 2)
+                    length = int(headers.get("content-length") or 0)
+                    if length < 0:
+                        raise ValueError(length)
+                except ValueError:
+                    writer.write(self._response(400, {"message": "Malformed request"}, False))
+                    break
+                body = await reader.readexactly(length) if length else b""
+                keep_alive = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+
+                if method == "OPTIONS":
+                    status, payload, route = 204, None, None
+                else:
+                    status, payload, route = self._dispatch(method, target, headers, body)
+                writer.write(self._response(status, payload, keep_alive))
+                await writer.drain()
+
+                if route is not None:
+                    stats = self.endpoints.get(route)
+                    if stats is None:
+                        stats = self.endpoints[route] = EndpointStats()
+                    stats.latencies.append(time.perf_counter() - started)
+                    stats.errors += status >= 400
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self._connections.discard(writer)
+            writer.close()
+
+
+def format_stats(stats: dict) -> str:
+    lines = [f"  {'endpoint':<26} {'count':>7} {'errors':>6} {'p50 ms':>8} {'p95 ms':>8} {'max ms':>8}"]
+    for route, entry in stats.items():
+        lines.append(
+            f"  {route:<26} {entry['count']:>7} {entry['errors']:>6} "
+            f"{entry['p50_ms']:>8.3f} {entry['p95_ms']:>8.3f} {entry['max_ms']:>8.3f}"
+        )
+    return "\n".join(lines)
+
+
+def load_catalog(path: Path) -> list[dict]:
+    return json.loads(Path(path).read_text(encoding="utf-8"))
+
+
+async def _serve_forever(backend: MockBackend) -> None:
+    async with backend:
+        print(f"Mock BookHaven API listening on {backend.url} ({len(backend.books)} books)")
+        try:
+            await asyncio.Event().wait()
+        finally:
+            print(format_stats(backend.stats()))
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m harness.mock_backend",
+                                     description="Serve the mock BookHaven API until interrupted.")
+    parser.add_argument("--books", type=int, default=24, help="size of the generated catalog")
+    parser.add_argument("--catalog", type=Path, help="JSON list of books to serve instead")
+    parser.add_argument("--port", type=int, default=None, help="listen port (default: from VITE_API_URL)")
+    options = parser.parse_args(argv)
+    catalog = load_catalog(options.catalog) if options.catalog else generate_catalog(options.books)
+    try:
+        asyncio.run(_serve_forever(MockBackend(catalog=catalog, port=options.port)))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""Extension points the runner calls around every test."""
+
+from __future__ import annotations
+
+from pathlib import Path
+
+JS_DIR = Path(__file__).resolve().parent / "js"
+
+
+def read_js(name: str) -> str:
+    """Return the source of an init script shipped in ``harness/js``."""
+    return (JS_DIR / name).read_text(encoding="utf-8")
+
+
+class Plugin:
+    """Base class for runner extensions. Every hook is optional.
+
+    ``start``/``stop`` bracket the whole run and receive the shared browser.
+    ``context_options`` contributes ``browser.new_context()`` keyword
+    arguments for a script, ``on_context`` sees each context right after it
+    is created, and ``after_test`` runs once the script has returned, with
+    the test's ``TestRun`` and its ``TestResult``. ``after_step`` runs when
+    one of the script's ``# ->`` steps ends and may add to the step's dict,
+    which ends up in the result's ``steps`` metrics.
+
+    ``script_globals`` returns names to set in the script's module on top
+    of ``async_api`` and ``__harness__``, and ``wrap_context`` may replace
+    the context handle the script gets back from ``new_context`` (the
+    plugins' own hooks keep seeing the real context).
+    """
+
+    async def start(self, browser) -> None:
+        pass
+
+    async def stop(self) -> None:
+        pass
+
+    async def context_options(self, script) -> dict:
+        return {}
+
+    async def on_context(self, run, context) -> None:
+        pass
+
+    def script_globals(self, run) -> dict:
+        return {}
+
+    def wrap_context(self, run, handle):
+        return handle
+
+    async def after_step(self, run, step: dict) -> None:
+        pass
+
+    async def after_test(self, run, result) -> None:
+        pass
@@ -0,0 +1,111 @@
+"""React commits and re-renders per test step.
+
+``BookProvider`` and ``AuthProvider`` pass large context values to the
+whole tree, so one cart update can re-render every ``BookCard``. An init
+script (``js/react_profiler.js``) installs a stand-in for the React
+DevTools global hook, which React DOM calls after every commit, and counts
+commits, rendered components and commit time in the page.
+
+When a step of the script ends, the counts of every open page are taken
+and stored under the step's ``react`` key::
+
+    {"commits": 3, "renders": 212, "commit_ms": 41.2, "max_commit_ms": 30.5,
+     "components": {"BookCard": 96, "LazyBookCard": 96, ...}}
+
+Counts of a page that unloads mid-step are reported on ``pagehide`` and
+added to the step. The test's totals are in its ``react`` metrics. Commit
+times need a development or profiling build of React; against a
+production build they are left out.
+"""
+
+from __future__ import annotations
+
+from collections import Counter
+
+from playwright.async_api import Error as PlaywrightError
+
+from .plugins import Plugin, read_js
+
+TAKE_JS = "() => window.__bhReact ? window.__bhReact.take() : null"
+# Components listed per step, most renders first
+TOP_COMPONENTS = 15
+
+
+def merge(total: dict, counts: dict) -> None:
+    """Add ``react_profiler.js`` counts into ``total``."""
+    for key in ("commits", "renders", "timed", "commitMs"):
+        total[key] += counts[key]
+    total["maxCommitMs"] = max(total["maxCommitMs"], counts["maxCommitMs"])
+    total["components"].update(counts["components"])
+
+
+def _empty() -> dict:
+    return {"commits": 0, "renders": 0, "timed": 0, "commitMs": 0.0, "maxCommitMs": 0.0,
+            "components": Counter()}
+
+
+def _entry(total: dict, top: int | None = TOP_COMPONENTS) -> dict:
+    entry = {"commits": total["commits"], "renders": total["renders"]}
+    if total["timed"]:
+        entry["commit_ms"] = round(total["commitMs"], 1)
+        entry["max_commit_ms"] = round(total["maxCommitMs"], 1)
+    entry["components"] = dict(total["components"].most_common(top))
+    return entry
+
+
+class ReactProfiler(Plugin):
+    def __init__(self):
+        # Counts of the running step, and of the whole test
+        self._step: dict[object, dict] = {}
+        self._test: dict[object, dict] = {}
+
+    async def on_context(self, run, context) -> None:
+        self._step.setdefault(run, _empty())
+        self._test.setdefault(run, _empty())
+
+        def on_report(source, counts):
+            # Pages also unload when the test's contexts are closed
+            if run in self._step:
+                merge(self._step[run], counts)
+
+        await context.expose_binding("__bhReactReport", on_report)
+        await context.add_init_script(read_js("react_profiler.js"))
+
+    async def after_step(self, run, step: dict) -> None:
+        counts = self._step.get(run)
+        if counts is None:
+            return
+        for page in run.pages():
+            try:
+                taken = await page.evaluate(TAKE_JS)
+            except PlaywrightError:
+                continue
+            if taken:
+                merge(counts, taken)
+        if counts["commits"]:
+            step["react"] = _entry(counts)
+            merge(self._test[run], counts)
+        self._step[run] = _empty()
+
+    async def after_test(self, run, result) -> None:
+        self._step.pop(run, None)
+        total = self._test.pop(run, None)
+        if total and total["commits"]:
+            result.metrics["react"] = _entry(total, top=None)
+
+
+def format_steps(results, limit: int = 10) -> str:
+    """The steps with the most component renders across ``results``."""
+    steps = [
+        (step["react"]["renders"], result.test_id, step)
+        for result in results
+        for step in result.metrics.get("steps", [])
+        if "react" in step
+    ]
+    lines = []
+    for renders, test_id, step in sorted(steps, key=lambda item: -item[0])[:limit]:
+        react = step["react"]
+        top = ", ".join(f"{name} {count}" for name, count in list(react["components"].items())[:3])
+        lines.append(f"    {test_id} {renders:>6} renders {react['commits']:>4} commits  "
+                     f"{step['label'][:60]}  ({top})")
+    return "\n".join(lines)
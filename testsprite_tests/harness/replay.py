@@ -0,0 +1,496 @@
+"""Browserless, open-loop replay of the frontend's API traffic.
+
+Sessions are request sequences the SPA issues against ``VITE_API_URL``.
+By default they come from the suite's own traffic: every HAR recorded by
+``python -m harness --har record`` (or those of the tests named with
+``--from-har``) contributes its API requests, in recorded order, as one
+session. ``--builtin-session`` replays a hand-written one instead, built
+from ``AuthContext.jsx`` and ``BookContext.jsx``: ``GET /auth/me`` on boot,
+``GET /books``, ``GET /cart``, then the cart mutations and a seller
+create/update/delete.
+
+Sessions arrive open-loop at ``--rate`` per second (Poisson by default),
+whether or not earlier ones have finished; arrivals beyond
+``--max-sessions`` in flight are dropped and counted. Requests go over a
+pool of keep-alive HTTP/1.1 connections driven directly by asyncio. Each
+request records two latencies into log-linear histograms: the service
+time from the moment it was written, and the response time from the
+moment it should have started, which includes any wait for a connection
+and so does not hide queueing (coordinated omission). A connect or a
+response taking longer than ``--timeout`` seconds counts as an error::
+
+    python -m harness.replay --rate 50 --target http://staging:8080/api
+    python -m harness.replay --builtin-session --rate 500 --duration 30 --mock-backend
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import random
+import re
+import ssl
+import sys
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+from pathlib import Path
+from urllib.parse import urlsplit
+
+from .app import API_URL
+from .har import HAR_DIR, recordings
+from .loader import SUITE_DIR
+from .mock_backend import MockBackend, format_stats, generate_catalog
+from .stats import Histogram
+
+DEFAULT_REPORT = SUITE_DIR / "tmp" / "replay_report.json"
+ID_SEGMENT = re.compile(r"^(\d+|[0-9a-f]{24}|[0-9a-f-]{36})$", re.IGNORECASE)
+PLACEHOLDER = re.compile(r"\{(\w+)\}")
+
+
+class ReplayError(RuntimeError):
+    pass
+
+
+class BadResponse(ValueError):
+    """The server answered with something that is not an HTTP/1.1 response."""
+
+
+@dataclass(frozen=True)
+class Step:
+    """One request. ``{name}`` in ``path``/``body`` is filled from the session's variables."""
+
+    method: str
+    path: str
+    body: str | None = None
+    auth: bool = False
+    # Store the response's ``id`` under this variable name
+    capture: str | None = None
+
+
+SELLER_BOOK = json.dumps({
+    "title": "Replay Load Book", "author": "Load Test", "genre": "Fiction", "price": 9.99,
+    "description": "Created by the replay load tool.", "publicationDate": "2024-01-01",
+    "rating": 0, "inStock": True, "image": "https://via.placeholder.com/150",
+})
+
+BUILTIN_SESSION = (
+    Step("GET", "/auth/me", auth=True),
+    Step("GET", "/books"),
+    Step("GET", "/cart", auth=True),
+    Step("POST", "/cart/add", '{"bookId": "{book_id}", "quantity": 1, "title": "{book_title}", '
+                              '"price": {book_price}}', auth=True),
+    Step("PUT", "/cart/update/{book_id}", '{"quantity": 2}', auth=True),
+    Step("DELETE", "/cart/{book_id}", auth=True),
+    Step("POST", "/books", SELLER_BOOK, auth=True, capture="created_id"),
+    Step("PUT", "/books/{created_id}", SELLER_BOOK.replace("Replay Load Book", "Replay Load Book 2"), auth=True),
+    Step("DELETE", "/books/{created_id}", auth=True),
+)
+
+
+def endpoint(method: str, path: str) -> str:
+    """``METHOD /path`` with id-like segments replaced by ``:id``."""
+    segments = [":id" if ID_SEGMENT.match(segment) else segment for segment in path.split("?")[0].split("/")]
+    return f"{method} {'/'.join(segments)}"
+
+
+def session_from_har(path: Path, api_url: str = API_URL) -> tuple[Step, ...]:
+    """The API requests of a recorded HAR, in the order they started."""
+    base = api_url.rstrip("/")
+    entries = json.loads(Path(path).read_text(encoding="utf-8"))["log"]["entries"]
+    steps = []
+    for entry in sorted(entries, key=lambda entry: entry["startedDateTime"]):
+        request = entry["request"]
+        if request["method"] == "OPTIONS" or not request["url"].startswith(base + "/"):
+            continue
+        headers = {header["name"].lower() for header in request.get("headers", [])}
+        body = (request.get("postData") or {}).get("text")
+        steps.append(Step(request["method"], request["url"][len(base):], body or None,
+                          auth="authorization" in headers))
+    return tuple(steps)
+
+
+def _fill(template: str, variables: dict) -> str:
+    return PLACEHOLDER.sub(lambda match: str(variables.get(match.group(1), match.group(0))), template)
+
+
+class Connection:
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader = reader
+        self.writer = writer
+        # Whether any of the last request's response has arrived
+        self.answered = False
+
+    async def exchange(self, raw: bytes) -> tuple[int, bytes, bool]:
+        """Send one request and read the response: (status, body, keep-alive)."""
+        self.answered = False
+        self.writer.write(raw)
+        await self.writer.drain()
+        status_line = await self.reader.readline()
+        if not status_line:
+            raise ConnectionResetError("server closed the connection")
+        self.answered = True
+        try:
+            status = int(status_line.split()[1])
+        except (IndexError, ValueError):
+            raise BadResponse(f"bad status line {status_line[:60]!r}") from None
+        headers = {}
+        while True:
+            line = await self.reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        keep_alive = headers.get("connection", "").lower() != "close"
+        try:
+            if headers.get("transfer-encoding", "").lower() == "chunked":
+                body = await self._chunked()
+            elif "content-length" in headers:
+                body = await self.reader.readexactly(int(headers["content-length"]))
+            else:
+                body, keep_alive = await self.reader.read(), False
+        except ValueError as exc:
+            raise BadResponse(f"bad response framing: {exc}") from None
+        return status, body, keep_alive
+
+    async def _chunked(self) -> bytes:
+        parts = []
+        while True:
+            size = int((await self.reader.readline()).split(b";")[0], 16)
+            if size == 0:
+                await self.reader.readline()
+                return b"".join(parts)
+            parts.append(await self.reader.readexactly(size))
+            await self.reader.readline()
+
+    def close(self) -> None:
+        self.writer.close()
+
+
+class HttpPool:
+    """Up to ``size`` keep-alive connections to one origin."""
+
+    def __init__(self, base_url: str, size: int = 64, timeout: float = 10.0):
+        parts = urlsplit(base_url)
+        self.host = parts.hostname
+        self.port = parts.port or (443 if parts.scheme == "https" else 80)
+        self.ssl = ssl.create_default_context() if parts.scheme == "https" else None
+        self.base_path = parts.path.rstrip("/")
+        self.timeout = timeout
+        self.opened = 0
+        self._slots = asyncio.Semaphore(size)
+        self._idle: list[Connection] = []
+
+    async def _connect(self) -> Connection:
+        try:
+            reader, writer = await asyncio.wait_for(
+                asyncio.open_connection(self.host, self.port, ssl=self.ssl), self.timeout)
+        except TimeoutError:
+            raise TimeoutError(f"no connection within {self.timeout:g}s") from None
+        self.opened += 1
+        return Connection(reader, writer)
+
+    def _raw(self, method: str, path: str, body: bytes | None, token: str | None) -> bytes:
+        lines = [
+            f"{method} {self.base_path}{path} HTTP/1.1",
+            f"Host: {self.host}:{self.port}",
+            "Connection: keep-alive",
+            "Accept: application/json",
+        ]
+        if token:
+            lines.append(f"Authorization: Bearer {token}")
+        if body is not None:
+            lines += ["Content-Type: application/json", f"Content-Length: {len(body)}"]
+        return ("\r\n".join(lines) + "\r\n\r\n").encode() + (body or b"")
+
+    async def request(self, method: str, path: str, body: bytes | None = None, token: str | None = None,
+                      on_send=None) -> tuple[int, bytes]:
+        raw = self._raw(method, path, body, token)
+        async with self._slots:
+            while True:
+                reused = bool(self._idle)
+                connection = self._idle.pop() if reused else await self._connect()
+                if on_send is not None:
+                    on_send()
+                try:
+                    status, data, keep_alive = await asyncio.wait_for(connection.exchange(raw), self.timeout)
+                except TimeoutError:
+                    connection.close()
+                    raise TimeoutError(f"no response within {self.timeout:g}s") from None
+                except (ConnectionError, asyncio.IncompleteReadError):
+                    connection.close()
+                    # An idle connection may have been closed by the server.
+                    # Retrying is only safe if it answered nothing: otherwise
+                    # the request (maybe a POST) was handled already
+                    if reused and not connection.answered:
+                        continue
+                    raise
+                except BadResponse:
+                    connection.close()
+                    raise
+                if keep_alive:
+                    self._idle.append(connection)
+                else:
+                    connection.close()
+                return status, data
+
+    async def close(self) -> None:
+        for connection in self._idle:
+            connection.close()
+        self._idle.clear()
+
+
+class Replayer:
+    def __init__(
+        self,
+        sessions: list[tuple[Step, ...]],
+        target: str = API_URL,
+        rate: float = 50.0,
+        duration: float = 30.0,
+        connections: int = 64,
+        timeout: float = 10.0,
+        max_sessions: int = 1000,
+        arrivals: str = "poisson",
+        email: str = "testuser@example.com",
+        password: str = "TestPassword123",
+        accounts: int = 1,
+        seed: int = 1,
+    ):
+        self.sessions = sessions
+        self.pool = HttpPool(target, connections, timeout)
+        self.rate = rate
+        self.duration = duration
+        self.max_sessions = max_sessions
+        self.arrivals = arrivals
+        self.email = email
+        self.password = password
+        self.accounts = max(1, accounts)
+        self.rng = random.Random(seed)
+        self.response = defaultdict(Histogram)
+        self.service = defaultdict(Histogram)
+        self.errors = defaultdict(int)
+        self.started = self.completed = self.dropped = 0
+        self.tokens: list[str] = []
+        self.books: list[dict] = []
+
+    async def _prepare(self) -> None:
+        credentials = json.dumps({"email": self.email, "password": self.password}).encode()
+        status, body = await self.pool.request("POST", "/auth/login", credentials)
+        if status != 200:
+            raise ReplayError(f"login as {self.email} failed: HTTP {status}")
+        self.tokens.append(json.loads(body)["token"])
+        # Sessions sharing an account also share its cart, so spread them out
+        run_id = f"{int(time.time()):x}"
+        for number in range(1, self.accounts):
+            account = {"username": f"replay{run_id}{number}", "email": f"replay-{run_id}-{number}@example.com",
+                       "password": self.password}
+            status, body = await self.pool.request("POST", "/auth/register", json.dumps(account).encode())
+            if status not in (200, 201):
+                raise ReplayError(f"registering {account['email']} failed: HTTP {status}")
+            self.tokens.append(json.loads(body)["token"])
+        status, body = await self.pool.request("GET", "/books")
+        if status != 200:
+            raise ReplayError(f"GET /books failed: HTTP {status}")
+        self.books = [book for book in json.loads(body) if book.get("inStock", True)]
+        needs_book = any("{book_" in step.path + (step.body or "") for steps in self.sessions for step in steps)
+        if needs_book and not self.books:
+            raise ReplayError("the catalog has no books in stock to put in carts")
+
+    def _variables(self) -> dict:
+        if not self.books:
+            return {}
+        book = self.rng.choice(self.books)
+        return {"book_id": book["id"], "book_title": book.get("title", ""), "book_price": book.get("price", 0)}
+
+    async def _session(self, steps: tuple[Step, ...], due: float, token: str) -> None:
+        variables = self._variables()
+        try:
+            for step in steps:
+                path = _fill(step.path, variables)
+                name = endpoint(step.method, path)
+                if PLACEHOLDER.search(path):
+                    # The value it needs was never captured
+                    self.errors[f"{name} skipped"] += 1
+                    continue
+                body = _fill(step.body, variables).encode() if step.body is not None else None
+                sent = []
+                try:
+                    status, data = await self.pool.request(
+                        step.method, path, body, token if step.auth else None,
+                        on_send=lambda: sent.append(time.perf_counter()),
+                    )
+                except (OSError, asyncio.IncompleteReadError, BadResponse) as exc:
+                    self.errors[f"{name} {type(exc).__name__}"] += 1
+                    due = time.perf_counter()
+                    continue
+                done = time.perf_counter()
+                self.response[name].record((done - due) * 1e6)
+                self.service[name].record((done - sent[-1]) * 1e6)
+                if status >= 400:
+                    self.errors[f"{name} HTTP {status}"] += 1
+                elif step.capture:
+                    try:
+                        variables[step.capture] = json.loads(data)["id"]
+                    except (ValueError, KeyError, TypeError):
+                        pass
+                # The next request is due as soon as this one is answered
+                due = done
+        finally:
+            self.completed += 1
+
+    async def run(self) -> dict:
+        await self._prepare()
+        tasks: set[asyncio.Task] = set()
+        started = time.perf_counter()
+        due = started
+        while due - started < self.duration:
+            delay = due - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            if len(tasks) >= self.max_sessions:
+                self.dropped += 1
+            else:
+                token = self.tokens[self.started % len(self.tokens)]
+                task = asyncio.create_task(self._session(self.rng.choice(self.sessions), due, token))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+                self.started += 1
+            gap = self.rng.expovariate(self.rate) if self.arrivals == "poisson" else 1 / self.rate
+            due += gap
+        if tasks:
+            await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - started
+        await self.pool.close()
+        return self.report(elapsed)
+
+    def report(self, elapsed: float) -> dict:
+        overall_response = Histogram()
+        overall_service = Histogram()
+        for histogram in self.response.values():
+            overall_response.merge(histogram)
+        for histogram in self.service.values():
+            overall_service.merge(histogram)
+        requests = overall_response.count
+        return {
+            "rate": self.rate,
+            "arrivals": self.arrivals,
+            "elapsed_s": elapsed,
+            "sessions": {"started": self.started, "completed": self.completed, "dropped": self.dropped},
+            "requests": requests,
+            "requests_per_second": requests / elapsed if elapsed else 0.0,
+            "connections_opened": self.pool.opened,
+            "errors": dict(sorted(self.errors.items(), key=lambda item: -item[1])),
+            "response_ms": overall_response.summary(1000),
+            "service_ms": overall_service.summary(1000),
+            "endpoints": {
+                name: {"response_ms": self.response[name].summary(1000),
+                       "service_ms": self.service[name].summary(1000)}
+                for name in sorted(self.response)
+            },
+        }
+
+
+def format_report(report: dict) -> str:
+    sessions = report["sessions"]
+    lines = [
+        f"  {report['requests']} requests in {report['elapsed_s']:.1f}s "
+        f"({report['requests_per_second']:.0f}/s) over {report['connections_opened']} connections; "
+        f"sessions {sessions['completed']}/{sessions['started']} done, {sessions['dropped']} dropped",
+        f"  {'endpoint':<26} {'count':>7} {'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8} {'p99.9 ms':>9} "
+        f"{'max ms':>8}  (response time; service p99)",
+    ]
+    for name, entry in report["endpoints"].items():
+        response, service = entry["response_ms"], entry["service_ms"]
+        lines.append(
+            f"  {name:<26} {response['count']:>7} {response['p50']:>8.2f} {response['p90']:>8.2f} "
+            f"{response['p99']:>8.2f} {response['p99.9']:>9.2f} {response['max']:>8.2f}  ({service['p99']:.2f})"
+        )
+    for error, count in list(report["errors"].items())[:10]:
+        lines.append(f"  {count:>7} x {error}")
+    return "\n".join(lines)
+
+
+def load_sessions(har_ids: list[str] | None = None, directory: Path = HAR_DIR, api_url: str = API_URL,
+                  builtin: bool = False) -> list:
+    """One session per recorded HAR (all of them unless ``har_ids``), or the built-in one."""
+    if builtin:
+        return [BUILTIN_SESSION]
+    if har_ids:
+        paths = [path for test_id in har_ids for path in recordings(test_id, directory)]
+    else:
+        paths = sorted(directory.glob("*.har"))
+    sessions = [session for session in (session_from_har(path, api_url) for path in paths) if session]
+    if not sessions:
+        raise ReplayError(f"no API requests in the HAR files under {directory}; record some with "
+                          "python -m harness --har record, or use --builtin-session")
+    return sessions
+
+
+async def _main(options: argparse.Namespace) -> dict:
+    backend = MockBackend(catalog=generate_catalog(options.mock_books)) if options.mock_backend else None
+    if backend is not None:
+        await backend.start()
+    try:
+        replayer = Replayer(
+            load_sessions(options.from_har, api_url=options.recorded_api, builtin=options.builtin_session),
+            target=options.target, rate=options.rate, duration=options.duration,
+            connections=options.connections, timeout=options.timeout, max_sessions=options.max_sessions,
+            arrivals=options.arrivals, email=options.email, password=options.password,
+            accounts=options.accounts,
+        )
+        return await replayer.run()
+    finally:
+        if backend is not None:
+            await backend.stop()
+            print(f"Mock backend on {backend.url}")
+            print(format_stats(backend.stats()))
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m harness.replay",
+                                     description="Replay the SPA's API traffic at an open-loop rate.")
+    parser.add_argument("--target", default=API_URL, help=f"API base URL (default: {API_URL})")
+    parser.add_argument("--rate", type=float, default=50.0, help="sessions started per second (default: 50)")
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds of arrivals (default: 30)")
+    parser.add_argument("--arrivals", choices=("poisson", "uniform"), default="poisson",
+                        help="spacing of session arrivals (default: poisson)")
+    parser.add_argument("--connections", type=int, default=64,
+                        help="keep-alive connection pool size (default: 64)")
+    parser.add_argument("--timeout", type=float, default=10.0, metavar="SECONDS",
+                        help="give up on a connect or a response after this long (default: 10)")
+    parser.add_argument("--max-sessions", type=int, default=1000,
+                        help="sessions in flight before new arrivals are dropped (default: 1000)")
+    parser.add_argument("--from-har", nargs="*", metavar="TC0xx",
+                        help="replay the API requests of these tests' recorded HARs (default: all of them)")
+    parser.add_argument("--builtin-session", action="store_true",
+                        help="replay the hand-written session instead of recorded traffic")
+    parser.add_argument("--recorded-api", default=API_URL,
+                        help="API base URL the HARs were recorded against (default: VITE_API_URL)")
+    parser.add_argument("--email", default="testuser@example.com", help="account the sessions use")
+    parser.add_argument("--password", default="TestPassword123")
+    parser.add_argument("--accounts", type=int, default=1,
+                        help="spread sessions over this many accounts, registering the extra ones "
+                             "(default: 1)")
+    parser.add_argument("--mock-backend", action="store_true", help="replay against the in-process mock")
+    parser.add_argument("--mock-books", type=int, default=200, metavar="N",
+                        help="size of the mock's catalog (default: 200)")
+    parser.add_argument("-o", "--output", type=Path, default=DEFAULT_REPORT,
+                        help="report file (default: tmp/replay_report.json)")
+    options = parser.parse_args(argv)
+
+    try:
+        report = asyncio.run(_main(options))
+    except (ReplayError, OSError) as exc:
+        # OSError: the login or catalog request before the run could not be made
+        print(f"Replay failed: {exc}")
+        return 2
+    print(format_report(report))
+    options.output.parent.mkdir(parents=True, exist_ok=True)
+    options.output.write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+    print(f"  report written to {options.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
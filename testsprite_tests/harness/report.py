@@ -0,0 +1,351 @@
+"""Markdown and HTML run reports, appended to as each test finishes.
+
+``testsprite-mcp-test-report.md``/``.html`` are written in one go after
+the suite, carry no timing and are lost with a crashed run. With
+``python -m harness --report`` the run gets ``tmp/reports/run-N.md`` and
+``run-N.html`` instead (N is the history run id): the header is written
+before the first test starts, a section per test is appended the moment
+the test is done, with its duration, its slowest steps and the routes it
+visited, and the run summary (slowest tests and steps, per-route medians)
+is appended at the end. Files are only ever appended to, one ``write`` per
+section, so shard workers can share them and a crash keeps every finished
+test.
+
+The run history (``harness.history``) feeds two more outputs::
+
+    python -m harness.report run 12        # rebuild run-12.md/.html from the history
+    python -m harness.report index         # tmp/reports/index.html, index-2.html...
+
+The index lists every recorded run, newest first, a page at a time. Runs
+are read from an SQLite cursor and each page is written as it fills, so
+only one row is in memory however many runs are stored.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import time
+from datetime import datetime
+from html import escape
+from pathlib import Path
+
+from .history import DEFAULT_HISTORY, History
+from .loader import SUITE_DIR
+from .plugins import Plugin
+from .runner import TestResult
+from .stats import median
+from .vitals import summarize_routes
+
+DEFAULT_DIR = SUITE_DIR / "tmp" / "reports"
+SLOWEST_STEPS = 3
+SLOWEST_OVERALL = 10
+RUNS_PER_PAGE = 50
+ROUTE_COLUMNS = (("fcp_ms", "FCP"), ("lcp_ms", "LCP"), ("cls", "CLS"),
+                 ("long_task_ms", "Long tasks"), ("suspense_ms", "Suspense"))
+STYLE = """
+body { font: 14px/1.5 system-ui, sans-serif; margin: 2rem auto; max-width: 70rem; color: #1f2937; }
+table { border-collapse: collapse; margin: .5rem 0 1rem; }
+th, td { border-bottom: 1px solid #e5e7eb; padding: .25rem .75rem; text-align: left; }
+td.n { text-align: right; font-variant-numeric: tabular-nums; }
+.PASSED { color: #047857; } .FAILED { color: #b91c1c; }
+pre { background: #f9fafb; padding: .5rem; white-space: pre-wrap; }
+nav a { margin-right: 1rem; }
+"""
+
+
+def _append(path: Path, text: str) -> None:
+    """Append ``text`` with a single write, so concurrent writers do not interleave."""
+    fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+    try:
+        os.write(fd, text.encode("utf-8"))
+    finally:
+        os.close(fd)
+
+
+def _when(epoch: float) -> str:
+    return datetime.fromtimestamp(epoch).strftime("%Y-%m-%d %H:%M:%S")
+
+
+def _ms(value: float | None) -> str:
+    return "-" if value is None else f"{value:,.0f} ms"
+
+
+def _route_cell(key: str, value: float | None) -> str:
+    if value is None:
+        return "-"
+    return f"{value:.3f}" if key == "cls" else f"{value:.0f} ms"
+
+
+def _kilobytes(values: list[float] | None) -> str:
+    return "-" if not values else f"{median(values):,.0f} KB"
+
+
+def slowest_steps(results, limit: int) -> list[tuple[str, dict]]:
+    """``(test id, step)`` of the longest steps across ``results``."""
+    steps = [
+        (result.test_id, step)
+        for result in results
+        for step in result.metrics.get("steps", [])
+        if step.get("duration_ms") is not None
+    ]
+    return sorted(steps, key=lambda item: -item[1]["duration_ms"])[:limit]
+
+
+def navigations(results) -> list[dict]:
+    return [entry for result in results for entry in result.metrics.get("vitals", {}).get("navigations", [])]
+
+
+def js_loads(results) -> dict[str, list[float]]:
+    """Decoded JS kilobytes of every document load, per route."""
+    loads = {}
+    for result in results:
+        for entry in result.metrics.get("chunks", []):
+            if entry["kind"] == "load":
+                loads.setdefault(entry["route"], []).append(entry["js_decoded_bytes"] / 1024)
+    return loads
+
+
+class Markdown:
+    suffix = ".md"
+
+    def header(self, title: str, started_at: float, tests: int) -> str:
+        return f"# {title}\n\n- **Started:** {_when(started_at)}\n- **Tests:** {tests}\n\n## Tests\n"
+
+    def test(self, result: TestResult) -> str:
+        lines = [f"\n### {result.test_id} {result.title.split('-', 1)[-1]}\n\n"
+                 f"- **Status:** {result.status}\n- **Duration:** {result.duration * 1000:,.0f} ms\n"]
+        if result.error:
+            lines.append("\n```\n" + result.error.strip()[:2000] + "\n```\n")
+        steps = slowest_steps([result], SLOWEST_STEPS)
+        if steps:
+            lines.append("\nSlowest steps:\n\n")
+            lines += [f"- {_ms(step['duration_ms'])} {step['label']}\n" for _, step in steps]
+        visited = navigations([result])
+        if visited:
+            lines.append("\n| Route | " + " | ".join(label for _, label in ROUTE_COLUMNS) + " |\n"
+                         "|---|" + "---:|" * len(ROUTE_COLUMNS) + "\n")
+            lines += [f"| {entry['route']} | " + " | ".join(_route_cell(key, entry.get(key)) for key, _ in ROUTE_COLUMNS)
+                      + " |\n" for entry in visited]
+        return "".join(lines)
+
+    def summary(self, results: list[TestResult], wall: float | None) -> str:
+        passed = sum(result.passed for result in results)
+        lines = [f"\n## Summary\n\n- **Passed:** {passed}/{len(results)}\n"]
+        if wall is not None:
+            lines.append(f"- **Wall clock:** {wall:.1f} s\n")
+        lines.append(f"- **Summed test time:** {sum(result.duration for result in results):.1f} s\n\n")
+        lines.append("### Slowest tests\n\n")
+        for result in sorted(results, key=lambda result: -result.duration)[:SLOWEST_OVERALL]:
+            lines.append(f"- {result.duration * 1000:,.0f} ms {result.test_id} {result.title.split('-', 1)[-1]}\n")
+        steps = slowest_steps(results, SLOWEST_OVERALL)
+        if steps:
+            lines.append("\n### Slowest steps\n\n")
+            lines += [f"- {_ms(step['duration_ms'])} {test_id} {step['label']}\n" for test_id, step in steps]
+        routes = summarize_routes(navigations(results))
+        loads = js_loads(results)
+        if routes or loads:
+            lines.append("\n### Per-route medians\n\n| Route | Visits | "
+                         + " | ".join(label for _, label in ROUTE_COLUMNS) + " | JS decoded |\n"
+                         "|---|---:|" + "---:|" * (len(ROUTE_COLUMNS) + 1) + "\n")
+            for route in sorted(set(routes) | set(loads)):
+                row = routes.get(route, {})
+                lines.append(f"| {route} | {row.get('navigations', 0)} | "
+                             + " | ".join(_route_cell(key, row.get(key)) for key, _ in ROUTE_COLUMNS)
+                             + f" | {_kilobytes(loads.get(route))} |\n")
+        return "".join(lines)
+
+
+class Html:
+    suffix = ".html"
+
+    def header(self, title: str, started_at: float, tests: int) -> str:
+        return (f"<!DOCTYPE html>\n<html lang=\"en\"><head><meta charset=\"utf-8\"><title>{escape(title)}</title>"
+                f"<style>{STYLE}</style></head><body>\n<h1>{escape(title)}</h1>\n"
+                f"<p>Started {_when(started_at)}, {tests} tests.</p>\n")
+
+    def test(self, result: TestResult) -> str:
+        parts = [f"<section><h3 class=\"{result.status}\">{escape(result.test_id)} "
+                 f"{escape(result.title.split('-', 1)[-1])}: {result.status}, "
+                 f"{result.duration * 1000:,.0f} ms</h3>\n"]
+        if result.error:
+            parts.append(f"<pre>{escape(result.error.strip()[:2000])}</pre>\n")
+        steps = slowest_steps([result], SLOWEST_STEPS)
+        if steps:
+            parts.append("<table><tr><th>Slowest steps</th><th></th></tr>" + "".join(
+                f"<tr><td>{escape(step['label'])}</td><td class=\"n\">{_ms(step['duration_ms'])}</td></tr>"
+                for _, step in steps) + "</table>\n")
+        visited = navigations([result])
+        if visited:
+            parts.append(_route_table(
+                (entry["route"], [_route_cell(key, entry.get(key)) for key, _ in ROUTE_COLUMNS]) for entry in visited))
+        parts.append("</section>\n")
+        return "".join(parts)
+
+    def summary(self, results: list[TestResult], wall: float | None) -> str:
+        passed = sum(result.passed for result in results)
+        parts = [f"<h2>Summary</h2>\n<p>{passed}/{len(results)} passed"
+                 + (f", wall clock {wall:.1f} s" if wall is not None else "")
+                 + f", summed test time {sum(result.duration for result in results):.1f} s.</p>\n"]
+        parts.append("<h3>Slowest tests</h3><table>" + "".join(
+            f"<tr><td>{escape(result.test_id)}</td><td class=\"{result.status}\">{result.status}</td>"
+            f"<td class=\"n\">{result.duration * 1000:,.0f} ms</td></tr>"
+            for result in sorted(results, key=lambda result: -result.duration)[:SLOWEST_OVERALL]) + "</table>\n")
+        steps = slowest_steps(results, SLOWEST_OVERALL)
+        if steps:
+            parts.append("<h3>Slowest steps</h3><table>" + "".join(
+                f"<tr><td>{escape(test_id)}</td><td>{escape(step['label'])}</td>"
+                f"<td class=\"n\">{_ms(step['duration_ms'])}</td></tr>" for test_id, step in steps) + "</table>\n")
+        routes = summarize_routes(navigations(results))
+        loads = js_loads(results)
+        if routes or loads:
+            parts.append("<h3>Per-route medians</h3>\n" + _route_table(
+                ((f"{route} ({routes.get(route, {}).get('navigations', 0)})",
+                  [_route_cell(key, routes.get(route, {}).get(key)) for key, _ in ROUTE_COLUMNS]
+                  + [_kilobytes(loads.get(route))])
+                 for route in sorted(set(routes) | set(loads))),
+                extra=("JS decoded",)))
+        parts.append("</body></html>\n")
+        return "".join(parts)
+
+
+def _route_table(rows, extra: tuple[str, ...] = ()) -> str:
+    labels = [label for _, label in ROUTE_COLUMNS] + list(extra)
+    head = "<tr><th>Route</th>" + "".join(f"<th>{label}</th>" for label in labels) + "</tr>"
+    body = "".join(f"<tr><td>{escape(route)}</td>" + "".join(f"<td class=\"n\">{cell}</td>" for cell in cells)
+                   + "</tr>" for route, cells in rows)
+    return f"<table>{head}{body}</table>\n"
+
+
+FORMATS = (Markdown(), Html())
+
+
+class RunReport:
+    """The pair of report files of one run, ``base`` plus ``.md``/``.html``."""
+
+    def __init__(self, base: Path):
+        self.base = Path(base)
+
+    @property
+    def paths(self) -> list[Path]:
+        return [self.base.with_suffix(fmt.suffix) for fmt in FORMATS]
+
+    def begin(self, title: str, tests: int, started_at: float | None = None) -> None:
+        self.base.parent.mkdir(parents=True, exist_ok=True)
+        for fmt, path in zip(FORMATS, self.paths):
+            path.unlink(missing_ok=True)
+            _append(path, fmt.header(title, started_at or time.time(), tests))
+
+    def add(self, result: TestResult) -> None:
+        for fmt, path in zip(FORMATS, self.paths):
+            _append(path, fmt.test(result))
+
+    def finish(self, results: list[TestResult], wall: float | None = None) -> None:
+        for fmt, path in zip(FORMATS, self.paths):
+            _append(path, fmt.summary(results, wall))
+
+
+class ReportWriter(Plugin):
+    """Appends each test's section to the run report as soon as it is done."""
+
+    def __init__(self, base: Path):
+        self.report = RunReport(base)
+
+    async def after_test(self, run, result) -> None:
+        self.report.add(result)
+
+
+def rebuild(history: History, run_id: int, directory: Path = DEFAULT_DIR) -> RunReport:
+    """Write ``run-N.md``/``.html`` from the history, one test at a time."""
+    run = history.db.execute("SELECT * FROM runs WHERE id = ?", (run_id,)).fetchone()
+    if run is None:
+        raise ValueError(f"no run {run_id} in {history.path}")
+    results = [result for result, _ in history.results(run_id)]
+    report = RunReport(directory / f"run-{run_id}")
+    report.begin(f"BookHaven suite run {run_id}", len(results), run["started_at"])
+    for result in results:
+        report.add(result)
+    report.finish(results, run["finished_at"] - run["started_at"] if run["finished_at"] else None)
+    return report
+
+
+INDEX_QUERY = """
+SELECT runs.*,
+       (SELECT COUNT(*) FROM tests WHERE tests.run_id = runs.id) AS tests,
+       (SELECT COUNT(*) FROM tests WHERE tests.run_id = runs.id AND tests.status = 'PASSED') AS passed,
+       (SELECT SUM(duration_ms) FROM tests WHERE tests.run_id = runs.id) AS busy_ms,
+       (SELECT test_id || ' ' || CAST(ROUND(duration_ms) AS INTEGER) FROM tests
+         WHERE tests.run_id = runs.id ORDER BY duration_ms DESC LIMIT 1) AS slowest
+FROM runs ORDER BY started_at DESC
+"""
+
+
+def _index_name(page: int) -> str:
+    return "index.html" if page == 1 else f"index-{page}.html"
+
+
+def write_index(history: History, directory: Path = DEFAULT_DIR, per_page: int = RUNS_PER_PAGE) -> int:
+    """Page through every run into ``index.html``, ``index-2.html``...; returns the page count."""
+    directory.mkdir(parents=True, exist_ok=True)
+    page, rows, path = 0, per_page, None
+    for run in history.db.execute(INDEX_QUERY):
+        if rows == per_page:
+            if path is not None:
+                _append(path, f"</table><nav><a href=\"{_index_name(page + 1)}\">Older runs</a></nav></body></html>\n")
+            page, rows = page + 1, 0
+            path = directory / _index_name(page)
+            path.unlink(missing_ok=True)
+            newer = f"<a href=\"{_index_name(page - 1)}\">Newer runs</a>" if page > 1 else ""
+            _append(path, f"<!DOCTYPE html>\n<html lang=\"en\"><head><meta charset=\"utf-8\">"
+                          f"<title>Run history, page {page}</title><style>{STYLE}</style></head><body>\n"
+                          f"<h1>Run history</h1><nav>{newer}</nav>\n<table><tr><th>Run</th><th>Started</th>"
+                          "<th>Revision</th><th>Passed</th><th>Wall clock</th><th>Test time</th>"
+                          "<th>Slowest test</th></tr>\n")
+        report = directory / f"run-{run['id']}.html"
+        label = f"<a href=\"{report.name}\">{run['id']}</a>" if report.exists() else str(run["id"])
+        wall = f"{run['finished_at'] - run['started_at']:.1f} s" if run["finished_at"] else "-"
+        slowest = run["slowest"].rsplit(" ", 1) if run["slowest"] else None
+        _append(path, f"<tr><td>{label}</td><td>{_when(run['started_at'])}</td>"
+                      f"<td>{escape(run['revision'] or '-')}</td>"
+                      f"<td class=\"n\">{run['passed']}/{run['tests']}</td><td class=\"n\">{wall}</td>"
+                      f"<td class=\"n\">{(run['busy_ms'] or 0) / 1000:.1f} s</td>"
+                      f"<td>{escape(slowest[0]) + ' ' + _ms(float(slowest[1])) if slowest else '-'}</td></tr>\n")
+        rows += 1
+    if path is not None:
+        _append(path, "</table></body></html>\n")
+    return page
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m harness.report",
+                                     description="Build run reports and the run index from the history.")
+    parser.add_argument("--db", type=Path, default=DEFAULT_HISTORY,
+                        help="history database (default: tmp/history.sqlite)")
+    parser.add_argument("-d", "--directory", type=Path, default=DEFAULT_DIR,
+                        help="report directory (default: tmp/reports)")
+    commands = parser.add_subparsers(dest="command", required=True)
+    run = commands.add_parser("run", help="rebuild the markdown and HTML report of runs")
+    run.add_argument("runs", nargs="+", type=int, metavar="RUN")
+    index = commands.add_parser("index", help="write the paged HTML index of every run")
+    index.add_argument("--per-page", type=int, default=RUNS_PER_PAGE,
+                       help=f"runs per page (default: {RUNS_PER_PAGE})")
+    options = parser.parse_args(argv)
+
+    with History(options.db) as history:
+        if options.command == "run":
+            for run_id in options.runs:
+                try:
+                    report = rebuild(history, run_id, options.directory)
+                except ValueError as exc:
+                    print(exc, file=sys.stderr)
+                    return 1
+                print(f"run {run_id} written to {', '.join(str(path) for path in report.paths)}")
+        else:
+            pages = write_index(history, options.directory, options.per_page)
+            print(f"{pages} index pages written to {options.directory}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
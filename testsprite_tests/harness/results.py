@@ -0,0 +1,50 @@
+"""Result records in the shape of ``tmp/test_results.json``."""
+
+from __future__ import annotations
+
+import json
+import uuid
+from pathlib import Path
+
+from .loader import SUITE_DIR
+from .runner import TestResult
+
+LEGACY_RESULTS = SUITE_DIR / "tmp" / "test_results.json"
+DEFAULT_OUTPUT = SUITE_DIR / "tmp" / "harness_results.json"
+
+
+def load_legacy_ids(path: Path = LEGACY_RESULTS) -> dict[str, str]:
+    """Map ``TC0xx`` to the ``testId`` TestSprite assigned it, if known."""
+    try:
+        records = json.loads(Path(path).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    return {record["title"].split("-", 1)[0]: record["testId"] for record in records}
+
+
+def to_record(result: TestResult, test_ids: dict[str, str] | None = None) -> dict:
+    test_id = (test_ids or {}).get(result.test_id)
+    if test_id is None:
+        # Stable across runs so records for the same test can be joined
+        test_id = str(uuid.uuid5(uuid.NAMESPACE_URL, f"testsprite:{result.title}"))
+    record = {
+        "testId": test_id,
+        "title": result.title,
+        "testStatus": result.status,
+        "testError": result.error or "",
+        "created": result.created,
+        "modified": result.modified,
+        "durationMs": round(result.duration * 1000),
+    }
+    if result.metrics:
+        record["metrics"] = result.metrics
+    return record
+
+
+def write_results(results: list[TestResult], path: Path = DEFAULT_OUTPUT) -> Path:
+    test_ids = load_legacy_ids()
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    records = [to_record(result, test_ids) for result in results]
+    path.write_text(json.dumps(records, indent=2) + "\n", encoding="utf-8")
+    return path
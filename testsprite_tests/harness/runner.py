@@ -0,0 +1,266 @@
+"""Concurrent execution of the suite on one shared Playwright browser."""
+
+from __future__ import annotations
+
+import asyncio
+import sys
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+
+from playwright.async_api import Error as PlaywrightError
+from playwright.async_api import async_playwright
+
+from .loader import TestScript, load_module
+from .plugins import Plugin
+from .shim import PlaywrightShim
+from .waits import FixedWaits, WaitStats
+
+# The scripts launch with ``--single-process`` and ``--ipc=host``; both are
+# dropped here because they serialise every context onto one renderer.
+DEFAULT_LAUNCH_ARGS = [
+    "--window-size=1280,720",
+    "--disable-dev-shm-usage",
+]
+
+
+def _timestamp(epoch: float) -> str:
+    # ISO-8601 with millisecond precision, as in tmp/test_results.json
+    moment = datetime.fromtimestamp(epoch, tz=timezone.utc)
+    return moment.strftime("%Y-%m-%dT%H:%M:%S.") + f"{moment.microsecond // 1000:03d}Z"
+
+
+def describe_error(exc: BaseException) -> str:
+    message = str(exc).strip()
+    if isinstance(exc, AssertionError) and message:
+        return message
+    return f"{type(exc).__name__}: {message}" if message else type(exc).__name__
+
+
+@dataclass
+class TestResult:
+    test_id: str
+    title: str
+    status: str
+    error: str | None
+    started_at: float
+    finished_at: float
+    metrics: dict = field(default_factory=dict)
+
+    @property
+    def duration(self) -> float:
+        return self.finished_at - self.started_at
+
+    @property
+    def passed(self) -> bool:
+        return self.status == "PASSED"
+
+    @property
+    def created(self) -> str:
+        return _timestamp(self.started_at)
+
+    @property
+    def modified(self) -> str:
+        return _timestamp(self.finished_at)
+
+
+class LeasedContext:
+    """The script's handle on one of its contexts.
+
+    Everything is forwarded except ``close``: the scripts close their
+    context in ``finally``, but ``after_test`` hooks still need to read the
+    pages, so the runner closes it once they are done.
+    """
+
+    def __init__(self, context):
+        self._context = context
+
+    def __getattr__(self, name):
+        return getattr(self._context, name)
+
+    async def close(self, **_options):
+        pass
+
+
+class TestRun:
+    """A single test's lease on the shared browser.
+
+    The shim routes the script's ``browser.new_context()`` calls here, so
+    every context the test opens is created with the runner's options and
+    is closed when the test finishes, even if the script bails out early.
+    The object is also the script's ``__harness__`` global. ``retrying``
+    is set before ``after_test`` when the runner will run the test again,
+    so plugins can leave the failed attempt out of their samples.
+    """
+
+    def __init__(self, runner: Runner, browser, script: TestScript):
+        self.runner = runner
+        self.browser = browser
+        self.script = script
+        self.contexts = []
+        self.wait_stats = WaitStats()
+        self.started_at = time.time()
+        self.steps: list[dict] = []
+        self.retrying = False
+        self._step_started: float | None = None
+
+    async def new_context(self, **options):
+        merged = dict(self.runner.context_options)
+        for plugin in self.runner.plugins:
+            merged.update(await plugin.context_options(self.script))
+        merged.update(options)
+        context = await self.browser.new_context(**merged)
+        self.contexts.append(context)
+        for plugin in self.runner.plugins:
+            await plugin.on_context(self, context)
+        handle = LeasedContext(context)
+        for plugin in self.runner.plugins:
+            handle = plugin.wrap_context(self, handle)
+        return handle
+
+    def pages(self) -> list:
+        """Every page of the test that is still open."""
+        return [page for context in self.contexts for page in context.pages if not page.is_closed()]
+
+    def current_page(self):
+        for context in reversed(self.contexts):
+            if context.pages:
+                return context.pages[-1]
+        return None
+
+    async def pause(self, ms: float, page=None, target=None) -> None:
+        await self.runner.waits.pause(self, ms, page=page, target=target)
+
+    async def step(self, label: str) -> None:
+        """End the current step and start the next; the loader inserts the calls."""
+        await self.end_step()
+        self.steps.append({"label": label, "offset_ms": round((time.time() - self.started_at) * 1000, 1)})
+        self._step_started = time.perf_counter()
+
+    async def end_step(self) -> None:
+        if self._step_started is None:
+            return
+        step = self.steps[-1]
+        step["duration_ms"] = round((time.perf_counter() - self._step_started) * 1000, 1)
+        self._step_started = None
+        for plugin in self.runner.plugins:
+            await plugin.after_step(self, step)
+
+    async def close(self):
+        for context in self.contexts:
+            try:
+                await context.close()
+            except PlaywrightError:
+                pass
+
+
+class Runner:
+    def __init__(
+        self,
+        concurrency: int = 4,
+        headless: bool = True,
+        launch_args: list[str] | None = None,
+        context_options: dict | None = None,
+        waits: FixedWaits | None = None,
+        plugins: list[Plugin] | None = None,
+        repeat: int = 1,
+        retry=None,
+    ):
+        self.concurrency = max(1, concurrency)
+        self.headless = headless
+        self.launch_args = DEFAULT_LAUNCH_ARGS if launch_args is None else launch_args
+        self.context_options = context_options or {}
+        self.waits = waits or FixedWaits()
+        self.plugins = [self.waits, *(plugins or [])]
+        self.repeat = max(1, repeat)
+        # Anything with ``should_retry(result, attempt) -> bool``, see flaky.RetryPolicy
+        self.retry = retry
+
+    async def run(self, scripts: list[TestScript]) -> list[TestResult]:
+        """Run ``scripts`` concurrently and return results in input order.
+
+        With ``repeat`` above one, each script's results are consecutive.
+        """
+        limit = asyncio.Semaphore(self.concurrency)
+        scripts = [script for script in scripts for _ in range(self.repeat)]
+
+        async def guarded(browser, script):
+            async with limit:
+                failures = []
+                while True:
+                    result, retrying = await self._run_one(browser, script, failures)
+                    if not retrying:
+                        return result
+                    failures.append((result.error or "").split("\n", 1)[0])
+
+        async with async_playwright() as pw:
+            browser = await pw.chromium.launch(headless=self.headless, args=self.launch_args)
+            started = []
+            try:
+                for plugin in self.plugins:
+                    await plugin.start(browser)
+                    started.append(plugin)
+                return list(await asyncio.gather(*(guarded(browser, s) for s in scripts)))
+            finally:
+                for plugin in reversed(started):
+                    await plugin.stop()
+                await browser.close()
+
+    async def _run_one(self, browser, script: TestScript,
+                       failures: list[str] | None = None) -> tuple[TestResult, bool]:
+        """Run ``script`` once and say whether it is to be retried.
+
+        ``failures`` are the errors of the attempts it retries.
+        """
+        run = TestRun(self, browser, script)
+        overrides = {"async_api": PlaywrightShim(run), "__harness__": run}
+        for plugin in self.plugins:
+            overrides.update(plugin.script_globals(run))
+        module = load_module(script, overrides)
+        status, error = "PASSED", None
+        started = run.started_at = time.time()
+        try:
+            # Whatever happens before the script's first ``# ->`` comment
+            await run.step("start")
+            await module.run_test()
+        except Exception as exc:
+            status, error = "FAILED", describe_error(exc)
+        result = TestResult(script.test_id, script.name, status, error, started, time.time())
+        if failures:
+            result.metrics["retry"] = {"attempt": len(failures) + 1, "after": list(failures)}
+        run.retrying = (not result.passed and self.retry is not None
+                        and self.retry.should_retry(result, len(failures or ()) + 1))
+        try:
+            if run.steps:
+                await run.end_step()
+                result.metrics["steps"] = run.steps
+            for plugin in self.plugins:
+                await plugin.after_test(run, result)
+        finally:
+            await run.close()
+        return result, run.retrying
+
+
+async def run_legacy(scripts: list[TestScript]) -> list[TestResult]:
+    """Run each script as its own process, one after another.
+
+    This is how the suite ran before the shared-browser runner and is kept
+    as the baseline for speedup comparisons.
+    """
+    results = []
+    for script in scripts:
+        started = time.time()
+        process = await asyncio.create_subprocess_exec(
+            sys.executable, str(script.path),
+            cwd=str(script.path.parent),
+            stdout=asyncio.subprocess.DEVNULL,
+            stderr=asyncio.subprocess.PIPE,
+        )
+        _, stderr = await process.communicate()
+        error = None
+        if process.returncode != 0:
+            lines = stderr.decode(errors="replace").strip().splitlines()
+            error = lines[-1] if lines else f"exit status {process.returncode}"
+        status = "PASSED" if process.returncode == 0 else "FAILED"
+        results.append(TestResult(script.test_id, script.name, status, error, started, time.time()))
+    return results
@@ -0,0 +1,209 @@
+"""How the books page scales with the size of the catalog.
+
+Books.jsx renders the whole catalog and sorts a copy on every render. This tool
+seeds the in-process mock backend with catalogs of growing size and, for
+each one, opens ``/books`` and times with in-page spans (``js/spans.js``):
+
+    render     navigation start to the first paint with the book list
+    sort       changing the sort order, to the next paint
+    genre      picking a genre and going back to "All Genres"
+
+Search is not timed: a query makes BookContext replace the catalog with
+``fetchGoogleBooks`` results (none without ``VITE_BOOK_API_KEY``) behind
+the page spinner, so its cost does not depend on the catalog size.
+
+The report keeps the per-size percentiles of every span and, per span,
+the slope of median time against catalog size on a log-log scale: 1.0
+is linear growth, 2.0 quadratic. Reports carry a label (the git revision
+by default) so runs on two releases can be compared::
+
+    python -m harness.scaling --sizes 100,1000,10000 -o tmp/scaling-main.json
+    python -m harness.scaling --sizes 100,1000,10000 --compare tmp/scaling-main.json
+
+The real backend cannot be bulk-seeded, so the REST API is always served
+by the mock; the frontend must be pointed at it as for ``--mock-backend``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import math
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+
+from playwright.async_api import Error as PlaywrightError
+from playwright.async_api import async_playwright
+
+from .app import APP_URL, git_label
+from .loader import SUITE_DIR
+from .mock_backend import MockBackend, generate_catalog
+from .plugins import read_js
+from .stats import slope, summarize
+
+SPANS = ("render", "sort", "genre")
+DEFAULT_SIZES = (100, 1000, 10000, 100000)
+DEFAULT_REPORT = SUITE_DIR / "tmp" / "scaling.json"
+# Visited in turn, each one a sort span; ends back on the default order
+SORT_ORDERS = ("title-desc", "price-asc", "publicationDate-desc", "rating-desc", "title-asc")
+
+RESULT_LINK = 'main a[href^="/books/"]'
+# The page spinner while books load, and LazyBookCard's skeletons
+PENDING = "main .animate-spin, main .animate-pulse"
+SORT_SELECT = 'main select:has(option[value="title-asc"])'
+GENRE_SELECT = 'main select:has(option[value=""])'
+
+
+def growth(points: list[tuple[int, float]]) -> float | None:
+    """Least-squares slope of log(time) against log(size)."""
+    return slope((math.log(size), math.log(ms)) for size, ms in points if ms and ms > 0)
+
+
+class ScalingBenchmark:
+    def __init__(
+        self,
+        sizes=DEFAULT_SIZES,
+        samples: int = 3,
+        render_timeout_ms: float = 120000,
+        headless: bool = True,
+    ):
+        self.sizes = list(sizes)
+        self.samples = samples
+        self.render_timeout_ms = render_timeout_ms
+        self.headless = headless
+
+    async def run(self) -> list[dict]:
+        rows = []
+        async with MockBackend() as backend, async_playwright() as pw:
+            browser = await pw.chromium.launch(headless=self.headless)
+            try:
+                for size in self.sizes:
+                    backend.seed(generate_catalog(size))
+                    rows.append(await self._measure(browser, size))
+            finally:
+                await browser.close()
+        return rows
+
+    async def _measure(self, browser, size: int) -> dict:
+        spans = defaultdict(list)
+        errors = []
+        for _ in range(self.samples):
+            # A fresh context per sample, so nothing carries over between loads
+            context = await browser.new_context()
+            await context.add_init_script(read_js("spans.js"))
+            await context.add_init_script(
+                f"window.__bhSpans.watchRender({json.dumps(RESULT_LINK)}, {json.dumps(PENDING)})"
+            )
+            try:
+                await self._sample(await context.new_page(), spans)
+            except PlaywrightError as exc:
+                errors.append(str(exc).splitlines()[0])
+            finally:
+                await context.close()
+        return {
+            "size": size,
+            "spans": {name: summarize(spans[name]) for name in SPANS if spans[name]},
+            "errors": errors,
+        }
+
+    async def _sample(self, page, spans: dict[str, list[float]]) -> None:
+        await page.goto(f"{APP_URL}/books", wait_until="commit")
+        handle = await page.wait_for_function("() => window.__bhSpans.renderedAt()",
+                                              timeout=self.render_timeout_ms)
+        spans["render"].append(await handle.json_value())
+
+        async def change(name, selector, value, event):
+            return await page.evaluate(
+                "([name, selector, value, event]) => window.__bhSpans.change(name, selector, value, event)",
+                [name, selector, value, event],
+            )
+
+        for order in SORT_ORDERS:
+            spans["sort"].append(await change("sort", SORT_SELECT, order, "change"))
+        genre = await page.eval_on_selector(GENRE_SELECT, "select => select.options[1]?.value")
+        if genre:
+            spans["genre"].append(await change("genre", GENRE_SELECT, genre, "change"))
+            spans["genre"].append(await change("genre", GENRE_SELECT, "", "change"))
+
+
+def build_report(rows: list[dict], label: str) -> dict:
+    return {
+        "label": label,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "sizes": rows,
+        "growth": {
+            name: growth([(row["size"], row["spans"][name]["p50"]) for row in rows if name in row["spans"]])
+            for name in SPANS
+        },
+    }
+
+
+def format_report(report: dict) -> str:
+    """Median per span and catalog size in ms, then each span's growth."""
+    lines = [f"  {'books':>8}" + "".join(f" {name:>10}" for name in SPANS)]
+    for row in report["sizes"]:
+        cells = [f" {row['spans'][name]['p50']:>8.1f}ms" if name in row["spans"] else f" {'-':>10}"
+                 for name in SPANS]
+        lines.append(f"  {row['size']:>8}" + "".join(cells))
+        for error in row["errors"][:3]:
+            lines.append(f"           ! {error[:110]}")
+    slopes = [f"{name} {value:.2f}" for name, value in report["growth"].items() if value is not None]
+    if slopes:
+        lines.append(f"  growth (log-log slope, 1.0 = linear): {', '.join(slopes)}")
+    return "\n".join(lines)
+
+
+def compare_reports(old: dict, new: dict) -> list[str]:
+    """Median changes per size and span, for the sizes both reports measured."""
+    lines = [f"{old['label']} -> {new['label']}"]
+    old_rows = {row["size"]: row for row in old["sizes"]}
+    for row in new["sizes"]:
+        before = old_rows.get(row["size"])
+        if before is None:
+            continue
+        for name in SPANS:
+            if name in row["spans"] and name in before["spans"]:
+                was, now = before["spans"][name]["p50"], row["spans"][name]["p50"]
+                change = f" ({(now - was) / was:+.0%})" if was else ""
+                lines.append(f"  {row['size']:>8} {name:<10} {was:>8.1f}ms -> {now:>8.1f}ms{change}")
+    for name in SPANS:
+        was, now = old["growth"].get(name), new["growth"].get(name)
+        if was is not None and now is not None:
+            lines.append(f"  growth {name:<10} {was:.2f} -> {now:.2f}")
+    return lines
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m harness.scaling",
+                                     description="Time the books page against growing catalogs.")
+    parser.add_argument("--sizes", type=lambda text: [int(size) for size in text.split(",")],
+                        default=list(DEFAULT_SIZES),
+                        help="comma-separated catalog sizes (default: 100,1000,10000,100000)")
+    parser.add_argument("--samples", type=int, default=3, help="page loads per size (default: 3)")
+    parser.add_argument("--render-timeout", type=float, default=120000, metavar="MS",
+                        help="give up on a page load after this long (default: 120000)")
+    parser.add_argument("--label", default=None, help="name of this run (default: git describe)")
+    parser.add_argument("--compare", type=Path, metavar="REPORT", help="earlier report to compare against")
+    parser.add_argument("--headed", action="store_true", help="show the browser window")
+    parser.add_argument("-o", "--output", type=Path, default=DEFAULT_REPORT,
+                        help="report file (default: tmp/scaling.json)")
+    options = parser.parse_args(argv)
+
+    benchmark = ScalingBenchmark(options.sizes, samples=options.samples,
+                                 render_timeout_ms=options.render_timeout, headless=not options.headed)
+    report = build_report(asyncio.run(benchmark.run()), options.label or git_label())
+    print(format_report(report))
+    if options.compare:
+        baseline = json.loads(options.compare.read_text(encoding="utf-8"))
+        print("\n".join(compare_reports(baseline, report)))
+    options.output.parent.mkdir(parents=True, exist_ok=True)
+    options.output.write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+    print(f"report written to {options.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
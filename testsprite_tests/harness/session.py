@@ -0,0 +1,147 @@
+"""Log in once and seed every login-dependent test from a storage snapshot.
+
+TC003, TC005, TC011-TC017 and TC024 all log in through the UI before they
+get to what they are testing. ``SessionCache`` calls ``POST /auth/login``
+once, builds a Playwright ``storage_state`` holding the ``token`` and
+``user`` localStorage entries that ``AuthContext.jsx`` restores on boot, and
+passes it to each of those tests' contexts. The snapshot is rebuilt shortly
+before the token's ``exp``; an opaque (non-JWT) token, which the frontend
+accepts without checking, is kept for the whole run.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import base64
+import binascii
+import json
+import math
+import time
+
+from .app import API_URL, APP_URL, TOKEN_KEY, USER_KEY
+from .plugins import Plugin
+
+LOGIN_TESTS = frozenset({
+    "TC003", "TC005", "TC011", "TC012", "TC013", "TC014", "TC015", "TC016", "TC017", "TC024",
+})
+
+
+class SessionError(RuntimeError):
+    pass
+
+
+def _atob(segment: str) -> bytes:
+    # window.atob accepts unpadded input but rejects the base64url alphabet
+    if len(segment) % 4 == 1:
+        raise ValueError("invalid base64 length")
+    return base64.b64decode(segment + "=" * (-len(segment) % 4), validate=True)
+
+
+def _present(token: str | None) -> bool:
+    return bool(token) and token not in ("undefined", "null") and bool(token.strip())
+
+
+def _is_jwt(token: str) -> bool:
+    return token.count(".") == 2
+
+
+def token_expiry(token: str | None) -> float | None:
+    """Return the JWT ``exp`` claim, decoded the way ``isValidToken`` does.
+
+    ``None`` means there is no readable expiry: the token is missing, one of
+    the ``'undefined'``/``'null'`` placeholders, opaque (not three
+    dot-separated segments), or its payload does not decode.
+    """
+    if not _present(token) or not _is_jwt(token):
+        return None
+    try:
+        payload = json.loads(_atob(token.split(".")[1]))
+        return float(payload["exp"])
+    except (ValueError, binascii.Error, KeyError, TypeError):
+        return None
+
+
+def is_valid_token(token: str | None, now: float | None = None) -> bool:
+    """``isValidToken`` from ``AuthContext.jsx``: opaque tokens pass unchecked."""
+    if not _present(token):
+        return False
+    if not _is_jwt(token):
+        return True
+    expiry = token_expiry(token)
+    current = int(time.time() if now is None else now)
+    return expiry is not None and expiry > current
+
+
+def storage_state(token: str, user: dict, origin: str = APP_URL) -> dict:
+    return {
+        "cookies": [],
+        "origins": [{
+            "origin": origin,
+            "localStorage": [
+                {"name": TOKEN_KEY, "value": token},
+                {"name": USER_KEY, "value": json.dumps(user)},
+            ],
+        }],
+    }
+
+
+class SessionCache(Plugin):
+    def __init__(
+        self,
+        email: str,
+        password: str,
+        api_url: str = API_URL,
+        app_url: str = APP_URL,
+        tests: frozenset[str] = LOGIN_TESTS,
+        refresh_margin: float = 60.0,
+    ):
+        self.email = email
+        self.password = password
+        self.api_url = api_url.rstrip("/")
+        self.app_url = app_url.rstrip("/")
+        self.tests = tests
+        self.refresh_margin = refresh_margin
+        self.logins = 0
+        self._lock = asyncio.Lock()
+        self._state = None
+        self._expires_at = 0.0
+        self._api_context = None
+
+    async def start(self, browser) -> None:
+        # A bare context is only used for its APIRequestContext
+        self._api_context = await browser.new_context()
+
+    async def stop(self) -> None:
+        if self._api_context is not None:
+            await self._api_context.close()
+
+    async def context_options(self, script) -> dict:
+        if script.test_id not in self.tests:
+            return {}
+        return {"storage_state": await self.snapshot()}
+
+    async def snapshot(self) -> dict:
+        """Return the cached storage state, logging in again if it is stale."""
+        async with self._lock:
+            if self._state is None or time.time() >= self._expires_at - self.refresh_margin:
+                await self._login()
+            return self._state
+
+    async def _login(self) -> None:
+        response = await self._api_context.request.post(
+            f"{self.api_url}/auth/login",
+            data={"email": self.email, "password": self.password},
+        )
+        if not response.ok:
+            raise SessionError(f"login as {self.email} failed: HTTP {response.status}")
+        body = await response.json()
+        token = body.get("token")
+        if not is_valid_token(token):
+            # AuthContext.login would reject this token as well
+            raise SessionError("login returned a token the frontend treats as invalid")
+        user = {key: body.get(key) for key in ("id", "username", "email", "createdAt")}
+        self._state = storage_state(token, user, self.app_url)
+        # An opaque token has no expiry the frontend could check
+        expiry = token_expiry(token)
+        self._expires_at = math.inf if expiry is None else expiry
+        self.logins += 1
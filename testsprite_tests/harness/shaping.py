@@ -0,0 +1,272 @@
+"""Declarative network fault and latency shaping.
+
+A profile is a JSON file naming a scenario and listing rules, each matched
+against request URLs with a Playwright glob and, optionally, a method:
+
+```json
+{
+  "name": "cart-server-errors",
+  "description": "The first cart update fails with a 503",
+  "tests": ["TC012", "TC013"],
+  "rules": [
+    {"url": "**/api/cart/update/*", "method": "PUT", "fault": "status", "status": 503, "times": 1}
+  ]
+}
+```
+
+A rule can add ``latency_ms`` before the request is answered and inject
+one ``fault``: ``status`` (an HTTP error response, 503 by default),
+``reset`` (the connection is dropped) or ``hang`` (nothing is answered for
+``hang_ms``, by default longer than ``apiCall``'s 10 s axios timeout).
+``skip`` lets the first N matches through untouched and ``times`` limits
+how often the rule applies after that. Delayed requests and requests no
+rule applies to fall through to the other route handlers, so profiles
+combine with the mock backend, HAR replay and the Google Books fixtures.
+
+Bandwidth is not a rule: it is page-wide, set by the profile's optional
+``network`` (``latency_ms``, ``download_kbps``, ``upload_kbps``) through
+Chromium's ``Network.emulateNetworkConditions`` on every page. Until a
+page's conditions are set, its requests are held back.
+
+Every injected fault is classified the way ``apiCall`` in
+``BookContext.jsx`` classifies errors (401, 403, 5xx, timeout, reset). An
+init script watches for the matching message in the page, and the time
+from injection to its first paint is recorded per class.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from playwright.async_api import Error as PlaywrightError
+
+from .app import API_ERROR_MESSAGES, API_TIMEOUT_MS
+from .plugins import Plugin, read_js
+from .stats import summarize
+
+PROFILE_DIR = Path(__file__).resolve().parent / "profiles"
+FAULTS = ("status", "reset", "hang")
+NETWORK_KEYS = ("latency_ms", "download_kbps", "upload_kbps")
+CORS_HEADERS = {"access-control-allow-origin": "*"}
+
+
+class ProfileError(ValueError):
+    pass
+
+
+def fault_class(fault: str, status: int | None = None) -> str:
+    """Name the ``apiCall`` branch a fault ends up in."""
+    if fault == "hang":
+        return "timeout"
+    if fault == "reset":
+        return "reset"
+    if status >= 500:
+        return "5xx"
+    return str(status)
+
+
+@dataclass
+class Rule:
+    url: str
+    method: str | None = None
+    latency_ms: float = 0
+    fault: str | None = None
+    status: int = 503
+    hang_ms: float = API_TIMEOUT_MS + 5000
+    skip: int = 0
+    times: int | None = None
+    matched: int = field(default=0, init=False)
+
+    def __post_init__(self):
+        if self.method:
+            self.method = self.method.upper()
+        if self.fault is not None and self.fault not in FAULTS:
+            raise ProfileError(f"unknown fault {self.fault!r}; expected one of {', '.join(FAULTS)}")
+
+    @property
+    def fault_class(self) -> str | None:
+        return fault_class(self.fault, self.status) if self.fault else None
+
+    def applies(self, method: str) -> bool:
+        """Count a matching request and say whether the rule shapes it."""
+        if self.method and method.upper() != self.method:
+            return False
+        self.matched += 1
+        if self.matched <= self.skip:
+            return False
+        return self.times is None or self.matched - self.skip <= self.times
+
+
+@dataclass
+class Profile:
+    name: str
+    rules: list[dict]
+    description: str = ""
+    tests: list[str] | None = None
+    network: dict | None = None
+
+    def applies_to(self, script) -> bool:
+        return self.tests is None or script.test_id in self.tests
+
+    def build_rules(self) -> list[Rule]:
+        # Fresh counters for every test
+        return [Rule(**rule) for rule in self.rules]
+
+    def network_conditions(self) -> dict | None:
+        """``Network.emulateNetworkConditions`` parameters for ``network``."""
+        if not self.network:
+            return None
+        unknown = set(self.network) - set(NETWORK_KEYS)
+        if unknown:
+            raise ProfileError(f"unknown network keys {', '.join(sorted(unknown))}; "
+                               f"expected {', '.join(NETWORK_KEYS)}")
+        for key in ("download_kbps", "upload_kbps"):
+            if self.network.get(key) is not None and self.network[key] <= 0:
+                raise ProfileError(f"{key} must be positive")
+
+        def throughput(key):
+            # CDP wants bytes per second, -1 for unthrottled
+            kbps = self.network.get(key)
+            return kbps * 1000 / 8 if kbps else -1
+
+        return {"offline": False, "latency": self.network.get("latency_ms", 0),
+                "downloadThroughput": throughput("download_kbps"), "uploadThroughput": throughput("upload_kbps")}
+
+
+def load_profile(name_or_path: str | Path) -> Profile:
+    """Load a profile by file path, or by name from ``harness/profiles``."""
+    path = Path(name_or_path)
+    if not path.exists():
+        path = PROFILE_DIR / f"{name_or_path}.json"
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except FileNotFoundError:
+        raise ProfileError(f"no network profile {name_or_path!r}") from None
+    except ValueError as exc:
+        raise ProfileError(f"{path.name}: {exc}") from None
+    try:
+        profile = Profile(**data)
+        profile.build_rules()
+        profile.network_conditions()
+    except TypeError as exc:
+        raise ProfileError(f"{path.name}: {exc}") from None
+    return profile
+
+
+class NetworkShaping(Plugin):
+    def __init__(self, profile: Profile):
+        self.profile = profile
+        self._injected: dict[object, dict[str, list[float]]] = {}
+        self._shown: dict[object, dict[str, list[float]]] = {}
+
+    async def on_context(self, run, context) -> None:
+        if not self.profile.applies_to(run.script):
+            return
+        injected = self._injected.setdefault(run, defaultdict(list))
+        shown = self._shown.setdefault(run, defaultdict(list))
+        classes = {message: name for name, message in API_ERROR_MESSAGES.items()}
+
+        def on_shown(source, message, at_ms):
+            shown[classes[message]].append(at_ms)
+
+        await context.expose_binding("__bhErrorShown", on_shown)
+        await context.add_init_script(
+            read_js("error_watch.js") + f"\nwindow.__bhErrorWatch.watch({json.dumps(list(classes))});"
+        )
+
+        # Routes registered later are tried first, so register in reverse to
+        # give the profile's first rule priority
+        for rule in reversed(self.profile.build_rules()):
+            await context.route(rule.url, self._handler(rule, injected))
+        conditions = self.profile.network_conditions()
+        if conditions:
+            await self._emulate(context, conditions)
+
+    async def _emulate(self, context, conditions: dict) -> None:
+        pending = []
+
+        async def attach(page):
+            try:
+                session = await context.new_cdp_session(page)
+                await session.send("Network.enable")
+                await session.send("Network.emulateNetworkConditions", conditions)
+            except PlaywrightError:
+                pass
+
+        async def hold(route):
+            # Registered last, so tried first: no request leaves before its
+            # page is throttled
+            await asyncio.gather(*pending, return_exceptions=True)
+            await route.fallback()
+
+        context.on("page", lambda page: pending.append(asyncio.ensure_future(attach(page))))
+        await context.route("**/*", hold)
+
+    def _handler(self, rule: Rule, injected):
+        async def handle(route):
+            if not rule.applies(route.request.method):
+                await route.fallback()
+                return
+            if rule.latency_ms:
+                await asyncio.sleep(rule.latency_ms / 1000)
+            try:
+                if rule.fault:
+                    injected[rule.fault_class].append(time.time() * 1000)
+                    await self._inject(route, rule)
+                else:
+                    await route.fallback()
+            except PlaywrightError:
+                # The page navigated away or the context closed mid-fault
+                pass
+
+        return handle
+
+    async def _inject(self, route, rule: Rule) -> None:
+        if rule.fault == "reset":
+            await route.abort("connectionreset")
+        elif rule.fault == "hang":
+            await asyncio.sleep(rule.hang_ms / 1000)
+            await route.abort("timedout")
+        else:
+            body = json.dumps({"message": f"Injected HTTP {rule.status}"})
+            await route.fulfill(status=rule.status, content_type="application/json",
+                                body=body, headers=CORS_HEADERS)
+
+    async def after_test(self, run, result) -> None:
+        injected = self._injected.pop(run, None)
+        shown = self._shown.pop(run, {})
+        if injected is None:
+            return
+        feedback = {}
+        for name, faults in injected.items():
+            # Each paint answers the oldest fault still waiting for one. An
+            # immediate failure also settles the others before the paint,
+            # since they only re-set the message already on screen; hung
+            # requests each time out on their own.
+            pending = sorted(faults)
+            delays = []
+            for at in sorted(shown.get(name, [])):
+                earlier = [fault for fault in pending if fault <= at]
+                if not earlier:
+                    continue
+                delays.append(at - earlier[0])
+                settled = earlier if name != "timeout" else earlier[:1]
+                pending = [fault for fault in pending if fault not in settled]
+            feedback[name] = {"injected": len(faults), "shown": len(delays), "time_to_message_ms": delays}
+        result.metrics["shaping"] = {"profile": self.profile.name, "classes": feedback}
+
+
+def summarize_feedback(results) -> dict[str, dict]:
+    """Time-to-error-message statistics per failure class across ``results``."""
+    injected = defaultdict(int)
+    delays = defaultdict(list)
+    for result in results:
+        for name, feedback in result.metrics.get("shaping", {}).get("classes", {}).items():
+            injected[name] += feedback["injected"]
+            delays[name].extend(feedback["time_to_message_ms"])
+    return {name: {"injected": count, **summarize(delays[name])} for name, count in sorted(injected.items())}
@@ -0,0 +1,62 @@
+"""Spread the suite over worker processes, each driving its own browser.
+
+One event loop driving Chromium saturates a single core well before the
+machine does. Sharding runs a separate ``Runner`` (and so a separate
+Playwright driver and browser) in each worker process and merges the
+results back in suite order.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import multiprocessing
+import os
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+
+from .loader import TestScript
+from .runner import TestResult
+
+
+def default_shard_count() -> int:
+    return os.cpu_count() or 1
+
+
+def plan_shards(scripts: list[TestScript], shards: int) -> list[list[TestScript]]:
+    """Deal scripts round-robin into at most ``shards`` non-empty shards."""
+    shards = max(1, min(shards, len(scripts)))
+    return [scripts[index::shards] for index in range(shards)]
+
+
+def _run_shard(scripts, runner_factory, factory_args) -> list[TestResult]:
+    runner = runner_factory(*factory_args)
+    return asyncio.run(runner.run(scripts))
+
+
+async def run_sharded(
+    scripts: list[TestScript],
+    shards: int,
+    runner_factory,
+    *factory_args,
+) -> list[TestResult]:
+    """Run ``scripts`` across ``shards`` processes.
+
+    ``runner_factory(*factory_args)`` is called inside each worker to build
+    its ``Runner``, so both must be picklable (a module-level function and
+    plain data such as an ``argparse.Namespace``).
+    """
+    plan = plan_shards(scripts, shards)
+    loop = asyncio.get_running_loop()
+    # spawn: a forked child would inherit the parent's event loop state
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=len(plan), mp_context=context) as pool:
+        batches = await asyncio.gather(*(
+            loop.run_in_executor(pool, _run_shard, shard, runner_factory, factory_args)
+            for shard in plan
+        ))
+    # A shard returns several results per script when the runner repeats
+    by_id = defaultdict(list)
+    for batch in batches:
+        for result in batch:
+            by_id[result.test_id].append(result)
+    return [result for script in scripts for result in by_id[script.test_id]]
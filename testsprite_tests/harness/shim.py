@@ -0,0 +1,86 @@
+"""Stand-in for ``playwright.async_api`` inside a loaded script.
+
+The scripts start their own driver and browser::
+
+    pw = await async_api.async_playwright().start()
+    browser = await pw.chromium.launch(...)
+    context = await browser.new_context()
+
+The shim answers those calls with handles onto the runner's shared browser.
+Only ``new_context`` does real work, and it is delegated to the test's lease
+so each test still gets an isolated context. ``close``/``stop`` on the
+driver and browser handles are no-ops; everything else on the module
+(``Error``, ``expect``...) resolves to the real Playwright objects.
+"""
+
+from __future__ import annotations
+
+from playwright import async_api
+
+
+class PlaywrightShim:
+    def __init__(self, lease):
+        self._lease = lease
+
+    def async_playwright(self):
+        return _Starter(self._lease)
+
+    def __getattr__(self, name):
+        return getattr(async_api, name)
+
+
+class _Starter:
+    def __init__(self, lease):
+        self._lease = lease
+
+    async def start(self):
+        return _DriverHandle(self._lease)
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+
+class _DriverHandle:
+    def __init__(self, lease):
+        self._browser_type = _BrowserTypeHandle(lease)
+
+    @property
+    def chromium(self):
+        return self._browser_type
+
+    # The suite is Chromium-only; other engines reuse the shared browser too
+    firefox = webkit = chromium
+
+    async def stop(self):
+        pass
+
+
+class _BrowserTypeHandle:
+    def __init__(self, lease):
+        self._lease = lease
+
+    async def launch(self, **_launch_options):
+        # Per-script launch arguments are ignored in favour of the runner's
+        return _BrowserHandle(self._lease)
+
+
+class _BrowserHandle:
+    def __init__(self, lease):
+        self._lease = lease
+
+    @property
+    def contexts(self):
+        return list(self._lease.contexts)
+
+    async def new_context(self, **options):
+        return await self._lease.new_context(**options)
+
+    async def new_page(self, **options):
+        context = await self.new_context(**options)
+        return await context.new_page()
+
+    async def close(self):
+        pass
@@ -0,0 +1,319 @@
+"""Soak runs: repeat one flow in a single page and watch the heap.
+
+``AuthContext.jsx`` registers axios interceptors in an effect, and every
+route change mounts and unmounts lazy pages, so a leak would only show
+after a long session. This tool loops a flow through the header links,
+without reloading the page, for ``--iterations`` rounds:
+
+    session  login -> books -> book -> cart -> logout   (the default)
+    browse   books -> book -> home
+
+After every round it forces a garbage collection over CDP and records the
+JS heap in use (``Runtime.getHeapUsage``), ``performance.memory`` and the
+DOM counters (documents, nodes, event listeners). The rounds after
+``--warmup`` get a least-squares growth slope per round; above
+``--max-growth-kb`` the run is flagged and the exit status is 1.
+
+Heap snapshots are taken after the warm-up, every ``--snapshot-every``
+rounds and after the last one. Each is reduced to object counts and self
+sizes per constructor, and the report lists the types that grew most
+between the first and last snapshot. ``--snapshot-dir`` also keeps the raw
+``.heapsnapshot`` files for the DevTools Memory panel::
+
+    python -m harness.soak --iterations 50 --mock-backend
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import sys
+from pathlib import Path
+
+from playwright.async_api import Error as PlaywrightError
+from playwright.async_api import async_playwright
+
+from .app import APP_URL
+from .loader import SUITE_DIR
+from .mock_backend import DEFAULT_USERS, MockBackend, format_stats, generate_catalog
+from .stats import slope
+
+DEFAULT_REPORT = SUITE_DIR / "tmp" / "soak.json"
+FLOWS = {
+    "session": ("login", "books", "book", "cart", "logout"),
+    "browse": ("books", "book", "home"),
+}
+# Constructors listed in the report, largest growth first
+TOP_TYPES = 20
+
+HOME_LINK = 'header a[href="/"]'
+LOGIN_LINK = 'header a[href="/login"]'
+BOOKS_LINK = 'header nav a[href="/books"]'
+CART_LINK = 'header a[href="/cart"]'
+USER_MENU = 'header button:has(.lucide-user)'
+LOGOUT_BUTTON = 'header button:has-text("Logout")'
+RESULT_LINK = 'main a[href^="/books/"]'
+CATALOG_SEARCH = 'main input[placeholder="Search books, authors, genres..."]'
+HOME_HEADING = "main h1.text-5xl"
+BOOK_BREADCRUMB = 'main a[href="/books"]'
+CART_HEADING = 'main h1:has-text("Shopping Cart"), main h2:has-text("Your cart is empty")'
+
+
+class SoakError(RuntimeError):
+    pass
+
+
+def object_types(snapshot: dict) -> dict[str, list[int]]:
+    """Count and self size per constructor, grouped as the Summary view does."""
+    meta = snapshot["snapshot"]["meta"]
+    fields = meta["node_fields"]
+    width = len(fields)
+    kinds = meta["node_types"][fields.index("type")]
+    type_at, name_at, size_at = fields.index("type"), fields.index("name"), fields.index("self_size")
+    nodes, strings = snapshot["nodes"], snapshot["strings"]
+    totals: dict[str, list[int]] = {}
+    for index in range(0, len(nodes), width):
+        kind = kinds[nodes[index + type_at]]
+        name = strings[nodes[index + name_at]] if kind in ("object", "native") else f"({kind})"
+        entry = totals.setdefault(name, [0, 0])
+        entry[0] += 1
+        entry[1] += nodes[index + size_at]
+    return totals
+
+
+def type_deltas(before: dict, after: dict, top: int = TOP_TYPES) -> list[dict]:
+    """The constructors whose retained self size grew most."""
+    deltas = []
+    for name in set(before) | set(after):
+        count_before, size_before = before.get(name, (0, 0))
+        count_after, size_after = after.get(name, (0, 0))
+        if size_after > size_before or count_after > count_before:
+            deltas.append({"type": name, "count": count_after - count_before,
+                           "bytes": size_after - size_before, "total_bytes": size_after})
+    return sorted(deltas, key=lambda delta: (-delta["bytes"], -delta["count"]))[:top]
+
+
+class Soak:
+    def __init__(
+        self,
+        flow: str = "session",
+        iterations: int = 30,
+        warmup: int = 3,
+        snapshot_every: int = 10,
+        max_growth_kb: float = 50,
+        email: str = DEFAULT_USERS[0]["email"],
+        password: str = DEFAULT_USERS[0]["password"],
+        timeout_ms: float = 15000,
+        snapshot_dir: Path | None = None,
+        headless: bool = True,
+    ):
+        self.steps = FLOWS[flow]
+        self.flow = flow
+        self.iterations = iterations
+        self.warmup = min(warmup, max(0, iterations - 2))
+        self.snapshot_every = snapshot_every
+        self.max_growth_kb = max_growth_kb
+        self.email = email
+        self.password = password
+        self.timeout_ms = timeout_ms
+        self.snapshot_dir = snapshot_dir
+        self.headless = headless
+        self.readings: list[dict] = []
+        self.snapshots: list[dict] = []
+
+    async def run(self) -> dict:
+        async with async_playwright() as pw:
+            browser = await pw.chromium.launch(headless=self.headless,
+                                               args=["--enable-precise-memory-info"])
+            try:
+                context = await browser.new_context()
+                context.set_default_timeout(self.timeout_ms)
+                page = await context.new_page()
+                cdp = await context.new_cdp_session(page)
+                await cdp.send("HeapProfiler.enable")
+                await page.goto(APP_URL)
+                await page.wait_for_selector(HOME_LINK)
+                if not self.warmup:
+                    await self._snapshot(cdp, 0)
+                for iteration in range(1, self.iterations + 1):
+                    for step in self.steps:
+                        try:
+                            await getattr(self, f"_{step}")(page)
+                        except PlaywrightError as exc:
+                            raise SoakError(f"round {iteration}, step {step}: {exc}") from exc
+                    self.readings.append({"iteration": iteration, **await self._measure(page, cdp)})
+                    if iteration in (self.warmup, self.iterations) or (
+                        iteration > self.warmup and (iteration - self.warmup) % self.snapshot_every == 0
+                    ):
+                        await self._snapshot(cdp, iteration)
+            finally:
+                await browser.close()
+        return self.report()
+
+    # Flow steps, all through the header links so the page never reloads
+
+    async def _home(self, page) -> None:
+        await page.locator(HOME_LINK).first.click()
+        await page.wait_for_selector(HOME_HEADING)
+
+    async def _login(self, page) -> None:
+        await page.click(LOGIN_LINK)
+        await page.fill('input[name="email"]', self.email)
+        await page.fill('input[name="password"]', self.password)
+        await page.click('form button[type="submit"]')
+        await page.wait_for_selector(USER_MENU)
+
+    async def _books(self, page) -> None:
+        await page.click(BOOKS_LINK)
+        await page.wait_for_selector(CATALOG_SEARCH)
+        await page.wait_for_selector(RESULT_LINK)
+
+    async def _book(self, page) -> None:
+        await page.locator(RESULT_LINK).first.click()
+        await page.wait_for_selector(CATALOG_SEARCH, state="detached")
+        await page.wait_for_selector(BOOK_BREADCRUMB)
+
+    async def _cart(self, page) -> None:
+        await page.click(CART_LINK)
+        await page.wait_for_selector(CART_HEADING)
+
+    async def _logout(self, page) -> None:
+        await page.click(USER_MENU)
+        await page.click(LOGOUT_BUTTON)
+        await page.wait_for_selector(LOGIN_LINK)
+
+    # Measurements
+
+    async def _measure(self, page, cdp) -> dict:
+        await cdp.send("HeapProfiler.collectGarbage")
+        usage = await cdp.send("Runtime.getHeapUsage")
+        counters = await cdp.send("Memory.getDOMCounters")
+        memory = await page.evaluate("() => performance.memory ? performance.memory.usedJSHeapSize : null")
+        return {
+            "heap_used": usage["usedSize"],
+            "heap_total": usage["totalSize"],
+            "js_heap_used": memory,
+            "documents": counters["documents"],
+            "nodes": counters["nodes"],
+            "listeners": counters["jsEventListeners"],
+        }
+
+    async def _snapshot(self, cdp, iteration: int) -> None:
+        chunks = []
+
+        def on_chunk(params):
+            chunks.append(params["chunk"])
+
+        cdp.on("HeapProfiler.addHeapSnapshotChunk", on_chunk)
+        try:
+            await cdp.send("HeapProfiler.takeHeapSnapshot", {"reportProgress": False})
+        finally:
+            cdp.remove_listener("HeapProfiler.addHeapSnapshotChunk", on_chunk)
+        text = "".join(chunks)
+        if self.snapshot_dir is not None:
+            self.snapshot_dir.mkdir(parents=True, exist_ok=True)
+            (self.snapshot_dir / f"soak-{iteration:04d}.heapsnapshot").write_text(text, encoding="utf-8")
+        self.snapshots.append({"iteration": iteration, "types": object_types(json.loads(text))})
+
+    def report(self) -> dict:
+        measured = [reading for reading in self.readings if reading["iteration"] > self.warmup]
+
+        def per_round(key):
+            return slope((reading["iteration"], reading[key]) for reading in measured)
+
+        heap_growth = per_round("heap_used")
+        growth_kb = heap_growth / 1024 if heap_growth is not None else None
+        deltas = []
+        if len(self.snapshots) >= 2:
+            deltas = type_deltas(self.snapshots[0]["types"], self.snapshots[-1]["types"])
+        return {
+            "flow": self.flow,
+            "iterations": self.iterations,
+            "warmup": self.warmup,
+            "growth_kb_per_round": growth_kb,
+            "nodes_per_round": per_round("nodes"),
+            "listeners_per_round": per_round("listeners"),
+            "max_growth_kb": self.max_growth_kb,
+            "flagged": growth_kb is not None and growth_kb > self.max_growth_kb,
+            "snapshots": [snapshot["iteration"] for snapshot in self.snapshots],
+            "retained": deltas,
+            "readings": self.readings,
+        }
+
+
+def format_report(report: dict) -> str:
+    first, last = report["readings"][0], report["readings"][-1]
+    lines = [
+        f"  {report['flow']} x {report['iterations']} (first {report['warmup']} not fitted)",
+        f"  heap used {first['heap_used'] / 1048576:.1f} MB -> {last['heap_used'] / 1048576:.1f} MB, "
+        f"DOM nodes {first['nodes']} -> {last['nodes']}, listeners {first['listeners']} -> {last['listeners']}",
+    ]
+    if report["growth_kb_per_round"] is not None:
+        verdict = "LEAK SUSPECTED" if report["flagged"] else "ok"
+        lines.append(f"  growth {report['growth_kb_per_round']:.1f} KB/round "
+                     f"(limit {report['max_growth_kb']:g}), {verdict}")
+    if report["retained"]:
+        lines.append(f"  retained between rounds {report['snapshots'][0]} and {report['snapshots'][-1]}:")
+        for delta in report["retained"][:10]:
+            lines.append(f"    {delta['bytes'] / 1024:>+9.1f} KB {delta['count']:>+7} x {delta['type'][:70]}")
+    return "\n".join(lines)
+
+
+async def _main(options: argparse.Namespace) -> dict:
+    backend = MockBackend(catalog=generate_catalog(options.mock_books)) if options.mock_backend else None
+    if backend is not None:
+        await backend.start()
+    try:
+        soak = Soak(
+            options.flow, options.iterations, warmup=options.warmup, snapshot_every=options.snapshot_every,
+            max_growth_kb=options.max_growth_kb, email=options.email, password=options.password,
+            timeout_ms=options.step_timeout, snapshot_dir=options.snapshot_dir, headless=not options.headed,
+        )
+        return await soak.run()
+    finally:
+        if backend is not None:
+            await backend.stop()
+            print(f"Mock backend on {backend.url}")
+            print(format_stats(backend.stats()))
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m harness.soak",
+                                     description="Loop a flow in one page and look for heap growth.")
+    parser.add_argument("--flow", choices=sorted(FLOWS), default="session",
+                        help="steps of each round (default: session)")
+    parser.add_argument("--iterations", type=int, default=30, help="rounds of the flow (default: 30)")
+    parser.add_argument("--warmup", type=int, default=3, help="first rounds left out of the fit (default: 3)")
+    parser.add_argument("--snapshot-every", type=int, default=10, metavar="N",
+                        help="take a heap snapshot every N rounds after the warm-up (default: 10)")
+    parser.add_argument("--max-growth-kb", type=float, default=50, metavar="KB",
+                        help="flag the run when the heap grows faster, per round (default: 50)")
+    parser.add_argument("--snapshot-dir", type=Path, metavar="DIR", help="also save the raw heap snapshots")
+    parser.add_argument("--email", default=DEFAULT_USERS[0]["email"], help="account of the login step")
+    parser.add_argument("--password", default=DEFAULT_USERS[0]["password"])
+    parser.add_argument("--step-timeout", type=float, default=15000, metavar="MS",
+                        help="timeout of each step (default: 15000)")
+    parser.add_argument("--headed", action="store_true", help="show the browser window")
+    parser.add_argument("--mock-backend", action="store_true",
+                        help="serve the REST API from the in-process mock")
+    parser.add_argument("--mock-books", type=int, default=24, metavar="N",
+                        help="size of the mock's catalog (default: 24)")
+    parser.add_argument("-o", "--output", type=Path, default=DEFAULT_REPORT,
+                        help="report file (default: tmp/soak.json)")
+    options = parser.parse_args(argv)
+
+    try:
+        report = asyncio.run(_main(options))
+    except SoakError as exc:
+        print(f"Soak run failed: {exc}")
+        return 2
+    print(format_report(report))
+    options.output.parent.mkdir(parents=True, exist_ok=True)
+    options.output.write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+    print(f"report written to {options.output}")
+    return 1 if report["flagged"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,107 @@
+"""Minimal source map (v3) reader for mapping profiler frames to ``src/``."""
+
+from __future__ import annotations
+
+import base64
+import json
+import re
+from bisect import bisect_right
+from urllib.parse import unquote, urljoin, urlsplit
+
+_BASE64 = {char: index for index, char in
+           enumerate("ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789+/")}
+SOURCE_MAPPING_URL = re.compile(r"//[#@] sourceMappingURL=(\S+)\s*$")
+
+
+def _vlq(segment: str) -> list[int]:
+    values, value, shift = [], 0, 0
+    for char in segment:
+        digit = _BASE64[char]
+        value += (digit & 31) << shift
+        if digit & 32:
+            shift += 5
+        else:
+            values.append(-(value >> 1) if value & 1 else value >> 1)
+            value = shift = 0
+    return values
+
+
+class SourceMap:
+    """Generated (line, column) -> original source, line, column and name.
+
+    Lines and columns are zero-based, as in CDP call frames.
+    """
+
+    def __init__(self, data: dict):
+        root = data.get("sourceRoot") or ""
+        if root and not root.endswith("/"):
+            root += "/"
+        self.sources = [root + source for source in data.get("sources", [])]
+        self.names = data.get("names", [])
+        self._lines: list[tuple[list[int], list[tuple]]] = []
+        source = line = column = name = 0
+        for text in data.get("mappings", "").split(";"):
+            generated = 0
+            columns, segments = [], []
+            for part in filter(None, text.split(",")):
+                fields = _vlq(part)
+                generated += fields[0]
+                if len(fields) < 4:
+                    continue
+                source += fields[1]
+                line += fields[2]
+                column += fields[3]
+                if len(fields) > 4:
+                    name += fields[4]
+                columns.append(generated)
+                segments.append((source, line, column, name if len(fields) > 4 else None))
+            self._lines.append((columns, segments))
+
+    @classmethod
+    def parse(cls, text: str) -> SourceMap:
+        return cls(json.loads(text))
+
+    def lookup(self, line: int, column: int) -> tuple[str, int, int, str | None] | None:
+        if not 0 <= line < len(self._lines):
+            return None
+        columns, segments = self._lines[line]
+        index = bisect_right(columns, column) - 1
+        if index < 0:
+            return None
+        source, original_line, original_column, name = segments[index]
+        return (self.sources[source], original_line, original_column,
+                self.names[name] if name is not None else None)
+
+
+def map_reference(script_url: str, script: str) -> str | None:
+    """The ``sourceMappingURL`` of ``script``, resolved against its URL."""
+    tail = script[-4096:].rstrip()
+    match = SOURCE_MAPPING_URL.search(tail)
+    if not match:
+        return None
+    reference = match.group(1)
+    return reference if reference.startswith("data:") else urljoin(script_url, reference)
+
+
+def decode_data_url(url: str) -> str:
+    header, _, payload = url.partition(",")
+    if header.endswith(";base64"):
+        return base64.b64decode(payload).decode("utf-8")
+    return unquote(payload)
+
+
+def source_file(path: str) -> str:
+    """A readable file name: ``src/...`` for the app, ``node_modules/<package>`` for deps."""
+    if "://" in path:
+        path = urlsplit(path).path
+    path = path.split("?")[0]
+    if "node_modules/" in path:
+        rest = path.rsplit("node_modules/", 1)[1]
+        parts = rest.split("/")
+        if parts[0] == ".vite":
+            return f"node_modules/{rest}"
+        return "node_modules/" + "/".join(parts[:2] if rest.startswith("@") else parts[:1])
+    index = path.find("src/")
+    if index >= 0:
+        return path[index:]
+    return path.lstrip("/") or path
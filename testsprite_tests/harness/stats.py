@@ -0,0 +1,108 @@
+"""Small numeric helpers shared by the reporting code."""
+
+from __future__ import annotations
+
+import math
+
+
+def percentile(values, q: float) -> float | None:
+    """Linear-interpolated ``q``-th percentile (0-100) of ``values``."""
+    ordered = sorted(values)
+    if not ordered:
+        return None
+    rank = (len(ordered) - 1) * q / 100
+    low, high = math.floor(rank), math.ceil(rank)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def median(values) -> float | None:
+    return percentile(values, 50)
+
+
+def slope(points) -> float | None:
+    """Least-squares slope of ``(x, y)`` points, None when x does not vary."""
+    points = list(points)
+    if len(points) < 2:
+        return None
+    mean_x = sum(x for x, _ in points) / len(points)
+    mean_y = sum(y for _, y in points) / len(points)
+    spread = sum((x - mean_x) ** 2 for x, _ in points)
+    if not spread:
+        return None
+    return sum((x - mean_x) * (y - mean_y) for x, y in points) / spread
+
+
+def summarize(values) -> dict:
+    """Count, mean and the usual latency percentiles of ``values``."""
+    values = list(values)
+    if not values:
+        return {"count": 0}
+    return {
+        "count": len(values),
+        "mean": sum(values) / len(values),
+        "p50": percentile(values, 50),
+        "p90": percentile(values, 90),
+        "p95": percentile(values, 95),
+        "p99": percentile(values, 99),
+        "max": max(values),
+    }
+
+
+class Histogram:
+    """Log-linear histogram of integer values, in the spirit of HdrHistogram.
+
+    Values below ``2 ** precision`` are counted exactly. Above that, each
+    power-of-two range is split into ``2 ** precision`` buckets, so a value
+    is reported with a relative error below ``2 ** -precision`` while memory
+    stays proportional to the number of distinct buckets hit.
+    """
+
+    def __init__(self, precision: int = 7):
+        self.precision = precision
+        self.counts: dict[int, int] = {}
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+    def _bucket(self, value: int) -> int:
+        # Keep ``precision`` bits below the leading one
+        shift = max(0, value.bit_length() - self.precision - 1)
+        return (value >> shift) << shift
+
+    def record(self, value: float) -> None:
+        value = max(0, int(value))
+        bucket = self._bucket(value)
+        self.counts[bucket] = self.counts.get(bucket, 0) + 1
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+
+    def merge(self, other: Histogram) -> None:
+        for bucket, count in other.counts.items():
+            self.counts[bucket] = self.counts.get(bucket, 0) + count
+        self.count += other.count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+
+    def percentile(self, q: float) -> int | None:
+        """Lower bound of the bucket holding the ``q``-th percentile."""
+        if not self.count:
+            return None
+        rank = max(1, math.ceil(self.count * q / 100))
+        seen = 0
+        for bucket in sorted(self.counts):
+            seen += self.counts[bucket]
+            if seen >= rank:
+                return bucket
+        return self.max
+
+    def summary(self, scale: float = 1.0) -> dict:
+        """Count, mean and percentiles, each value divided by ``scale``."""
+        if not self.count:
+            return {"count": 0}
+        return {
+            "count": self.count,
+            "mean": self.total / self.count / scale,
+            **{f"p{q:g}": self.percentile(q) / scale for q in (50, 90, 99, 99.9)},
+            "max": self.max / scale,
+        }
@@ -0,0 +1,245 @@
+"""localStorage write amplification in the cart and auth flows.
+
+``BookContext.jsx`` serializes and writes the whole cart to ``cart`` on
+every cart change, and ``AuthContext.jsx`` writes ``token``/``user`` at
+login and reads ``token`` in the axios interceptor on every request. An
+init script (``js/storage_trace.js``) wraps ``Storage.prototype`` and
+counts, per key and method, calls, bytes (UTF-16, as the quota counts
+them) and synchronous time, with the ``JSON.stringify`` of a written value
+and the ``JSON.parse`` of a read one attributed to the key.
+
+``StorageTracer`` stores the counts of each step of a script under its
+``storage`` key and the test's totals in its ``storage`` metrics; run it
+on TC011-TC014 to see the cart flows. Run as a module, it measures how the
+cost of a cart write grows with the cart instead: the mock backend's cart
+is filled with each of the ``--sizes``, ``/cart`` is opened with a seeded
+session, and every "Increase quantity" click is timed::
+
+    python -m harness.storage --sizes 10,50,100,250,500 --clicks 5
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import sys
+from collections import defaultdict
+from pathlib import Path
+
+from playwright.async_api import Error as PlaywrightError
+from playwright.async_api import async_playwright
+
+from .app import APP_URL, CART_KEY
+from .loader import SUITE_DIR
+from .mock_backend import DEFAULT_USERS, MockBackend, generate_catalog
+from .plugins import Plugin, read_js
+from .scaling import growth
+from .session import storage_state
+from .stats import summarize
+
+TAKE_JS = "() => window.__bhStorage ? window.__bhStorage.take() : null"
+WRITES_JS = "key => window.__bhStorage.writes(key)"
+WROTE_JS = "([key, before]) => window.__bhStorage.writes(key) > before"
+RENDERED_JS = "([selector, count]) => document.querySelectorAll(selector).length >= count"
+# storage_trace.js field -> metrics key
+FIELDS = {"calls": "calls", "bytes": "bytes", "ms": "ms", "serializeMs": "serialize_ms", "parseMs": "parse_ms"}
+DEFAULT_SIZES = (10, 50, 100, 250, 500)
+DEFAULT_REPORT = SUITE_DIR / "tmp" / "storage.json"
+CART_ITEM = '[aria-label^="Increase quantity of"]'
+
+
+def merge(total: dict, counts: dict) -> None:
+    """Add ``storage_trace.js`` counts (key -> method -> fields) into ``total``."""
+    for key, methods in counts.items():
+        for method, fields in methods.items():
+            entry = total.setdefault(key, {}).setdefault(method, dict.fromkeys(FIELDS, 0))
+            for field in FIELDS:
+                entry[field] += fields[field]
+
+
+def as_metrics(counts: dict) -> dict:
+    """``storage_trace.js`` counts with metrics names, zero fields left out."""
+    return {
+        key: {
+            method: {FIELDS[field]: round(value, 3) if isinstance(value, float) else value
+                     for field, value in entry.items() if value or field == "calls"}
+            for method, entry in sorted(methods.items())
+        }
+        for key, methods in sorted(counts.items())
+    }
+
+
+def sync_ms(counts: dict) -> float:
+    """Main-thread time of every call in ``counts``, serialization included."""
+    return sum(
+        entry["ms"] + entry["serializeMs"] + entry["parseMs"]
+        for methods in counts.values() for entry in methods.values()
+    )
+
+
+class StorageTracer(Plugin):
+    def __init__(self):
+        # Counts of the running step, and of the whole test
+        self._step: dict[object, dict] = {}
+        self._test: dict[object, dict] = {}
+
+    async def on_context(self, run, context) -> None:
+        self._step.setdefault(run, {})
+        self._test.setdefault(run, {})
+
+        def on_report(source, counts):
+            # Pages also unload when the test's contexts are closed
+            if run in self._step:
+                merge(self._step[run], counts)
+
+        await context.expose_binding("__bhStorageReport", on_report)
+        await context.add_init_script(read_js("storage_trace.js"))
+
+    async def after_step(self, run, step: dict) -> None:
+        counts = self._step.get(run)
+        if counts is None:
+            return
+        for page in run.pages():
+            try:
+                taken = await page.evaluate(TAKE_JS)
+            except PlaywrightError:
+                continue
+            if taken:
+                merge(counts, taken)
+        if counts:
+            step["storage"] = as_metrics(counts)
+            merge(self._test[run], counts)
+        self._step[run] = {}
+
+    async def after_test(self, run, result) -> None:
+        self._step.pop(run, None)
+        total = self._test.pop(run, None)
+        if total:
+            result.metrics["storage"] = as_metrics(total)
+
+
+def format_totals(results) -> str:
+    """Calls, bytes and sync time per key and method across ``results``."""
+    total = defaultdict(lambda: defaultdict(lambda: defaultdict(float)))
+    for result in results:
+        for key, methods in result.metrics.get("storage", {}).items():
+            for method, entry in methods.items():
+                for name, value in entry.items():
+                    total[key][method][name] += value
+    lines = []
+    for key, methods in sorted(total.items()):
+        for method, entry in sorted(methods.items()):
+            extra = entry["serialize_ms"] + entry["parse_ms"]
+            lines.append(f"    {key:<12} {method:<10} {entry['calls']:>6.0f} calls {entry['bytes'] / 1024:>9.1f} KB "
+                         f"{entry['ms']:>8.1f} ms" + (f" + {extra:.1f} ms JSON" if extra else ""))
+    return "\n".join(lines)
+
+
+class CartGrowth:
+    """Times cart writes with the mock backend's cart at each of ``sizes``."""
+
+    def __init__(self, sizes=DEFAULT_SIZES, clicks: int = 5, timeout_ms: float = 30000, headless: bool = True):
+        self.sizes = list(sizes)
+        self.clicks = clicks
+        self.timeout_ms = timeout_ms
+        self.headless = headless
+
+    async def run(self) -> list[dict]:
+        catalog = generate_catalog(max(self.sizes))
+        rows = []
+        async with MockBackend(catalog=catalog) as backend, async_playwright() as pw:
+            user = backend.users[DEFAULT_USERS[0]["email"]]
+            state = storage_state(backend.issue_token(user),
+                                  {key: user[key] for key in ("id", "username", "email", "createdAt")})
+            browser = await pw.chromium.launch(headless=self.headless)
+            try:
+                for size in self.sizes:
+                    backend.carts[user["id"]] = {book["id"]: {**book, "quantity": 1} for book in catalog[:size]}
+                    rows.append(await self._measure(browser, state, size))
+            finally:
+                await browser.close()
+        return rows
+
+    async def _measure(self, browser, state: dict, size: int) -> dict:
+        context = await browser.new_context(storage_state=state)
+        try:
+            await context.add_init_script(read_js("storage_trace.js"))
+            page = await context.new_page()
+            await page.goto(f"{APP_URL}/cart")
+            await page.wait_for_function(RENDERED_JS, arg=[CART_ITEM, size], timeout=self.timeout_ms)
+            # The save effect is debounced by 300 ms, so the loaded cart is not written yet
+            samples = [await self._sample(page, None)]
+            for _ in range(self.clicks):
+                samples.append(await self._sample(page, page.locator(CART_ITEM).first))
+        finally:
+            await context.close()
+        writes = [sample[CART_KEY]["setItem"] for sample in samples]
+        clicks = samples[1:]
+        return {
+            "items": size,
+            "bytes": writes[-1]["bytes"] // writes[-1]["calls"],
+            "serialize_ms": summarize(write["serializeMs"] / write["calls"] for write in writes),
+            "set_item_ms": summarize(write["ms"] / write["calls"] for write in writes),
+            "sync_ms_per_click": summarize(sync_ms(sample) for sample in clicks),
+            "calls_per_click": {
+                f"{key}.{method}": sum(sample.get(key, {}).get(method, {}).get("calls", 0)
+                                       for sample in clicks) / max(1, len(clicks))
+                for key, method in sorted({(key, method) for sample in clicks
+                                           for key, methods in sample.items() for method in methods})
+            },
+        }
+
+    async def _sample(self, page, button) -> dict:
+        """Counts from ``button``'s click (or now) to the next cart write."""
+        before = await page.evaluate(WRITES_JS, CART_KEY)
+        await page.evaluate(TAKE_JS)
+        if button is not None:
+            await button.click()
+        await page.wait_for_function(WROTE_JS, arg=[CART_KEY, before], timeout=self.timeout_ms)
+        return await page.evaluate(TAKE_JS)
+
+
+def format_growth(report: dict) -> str:
+    lines = [f"  {'items':>6} {'KB/write':>9} {'stringify':>10} {'setItem':>9} {'sync/click':>11}  calls/click"]
+    for row in report["sizes"]:
+        calls = ", ".join(f"{name} {count:g}" for name, count in row["calls_per_click"].items())
+        lines.append(f"  {row['items']:>6} {row['bytes'] / 1024:>9.1f} {row['serialize_ms']['p50']:>8.2f}ms "
+                     f"{row['set_item_ms']['p50']:>7.2f}ms {row['sync_ms_per_click'].get('p50', 0):>9.2f}ms  {calls}")
+    slopes = [f"{name} {value:.2f}" for name, value in report["growth"].items() if value is not None]
+    if slopes:
+        lines.append(f"  growth with cart size (log-log slope): {', '.join(slopes)}")
+    return "\n".join(lines)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m harness.storage",
+                                     description="Time cart writes to localStorage as the cart grows.")
+    parser.add_argument("--sizes", type=lambda text: [int(size) for size in text.split(",")],
+                        default=list(DEFAULT_SIZES), help="comma-separated cart sizes (default: 10,50,100,250,500)")
+    parser.add_argument("--clicks", type=int, default=5, help="quantity changes timed per size (default: 5)")
+    parser.add_argument("--timeout", type=float, default=30000, metavar="MS",
+                        help="give up waiting for the cart or a write after this long (default: 30000)")
+    parser.add_argument("--headed", action="store_true", help="show the browser window")
+    parser.add_argument("-o", "--output", type=Path, default=DEFAULT_REPORT,
+                        help="report file (default: tmp/storage.json)")
+    options = parser.parse_args(argv)
+
+    cart = CartGrowth(options.sizes, clicks=options.clicks, timeout_ms=options.timeout, headless=not options.headed)
+    rows = asyncio.run(cart.run())
+    report = {
+        "sizes": rows,
+        "growth": {
+            name: growth([(row["items"], row[name]["p50"]) for row in rows])
+            for name in ("serialize_ms", "set_item_ms")
+        },
+    }
+    print(format_growth(report))
+    options.output.parent.mkdir(parents=True, exist_ok=True)
+    options.output.write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+    print(f"report written to {options.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,53 @@
+import json
+
+import pytest
+
+from harness.budgets import DEFAULT_BUDGETS, BudgetError, Budgets, interaction_samples
+
+
+def test_shipped_budgets_are_valid():
+    budgets = Budgets.load()
+    assert budgets.needs_vitals
+    assert budgets.needs_chunks
+    assert DEFAULT_BUDGETS.exists()
+
+
+@pytest.mark.parametrize("data", [
+    {"routes": {"/": {"lcp": 2500}}},
+    {"interactions": {"Add to Cart": {"inp_ms": 100}}},
+    {"tests": {"TC001": {"lcp_ms": 100}}},
+])
+def test_unknown_metrics(data):
+    with pytest.raises(BudgetError, match="unknown"):
+        Budgets(**data).validate()
+
+
+def test_load_errors(tmp_path):
+    with pytest.raises(BudgetError, match="no budget file"):
+        Budgets.load(tmp_path / "missing.json")
+    path = tmp_path / "budgets.json"
+    path.write_text(json.dumps({"pages": {}}))
+    with pytest.raises(BudgetError, match="budgets.json"):
+        Budgets.load(path)
+    path.write_text('{"routes": ')
+    with pytest.raises(BudgetError, match="budgets.json"):
+        Budgets.load(path)
+
+
+def test_what_the_budgets_need():
+    chunks_only = Budgets(routes={"/": {"js_decoded_kb": 2048}})
+    assert chunks_only.needs_chunks and not chunks_only.needs_vitals
+    interactions = Budgets(interactions={"Add to Cart": {"duration_ms": 100}})
+    assert interactions.needs_vitals and not interactions.needs_chunks
+    tests_only = Budgets(tests={"TC001": {"duration_ms": 5000}})
+    assert not tests_only.needs_vitals and not tests_only.needs_chunks
+
+
+def test_interactions_under_the_event_timing_threshold_count_at_it():
+    metrics = {"vitals": {"navigations": [
+        # Add to Cart navigated: the input is counted on /books/1, the interaction on /cart
+        {"interactions": [], "inputs": {"Add to Cart": 3, "Search": 1}},
+        {"interactions": [{"label": "Add to Cart", "duration_ms": 120}], "inputs": {}},
+    ]}}
+    assert interaction_samples(metrics, "add to cart", "duration_ms") == [120, 16, 16]
+    assert interaction_samples(metrics, "Checkout", "duration_ms") == []
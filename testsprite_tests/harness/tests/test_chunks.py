@@ -0,0 +1,28 @@
+from harness.chunks import critical_path
+
+
+def chunk(name, start, end):
+    return {"name": name, "start_ms": start, "end_ms": end}
+
+
+CHUNKS = [
+    chunk("index.html", 0, 10),
+    chunk("main.js", 12, 40),
+    chunk("vendor.js", 12, 60),
+    chunk("styles.css", 12, 20),
+    chunk("Books.js", 62, 90),
+    chunk("late.js", 200, 250),
+]
+
+
+def test_chain_ends_at_the_last_chunk_before_render():
+    assert critical_path(CHUNKS, 100) == ["index.html", "vendor.js", "Books.js"]
+
+
+def test_without_render_every_chunk_counts():
+    assert critical_path(CHUNKS, None) == ["index.html", "vendor.js", "Books.js", "late.js"]
+
+
+def test_nothing_before_render():
+    assert critical_path(CHUNKS, 5) == []
+    assert critical_path([], None) == []
@@ -0,0 +1,56 @@
+from harness import runner
+from harness.flaky import RetryPolicy, flip_rate, quarantined, signature
+
+
+def failed(error):
+    return runner.TestResult("TC001", "TC001-title", "FAILED", error, 0, 1)
+
+
+def test_signature_masks_numbers_and_keeps_the_first_line():
+    error = "TimeoutError:  Timeout 30000ms exceeded.\nCall log:\n  - waiting for locator"
+    assert signature(error) == "TimeoutError: Timeout NNNNNms exceeded."
+    assert signature(None) == ""
+
+
+def test_flip_rate():
+    assert flip_rate(["PASSED", "FAILED", "PASSED", "FAILED"]) == 1.0
+    assert flip_rate(["PASSED", "PASSED", "FAILED", "FAILED", "PASSED"]) == 0.5
+    assert flip_rate(["FAILED"] * 5) == 0.0
+    assert flip_rate(["PASSED"]) == 0.0
+
+
+def test_timing_failures_are_flaky():
+    policy = RetryPolicy()
+    assert policy.is_flaky("TimeoutError: Locator.click: Timeout 5000ms exceeded.")
+    assert policy.is_flaky("Error: Element is not attached to the DOM")
+    assert policy.is_flaky("Error: page.goto: net::ERR_CONNECTION_REFUSED at http://localhost:5173/")
+
+
+def test_assertions_are_not_flaky():
+    policy = RetryPolicy()
+    assert not policy.is_flaky("Expected cart count to be 2")
+    assert not policy.is_flaky("")
+    assert not policy.is_flaky(None)
+
+
+def test_known_signatures_are_flaky():
+    error = "Error: cart badge shows 0 after 3 clicks"
+    assert RetryPolicy(known={signature(error)}).is_flaky("Error: cart badge shows 0 after 4 clicks")
+
+
+def test_retries_are_bounded():
+    policy = RetryPolicy(retries=2)
+    timeout = failed("TimeoutError: Timeout 5000ms exceeded.")
+    assert policy.should_retry(timeout, 1)
+    assert policy.should_retry(timeout, 2)
+    assert not policy.should_retry(timeout, 3)
+    assert not RetryPolicy(retries=0).should_retry(timeout, 1)
+
+
+def test_quarantine_needs_enough_runs():
+    table = {
+        "TC001": {"score": 0.5, "runs": 10},
+        "TC002": {"score": 0.5, "runs": 3},
+        "TC003": {"score": 0.1, "runs": 30},
+    }
+    assert quarantined(table) == {"TC001"}
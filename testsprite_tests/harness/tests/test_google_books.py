@@ -0,0 +1,15 @@
+from harness.google_books import VOLUMES_URL, fixture_key, normalized_request
+
+
+def test_key_ignores_api_key_case_and_spacing():
+    plain = fixture_key(f"{VOLUMES_URL}?q=harry+potter&maxResults=20")
+    assert fixture_key(f"{VOLUMES_URL}?maxResults=20&q=Harry%20%20Potter&key=secret") == plain
+
+
+def test_key_tells_pages_apart():
+    assert fixture_key(f"{VOLUMES_URL}?q=fiction&startIndex=0") != fixture_key(f"{VOLUMES_URL}?q=fiction&startIndex=20")
+
+
+def test_normalized_request():
+    assert normalized_request(f"{VOLUMES_URL}?q=%20Dune%20&key=k&printType=books") == {
+        "printType": "books", "q": "dune"}
@@ -0,0 +1,54 @@
+import json
+
+from harness.har import HarArchive, recordings
+
+API = "https://www.googleapis.com/books/v1/volumes"
+
+
+def entry(url, body, method="GET"):
+    return {"request": {"method": method, "url": url}, "response": {"status": 200, "content": {"text": body}}}
+
+
+def body(response):
+    return response["content"]["text"]
+
+
+def test_exact_match_ignores_volatile_params():
+    archive = HarArchive([entry(f"{API}?q=dune&maxResults=20", "dune")])
+    assert body(archive.match("get", f"{API}?maxResults=20&q=dune&_=123&key=k")) == "dune"
+
+
+def test_repeats_are_served_in_order_then_the_last_again():
+    url = "http://localhost:8080/api/cart"
+    archive = HarArchive([entry(url, "empty"), entry(url, "one item")])
+    assert [body(archive.match("GET", url)) for _ in range(3)] == ["empty", "one item", "one item"]
+
+
+def test_fallback_keeps_query_page_and_size():
+    archive = HarArchive([
+        entry(f"{API}?q=dune&startIndex=0&maxResults=20&orderBy=relevance", "relevance"),
+        entry(f"{API}?q=dune&startIndex=20&maxResults=20", "page two"),
+    ])
+    hit = archive.match("GET", f"{API}?q=dune&startIndex=0&maxResults=20&orderBy=newest")
+    assert body(hit) == "relevance"
+    assert archive.match("GET", f"{API}?q=dune&startIndex=40&maxResults=20") is None
+    assert archive.match("GET", f"{API}?q=emma&startIndex=0&maxResults=20") is None
+
+
+def test_method_and_path_must_match():
+    archive = HarArchive([entry("http://localhost:8080/api/books", "books")])
+    assert archive.match("POST", "http://localhost:8080/api/books") is None
+    assert archive.match("GET", "http://localhost:8080/api/books/1") is None
+
+
+def test_load_merges_files(tmp_path):
+    for index, url in enumerate(("http://a/one", "http://a/two")):
+        (tmp_path / f"TC001.{index}.har").write_text(json.dumps({"log": {"entries": [entry(url, url)]}}))
+    archive = HarArchive.load(*recordings("TC001", tmp_path))
+    assert body(archive.match("GET", "http://a/two")) == "http://a/two"
+
+
+def test_recordings_in_numeric_order(tmp_path):
+    for name in ("TC001.10.har", "TC001.har", "TC001.2.har", "TC0010.har", "TC001.meta.json"):
+        (tmp_path / name).write_text("{}")
+    assert [path.name for path in recordings("TC001", tmp_path)] == ["TC001.har", "TC001.2.har", "TC001.10.har"]
@@ -0,0 +1,67 @@
+import pytest
+
+from harness import runner
+from harness.history import History, numeric_leaves
+
+
+def result(test_id, status="PASSED", started=0.0, seconds=1.0, **metrics):
+    return runner.TestResult(test_id, f"{test_id}-title", status, None if status == "PASSED" else "boom",
+                             started, started + seconds, metrics)
+
+
+@pytest.fixture
+def history(tmp_path):
+    with History(tmp_path / "history.sqlite") as history:
+        yield history
+
+
+def test_durations_are_newest_first(history):
+    run_id = history.begin_run(revision="abc")
+    for started, seconds, status in ((100, 1.0, "PASSED"), (200, 2.0, "FAILED"), (300, 3.0, "PASSED")):
+        history.record(run_id, result("TC001", status, started, seconds))
+    history.record(run_id, result("TC002", started=150))
+    assert history.durations("TC001") == [(3000.0, "PASSED"), (2000.0, "FAILED"), (1000.0, "PASSED")]
+    assert history.durations("TC001", last=1) == [(3000.0, "PASSED")]
+    assert history.durations("TC003") == []
+
+
+def test_stats(history):
+    run_id = history.begin_run(revision="")
+    for started, status in enumerate(("PASSED", "FAILED", "PASSED", "PASSED")):
+        history.record(run_id, result("TC001", status, started, 1 + started))
+    stats = history.stats("TC001")
+    assert stats["count"] == 4
+    assert stats["p50"] == 2500.0
+    assert stats["pass_rate"] == 0.75
+    assert history.stats("TC009") == {"count": 0}
+
+
+def test_runs_count_their_tests(history):
+    first = history.begin_run(["--repeat", "2"], started_at=10, revision="abc")
+    second = history.begin_run(started_at=20, revision="def")
+    history.record(first, result("TC001"))
+    history.record(first, result("TC002", "FAILED"))
+    history.finish_run(first, finished_at=15)
+    runs = history.runs()
+    assert [run["id"] for run in runs] == [second, first]
+    assert (runs[1]["tests"], runs[1]["passed"], runs[1]["revision"]) == (2, 1, "abc")
+    assert runs[0]["tests"] == 0
+    assert history.latest_run() == second
+    assert [run["id"] for run in history.runs(limit=1)] == [second]
+
+
+def test_results_round_trip(history):
+    run_id = history.begin_run(revision="")
+    steps = [{"label": "start", "offset_ms": 0.0, "duration_ms": 5.0},
+             {"label": "Click", "offset_ms": 5.0, "duration_ms": 30.0, "inp_ms": 48}]
+    history.record(run_id, result("TC001", steps=steps, waits={"saved_ms": 1200}), legacy_id="uuid-1")
+    (stored, legacy_id), = history.results(run_id)
+    assert legacy_id == "uuid-1"
+    assert stored.metrics == {"steps": steps, "waits": {"saved_ms": 1200}}
+    row = history.db.execute("SELECT value FROM test_metrics WHERE name = 'waits.saved_ms'").fetchone()
+    assert row["value"] == 1200
+
+
+def test_numeric_leaves():
+    metrics = {"a": 1, "b": {"c": 2.5, "d": [1, 2], "e": True}, "f": "x"}
+    assert dict(numeric_leaves(metrics)) == {"a": 1, "b.c": 2.5}
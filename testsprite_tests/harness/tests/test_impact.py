@@ -0,0 +1,75 @@
+import pytest
+
+from harness.impact import ENTRY, HOME, ROUTER, closure, select
+
+GRAPH = {
+    ENTRY: [(ROUTER, False), ("src/index.css", False)],
+    "src/index.css": [],
+    ROUTER: [(HOME, True), ("src/pages/Books.jsx", True), ("src/pages/Cart.jsx", True),
+             ("src/components/Header.jsx", True), ("src/components/Footer.jsx", True)],
+    "src/components/Header.jsx": [("src/context/AuthContext.jsx", False)],
+    "src/components/Footer.jsx": [],
+    HOME: [("src/components/Hero.jsx", False)],
+    "src/components/Hero.jsx": [],
+    "src/context/AuthContext.jsx": [],
+    "src/pages/Books.jsx": [("src/components/BookCard.jsx", False), ("src/pages/BookModal.jsx", True)],
+    "src/pages/BookModal.jsx": [],
+    "src/components/BookCard.jsx": [],
+    "src/pages/Cart.jsx": [("src/utils/price.js", False)],
+    "src/utils/price.js": [],
+    "src/unused.js": [],
+}
+FEATURES = {
+    "Books Catalog": ["src/pages/Books.jsx"],
+    "Shopping Cart": ["src/pages/Cart.jsx"],
+}
+TESTS = ["TC007", "TC012", "TC018"]
+
+
+def selected(changed):
+    return sorted(select(changed, TESTS, GRAPH, FEATURES).reasons)
+
+
+def test_closure_follows_lazy_imports_except_the_routers():
+    assert list(closure(GRAPH, ["src/pages/Books.jsx"])) == [
+        "src/pages/Books.jsx", "src/components/BookCard.jsx", "src/pages/BookModal.jsx"]
+    assert list(closure(GRAPH, ["src/pages/Books.jsx"], follow_lazy=False)) == [
+        "src/pages/Books.jsx", "src/components/BookCard.jsx"]
+    assert set(closure(GRAPH, [ENTRY])) == {ENTRY, ROUTER, "src/index.css"}
+
+
+def test_closure_records_the_importer():
+    parents = closure(GRAPH, [ENTRY, "src/missing.js"])
+    assert parents[ENTRY] is None
+    assert parents["src/index.css"] == ENTRY
+    assert "src/missing.js" not in parents
+
+
+@pytest.mark.parametrize("changed, tests", [
+    (["src/components/BookCard.jsx"], ["TC007"]),
+    (["src/utils/price.js"], ["TC012"]),
+    (["src/pages/BookModal.jsx"], ["TC007"]),
+    (["src/index.css"], TESTS),
+    (["src/context/AuthContext.jsx"], TESTS),
+    ([HOME], TESTS),
+    (["src/components/Hero.jsx"], TESTS),
+    (["package.json"], TESTS),
+    (["testsprite_tests/harness/runner.py"], TESTS),
+    (["testsprite_tests/TC012_Cart.py"], ["TC012"]),
+    (["testsprite_tests/TC001_Login.py"], []),
+    (["src/unused.js", "README.md", "testsprite_tests/harness/README.md"], []),
+    (["testsprite_tests/harness/tests/test_impact.py"], []),
+])
+def test_select(changed, tests):
+    assert selected(changed) == tests
+
+
+def test_unreached_files_are_ignored():
+    selection = select(["src/unused.js", "README.md"], TESTS, GRAPH, FEATURES)
+    assert selection.ignored == ["src/unused.js", "README.md"]
+
+
+def test_reasons_show_the_import_chain():
+    selection = select(["src/components/BookCard.jsx"], TESTS, GRAPH, FEATURES)
+    assert selection.reasons == {
+        "TC007": ["Books Catalog: src/pages/Books.jsx -> src/components/BookCard.jsx"]}
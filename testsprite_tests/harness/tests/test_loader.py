@@ -0,0 +1,123 @@
+import asyncio
+import textwrap
+
+import pytest
+
+from harness import loader
+from harness.loader import discover, load_module, step_comments
+
+SCRIPT = textwrap.dedent("""\
+    import asyncio
+
+    ran = []
+
+
+    class Locator:
+        async def click(self, **options):
+            ran.append("click")
+
+
+    async def run_test():
+        page = None
+        elem = Locator()
+        # -> Open the page
+        ran.append("open")
+        try:
+            # -> Click the button
+            await page.wait_for_timeout(3000)
+            await elem.click(timeout=10000)
+            await asyncio.sleep(2)
+        finally:
+            ran.append("done")
+
+    asyncio.run(run_test())
+""")
+
+
+class FakeHarness:
+    def __init__(self):
+        self.calls = []
+
+    async def pause(self, ms, page=None, target=None):
+        self.calls.append(("pause", ms, page, target))
+
+    async def step(self, label):
+        self.calls.append(("step", label))
+
+
+@pytest.fixture
+def script(tmp_path):
+    path = tmp_path / "TC999_Sample_script.py"
+    path.write_text(SCRIPT, encoding="utf-8")
+    return loader.TestScript("TC999", "Sample script", path)
+
+
+def test_loading_does_not_run_the_test(script):
+    module = load_module(script, {"__harness__": FakeHarness()})
+    assert module.ran == []
+    assert asyncio.iscoroutinefunction(module.run_test)
+
+
+def test_pauses_and_steps_are_rewritten(script):
+    harness = FakeHarness()
+    module = load_module(script, {"__harness__": harness})
+    asyncio.run(module.run_test())
+    target = harness.calls[2][3]
+    assert isinstance(target, module.Locator)
+    assert harness.calls == [
+        ("step", "Open the page"),
+        ("step", "Click the button"),
+        ("pause", 3000, None, target),
+        ("pause", 2000, None, None),
+    ]
+    assert module.ran == ["open", "click", "done"]
+
+
+def test_line_numbers_are_kept(script):
+    source = SCRIPT.replace('ran.append("open")', 'raise RuntimeError("boom")')
+    script.path.write_text(source, encoding="utf-8")
+    module = load_module(script, {"__harness__": FakeHarness()})
+    with pytest.raises(RuntimeError) as info:
+        asyncio.run(module.run_test())
+    frame = info.traceback[-1]
+    assert frame.path == script.path
+    # pytest counts from zero, as does index()
+    assert frame.lineno == source.splitlines().index('    raise RuntimeError("boom")')
+
+
+def test_overrides_replace_imported_names(script):
+    module = load_module(script, {"asyncio": "replaced"})
+    assert module.asyncio == "replaced"
+
+
+def test_each_load_gets_fresh_globals(script):
+    first = load_module(script)
+    first.ran.append("x")
+    assert load_module(script).ran == []
+
+
+def test_step_comments():
+    source = "# -> Open\nx = 1  # not a step\n# --> Assertions to verify final state\n"
+    assert step_comments(source) == {1: "Open", 3: "Assertions to verify final state"}
+
+
+def test_consecutive_comments_make_one_step(tmp_path):
+    path = tmp_path / "TC998_Comments.py"
+    path.write_text(textwrap.dedent("""\
+        async def run_test():
+            # -> Fill in the form
+            # -> Submit it
+            pass
+    """), encoding="utf-8")
+    harness = FakeHarness()
+    module = load_module(loader.TestScript("TC998", "Comments", path), {"__harness__": harness})
+    asyncio.run(module.run_test())
+    assert harness.calls == [("step", "Submit it")]
+
+
+def test_discover_sorts_and_filters(tmp_path):
+    for name in ("TC002_Second.py", "TC001_First_one.py", "notes.py", "TC003_Third.py"):
+        (tmp_path / name).write_text("", encoding="utf-8")
+    assert [(s.test_id, s.title) for s in discover(tmp_path)] == [
+        ("TC001", "First one"), ("TC002", "Second"), ("TC003", "Third")]
+    assert [s.test_id for s in discover(tmp_path, ["tc003", "TC001"])] == ["TC001", "TC003"]
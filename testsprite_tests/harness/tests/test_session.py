@@ -0,0 +1,38 @@
+import base64
+import json
+
+import pytest
+
+from harness.session import is_valid_token, token_expiry
+
+
+def jwt(payload, pad=False):
+    encoded = base64.b64encode(json.dumps(payload).encode()).decode()
+    return f"header.{encoded if pad else encoded.rstrip('=')}.signature"
+
+
+def test_expiry_of_a_jwt():
+    assert token_expiry(jwt({"exp": 1700000000})) == 1700000000
+    assert token_expiry(jwt({"exp": 1700000000}, pad=True)) == 1700000000
+
+
+@pytest.mark.parametrize("token", [
+    None, "", "undefined", "null", "   ", "opaque-token",
+    jwt({"sub": "1"}), "header.!!!.signature", "header.e30.signature",
+])
+def test_no_readable_expiry(token):
+    assert token_expiry(token) is None
+
+
+def test_validity_follows_isValidToken():
+    now = 1700000000
+    assert is_valid_token(jwt({"exp": now + 60}), now)
+    assert not is_valid_token(jwt({"exp": now}), now)
+    assert not is_valid_token(jwt({"sub": "1"}), now)
+    assert not is_valid_token("header.!!!.signature", now)
+
+
+def test_opaque_tokens_are_valid():
+    assert is_valid_token("4f9c2a0e-opaque")
+    assert not is_valid_token("undefined")
+    assert not is_valid_token(None)
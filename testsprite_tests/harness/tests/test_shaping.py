@@ -0,0 +1,65 @@
+import json
+
+import pytest
+
+from harness.shaping import PROFILE_DIR, Profile, ProfileError, Rule, load_profile
+
+
+def test_rule_counts_only_matching_methods():
+    rule = Rule(url="**/api/cart/add", method="post", fault="status", status=401, times=1)
+    assert not rule.applies("GET")
+    assert rule.applies("POST")
+    assert not rule.applies("post")
+    assert rule.matched == 2
+
+
+def test_rule_skips_then_shapes_times():
+    rule = Rule(url="**/api/books", skip=1, times=2)
+    assert [rule.applies("GET") for _ in range(5)] == [False, True, True, False, False]
+
+
+def test_rule_without_times_shapes_every_request():
+    rule = Rule(url="**/*")
+    assert all(rule.applies("GET") for _ in range(10))
+
+
+def test_fault_classes():
+    assert Rule(url="*", fault="status", status=503).fault_class == "5xx"
+    assert Rule(url="*", fault="status", status=401).fault_class == "401"
+    assert Rule(url="*", fault="hang").fault_class == "timeout"
+    assert Rule(url="*").fault_class is None
+
+
+def test_unknown_fault():
+    with pytest.raises(ProfileError):
+        Rule(url="*", fault="drop")
+
+
+def test_network_conditions_in_bytes_per_second():
+    profile = Profile("slow", [], network={"latency_ms": 400, "download_kbps": 400})
+    assert profile.network_conditions() == {
+        "offline": False, "latency": 400, "downloadThroughput": 50000.0, "uploadThroughput": -1}
+    assert Profile("none", []).network_conditions() is None
+
+
+@pytest.mark.parametrize("network", [{"bandwidth_kbps": 100}, {"download_kbps": 0}])
+def test_bad_network(network):
+    with pytest.raises(ProfileError):
+        Profile("bad", [], network=network).network_conditions()
+
+
+@pytest.mark.parametrize("path", sorted(PROFILE_DIR.glob("*.json")), ids=lambda path: path.stem)
+def test_shipped_profiles_load(path):
+    assert load_profile(path.stem).name
+
+
+def test_bad_profiles(tmp_path):
+    with pytest.raises(ProfileError):
+        load_profile("no-such-profile")
+    path = tmp_path / "bad.json"
+    path.write_text(json.dumps({"name": "bad", "rules": [{"url": "*", "bandwidth_kbps": 1}]}))
+    with pytest.raises(ProfileError):
+        load_profile(path)
+    path.write_text('{"name": "bad", "rules": [')
+    with pytest.raises(ProfileError, match="bad.json"):
+        load_profile(path)
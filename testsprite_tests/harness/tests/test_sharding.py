@@ -0,0 +1,24 @@
+from pathlib import Path
+
+from harness import loader
+from harness.sharding import plan_shards
+
+
+def scripts(count):
+    return [loader.TestScript(f"TC{n:03d}", "t", Path(f"TC{n:03d}_t.py")) for n in range(1, count + 1)]
+
+
+def test_round_robin():
+    shards = plan_shards(scripts(5), 2)
+    assert [[s.test_id for s in shard] for shard in shards] == [
+        ["TC001", "TC003", "TC005"], ["TC002", "TC004"]]
+
+
+def test_no_empty_shards():
+    assert len(plan_shards(scripts(3), 8)) == 3
+    assert plan_shards(scripts(2), 0) == [scripts(2)]
+
+
+def test_every_script_once():
+    planned = [s for shard in plan_shards(scripts(25), 4) for s in shard]
+    assert sorted(planned, key=lambda s: s.test_id) == scripts(25)
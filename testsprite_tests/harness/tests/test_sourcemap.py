@@ -0,0 +1,60 @@
+import base64
+import json
+
+import pytest
+
+from harness.sourcemap import SourceMap, _vlq, decode_data_url, map_reference, source_file
+
+
+@pytest.mark.parametrize("segment, values", [
+    ("A", [0]), ("C", [1]), ("D", [-1]), ("gB", [16]), ("hB", [-16]), ("AAgBC", [0, 0, 16, 1]),
+])
+def test_vlq(segment, values):
+    assert _vlq(segment) == values
+
+
+MAP = {
+    "version": 3,
+    "sourceRoot": "webpack:",
+    "sources": ["src/App.tsx", "node_modules/react/index.js"],
+    "names": ["App", "render"],
+    # line 0: col 0 -> App.tsx 0:0 "App", col 4 -> App.tsx 0:4; line 1: col 2 -> react 5:0 "render"
+    "mappings": "AAAAA,IAAI;ECKJC",
+}
+
+
+def test_lookup():
+    source_map = SourceMap(MAP)
+    assert source_map.lookup(0, 0) == ("webpack:/src/App.tsx", 0, 0, "App")
+    assert source_map.lookup(0, 3) == ("webpack:/src/App.tsx", 0, 0, "App")
+    assert source_map.lookup(0, 99) == ("webpack:/src/App.tsx", 0, 4, None)
+    assert source_map.lookup(1, 2) == ("webpack:/node_modules/react/index.js", 5, 0, "render")
+
+
+def test_lookup_outside_the_mappings():
+    source_map = SourceMap(MAP)
+    assert source_map.lookup(1, 0) is None
+    assert source_map.lookup(2, 0) is None
+    assert source_map.lookup(-1, 0) is None
+
+
+def test_map_reference():
+    script = "console.log(1)\n//# sourceMappingURL=index-abc.js.map\n"
+    assert map_reference("http://localhost:5173/assets/index-abc.js", script) == \
+        "http://localhost:5173/assets/index-abc.js.map"
+    assert map_reference("http://x/a.js", "//# sourceMappingURL=data:application/json,{}") == \
+        "data:application/json,{}"
+    assert map_reference("http://x/a.js", "console.log(1)") is None
+
+
+def test_data_urls():
+    text = json.dumps(MAP)
+    encoded = base64.b64encode(text.encode()).decode()
+    assert decode_data_url(f"data:application/json;base64,{encoded}") == text
+    assert decode_data_url("data:application/json,%7B%7D") == "{}"
+
+
+def test_source_file():
+    assert source_file("http://localhost:5173/src/pages/Books.jsx?t=1") == "src/pages/Books.jsx"
+    assert source_file("webpack:/node_modules/react-dom/cjs/react-dom.js") == "node_modules/react-dom"
+    assert source_file("/node_modules/@remix-run/router/dist/router.js") == "node_modules/@remix-run/router"
@@ -0,0 +1,61 @@
+import pytest
+
+from harness.stats import Histogram, median, percentile, slope, summarize
+
+
+def test_percentile_interpolates():
+    assert percentile([1, 2, 3, 4], 50) == 2.5
+    assert percentile([10, 1, 5], 0) == 1
+    assert percentile([10, 1, 5], 100) == 10
+    assert percentile([], 50) is None
+    assert median([3, 1, 2]) == 2
+
+
+def test_slope():
+    assert slope([(0, 1), (1, 3), (2, 5)]) == pytest.approx(2)
+    assert slope([(1, 1), (1, 2)]) is None
+    assert slope([(0, 1)]) is None
+
+
+def test_summarize():
+    summary = summarize(range(1, 101))
+    assert summary["count"] == 100
+    assert summary["mean"] == 50.5
+    assert summary["p50"] == 50.5
+    assert summary["max"] == 100
+    assert summarize([]) == {"count": 0}
+
+
+def test_histogram_small_values_are_exact():
+    histogram = Histogram()
+    for value in range(1, 101):
+        histogram.record(value)
+    assert histogram.percentile(50) == 50
+    assert histogram.percentile(99) == 99
+    assert histogram.percentile(100) == 100
+
+
+def test_histogram_relative_error_is_bounded():
+    histogram = Histogram(precision=7)
+    values = [1000 + 37 * n for n in range(2000)]
+    for value in values:
+        histogram.record(value)
+    for q in (50, 90, 99, 99.9):
+        exact = percentile(values, q)
+        assert histogram.percentile(q) <= exact
+        assert (exact - histogram.percentile(q)) / exact < 2 ** -7 + 0.001
+
+
+def test_histogram_merge_and_summary():
+    first, second = Histogram(), Histogram()
+    for value in (10, 20):
+        first.record(value)
+    for value in (30.7, -5):
+        second.record(value)
+    first.merge(second)
+    assert first.count == 4
+    assert first.max == 30
+    assert first.summary(scale=10) == {"count": 4, "mean": 1.5, "p50": 1.0, "p90": 3.0, "p99": 3.0,
+                                       "p99.9": 3.0, "max": 3.0}
+    assert Histogram().summary() == {"count": 0}
+    assert Histogram().percentile(50) is None
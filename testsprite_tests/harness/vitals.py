@@ -0,0 +1,115 @@
+"""Per-route Core Web Vitals from the functional tests.
+
+An init script (``js/vitals.js``) observes paint, largest-contentful-paint,
+layout-shift, longtask and event-timing entries and watches the Suspense
+fallbacks. It keeps one record per route the page visits, whether by a
+document load or by a react-router navigation, and reports it when the
+route changes. After each test the records are stored in the result's
+``vitals`` metrics, both as the list of navigations and summarised per
+App.tsx route.
+"""
+
+from __future__ import annotations
+
+from collections import defaultdict
+
+from playwright.async_api import Error as PlaywrightError
+
+from .app import route_pattern
+from .plugins import Plugin, read_js
+from .stats import median
+
+FLUSH_JS = "() => window.__bhVitals ? window.__bhVitals.flush() : null"
+# The lowest durationThreshold of the Event Timing API; faster events are not reported
+EVENT_THRESHOLD_MS = 16
+
+# vitals.js field -> metrics key
+FIELDS = {
+    "fcpMs": "fcp_ms",
+    "lcpMs": "lcp_ms",
+    "cls": "cls",
+    "longTasks": "long_tasks",
+    "longTaskMs": "long_task_ms",
+    "longestTaskMs": "longest_task_ms",
+    "suspenseMs": "suspense_ms",
+}
+
+
+def navigation(record: dict) -> dict:
+    entry = {"route": route_pattern(record["path"]), "path": record["path"], "kind": record["kind"]}
+    for name, key in FIELDS.items():
+        value = record.get(name)
+        entry[key] = round(value, 4 if key == "cls" else 1) if value is not None else None
+    entry["interactions"] = [
+        {"type": item["type"], "label": item["label"], "duration_ms": item["durationMs"]}
+        for item in record.get("interactions", [])
+    ]
+    # Per label, including the interactions too fast for Event Timing to report
+    entry["inputs"] = dict(record.get("inputs", {}))
+    return entry
+
+
+def summarize_routes(navigations) -> dict[str, dict]:
+    """Median of every measurement per route, ignoring missing values."""
+    by_route = defaultdict(list)
+    for entry in navigations:
+        by_route[entry["route"]].append(entry)
+    summary = {}
+    for route, entries in sorted(by_route.items()):
+        row = {"navigations": len(entries)}
+        for key in FIELDS.values():
+            values = [entry[key] for entry in entries if entry.get(key) is not None]
+            if values:
+                row[key] = median(values)
+        summary[route] = row
+    return summary
+
+
+class WebVitals(Plugin):
+    def __init__(self):
+        self._records: dict[object, list[dict]] = {}
+
+    async def on_context(self, run, context) -> None:
+        records = self._records.setdefault(run, [])
+
+        def on_report(source, record):
+            records.append(record)
+
+        await context.expose_binding("__bhVitalsReport", on_report)
+        await context.add_init_script(read_js("vitals.js"))
+
+    async def after_test(self, run, result) -> None:
+        records = self._records.pop(run, None)
+        if records is None:
+            return
+        for page in run.pages():
+            try:
+                record = await page.evaluate(FLUSH_JS)
+            except PlaywrightError:
+                continue
+            if record:
+                records.append(record)
+        navigations = [navigation(record) for record in records]
+        result.metrics["vitals"] = {"navigations": navigations, "routes": summarize_routes(navigations)}
+
+
+def format_routes(results) -> str:
+    """Per-route medians across every test in ``results``, as a table."""
+    navigations = [
+        entry for result in results for entry in result.metrics.get("vitals", {}).get("navigations", [])
+    ]
+    columns = (("fcp_ms", "FCP"), ("lcp_ms", "LCP"), ("cls", "CLS"),
+               ("long_task_ms", "long tasks"), ("suspense_ms", "Suspense"))
+    lines = [f"  {'route':<16} {'visits':>6}" + "".join(f" {label:>10}" for _, label in columns)]
+    for route, row in summarize_routes(navigations).items():
+        cells = []
+        for key, _ in columns:
+            value = row.get(key)
+            if value is None:
+                cells.append(f" {'-':>10}")
+            elif key == "cls":
+                cells.append(f" {value:>10.3f}")
+            else:
+                cells.append(f" {value:>8.0f}ms")
+        lines.append(f"  {route:<16} {row['navigations']:>6}" + "".join(cells))
+    return "\n".join(lines)
@@ -0,0 +1,113 @@
+"""Event-driven replacement for the scripts' fixed sleeps.
+
+The loader rewrites every ``page.wait_for_timeout(ms)`` and
+``asyncio.sleep(s)`` in a script into ``__harness__.pause(ms, ...)``, which
+lands in ``TestRun.pause`` and from there in the runner's wait engine.
+``FixedWaits`` sleeps for the full duration, exactly as the script would
+have. ``WaitEngine`` returns as soon as the app is ready, never later than
+the original duration.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from dataclasses import asdict, dataclass
+
+from playwright.async_api import Error as PlaywrightError
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+
+from .plugins import Plugin, read_js
+
+READY_PREDICATE = "quietMs => !!window.__bhReady && window.__bhReady.isReady(quietMs)"
+
+
+@dataclass
+class WaitStats:
+    pauses: int = 0
+    fixed_ms: float = 0.0
+    waited_ms: float = 0.0
+    ceilings_hit: int = 0
+
+    @property
+    def saved_ms(self) -> float:
+        return self.fixed_ms - self.waited_ms
+
+    def as_dict(self) -> dict:
+        return {**asdict(self), "saved_ms": self.saved_ms}
+
+
+class FixedWaits(Plugin):
+    """Sleep for exactly as long as the script asked."""
+
+    async def pause(self, run, ms: float, page=None, target=None) -> None:
+        await asyncio.sleep(ms / 1000)
+        run.wait_stats.pauses += 1
+        run.wait_stats.fixed_ms += ms
+        run.wait_stats.waited_ms += ms
+
+    async def after_test(self, run, result) -> None:
+        result.metrics["waits"] = run.wait_stats.as_dict()
+
+
+class WaitEngine(FixedWaits):
+    """Resolve each pause as soon as the page is ready.
+
+    Ready means no Suspense fallback is rendered, no XHR/fetch request is in
+    flight and the network has been quiet for ``quiet_ms``; if the pause was
+    followed by an action on a locator, that locator must also be visible.
+    Each pause is capped by its original duration, and by ``ceiling_ms``
+    when one is given.
+    """
+
+    def __init__(self, quiet_ms: int = 100, ceiling_ms: float | None = None, poll_ms: int = 50):
+        self.quiet_ms = quiet_ms
+        self.ceiling_ms = ceiling_ms
+        self.poll_ms = poll_ms
+
+    async def on_context(self, run, context) -> None:
+        await context.add_init_script(read_js("ready.js"))
+
+    async def pause(self, run, ms: float, page=None, target=None) -> None:
+        ceiling = ms if self.ceiling_ms is None else min(ms, self.ceiling_ms)
+        page = page or run.current_page()
+        started = time.perf_counter()
+        ready = True
+        if page is not None:
+            ready = await self._until_ready(page, target, started + ceiling / 1000)
+        waited = (time.perf_counter() - started) * 1000
+        stats = run.wait_stats
+        stats.pauses += 1
+        stats.fixed_ms += ms
+        stats.waited_ms += waited
+        stats.ceilings_hit += not ready
+
+    async def _until_ready(self, page, target, deadline: float) -> bool:
+        # A navigation can tear down the execution context mid-wait, so keep
+        # retrying against the new document until the deadline.
+        while True:
+            remaining = (deadline - time.perf_counter()) * 1000
+            if remaining <= 0:
+                return False
+            try:
+                await page.wait_for_function(
+                    READY_PREDICATE, arg=self.quiet_ms, polling=self.poll_ms, timeout=remaining,
+                )
+                break
+            except PlaywrightTimeoutError:
+                return False
+            except PlaywrightError:
+                if page.is_closed():
+                    return False
+                await asyncio.sleep(self.poll_ms / 1000)
+        if target is None:
+            return True
+        remaining = (deadline - time.perf_counter()) * 1000
+        if remaining <= 0:
+            return False
+        try:
+            await target.wait_for(state="visible", timeout=remaining)
+        except PlaywrightError:
+            # Leave it to the action itself to fail with its own timeout
+            return False
+        return True